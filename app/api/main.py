@@ -15,6 +15,8 @@ from pydantic import BaseModel, Field
 
 from src.config import get_settings
 from src.rag import AgenticRAG, NaiveRAG, RAGResponse
+from src.retrieval import aclose_vector_stores
+from src.retrieval.semantic_cache import get_semantic_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,6 +35,7 @@ async def lifespan(app: FastAPI):
 
     logger.info("Shutting down RAG API Server...")
     rag_instances.clear()
+    await aclose_vector_stores()
 
 
 app = FastAPI(
@@ -173,6 +176,18 @@ async def system_info():
     )
 
 
+@app.get("/stats/cache")
+async def cache_stats():
+    """検索キャッシュの統計（ヒット率・節約できた検索時間）を取得"""
+    settings = get_settings()
+    return {
+        "semantic_cache": {
+            "enabled": settings.semantic_cache_enabled,
+            **get_semantic_cache().stats(),
+        }
+    }
+
+
 @app.post("/query", response_model=QueryResponse)
 async def query(request: QueryRequest):
     """
@@ -189,7 +204,7 @@ async def query(request: QueryRequest):
         )
 
         rag = get_rag_instance(request.rag_type, request.top_k or 5)
-        response = rag.query(request.question)
+        response = await rag.aquery(request.question)
 
         return rag_response_to_api_response(response, request.rag_type.value)
 
@@ -0,0 +1,162 @@
+"""
+フィルタ検索性能計測スクリプト
+
+合成データ（10k/100k/1Mポイント）をQdrantに投入し、
+フィルタなし・フィルタあり（インデックスなし/あり）の検索遅延を比較する
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from qdrant_client.http import models as qdrant_models
+
+from src.retrieval.vector_store import PAYLOAD_INDEXES, QdrantVectorStore
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+NUM_CATEGORIES = 6
+NUM_SOURCE_FILES = 64
+
+
+def synthetic_payloads(n: int, rng: np.random.Generator):
+    """取り込み時と同じ形のペイロードを生成"""
+    categories = rng.integers(1, NUM_CATEGORIES + 1, size=n)
+    files = rng.integers(0, NUM_SOURCE_FILES, size=n)
+    pages = rng.integers(1, 200, size=n)
+    tables = rng.random(n) < 0.1
+    for i in range(n):
+        yield {
+            "chunk_id": f"bench_{i}",
+            "source_file": f"doc_{files[i]:03d}.pdf",
+            "page_number": int(pages[i]),
+            "category_id": int(categories[i]),
+            "is_table": bool(tables[i]),
+        }
+
+
+def wait_until_indexed(store: QdrantVectorStore, timeout: float = 600.0):
+    """最適化（HNSW・インデックス構築）の完了を待つ"""
+    start = time.time()
+    while time.time() - start < timeout:
+        info = store.client.get_collection(collection_name=store.collection_name)
+        if info.status == qdrant_models.CollectionStatus.GREEN:
+            return
+        time.sleep(1.0)
+    logger.warning("Timed out waiting for collection to become green")
+
+
+def measure(store: QdrantVectorStore, queries: np.ndarray, metadata_filter, top_k: int) -> dict:
+    """クエリごとの検索遅延を計測"""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        store.search(
+            query, top_k=top_k, metadata_filter=metadata_filter, with_content=False
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def run_size(n: int, dim: int, num_queries: int, top_k: int, host, port) -> list[dict]:
+    """指定件数のコレクションで計測"""
+    rng = np.random.default_rng(42)
+    collection_name = f"bench_filter_{n}"
+
+    store = QdrantVectorStore(
+        host=host, port=port, collection_name=collection_name, embedding_dimension=dim
+    )
+    store.delete_collection()
+    # インデックスなしの状態から計測するため、作成されたペイロードインデックスを外す
+    for field_name in PAYLOAD_INDEXES:
+        store.client.delete_payload_index(
+            collection_name=collection_name, field_name=field_name
+        )
+
+    logger.info(f"Uploading {n} points (dim={dim}) to {collection_name}")
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    store.client.upload_collection(
+        collection_name=collection_name,
+        vectors=vectors,
+        payload=synthetic_payloads(n, rng),
+        batch_size=1024,
+        parallel=2,
+    )
+    wait_until_indexed(store)
+
+    queries = rng.standard_normal((num_queries, dim), dtype=np.float32)
+    filters = {
+        "category (eq)": {"category_id": 3},
+        "source_file (any-of)": {"source_file": ["doc_001.pdf", "doc_002.pdf"]},
+        "page range": {"page_number": {"gte": 10, "lt": 20}},
+    }
+
+    rows = [{"points": n, "filter": "none", "index": "-", **measure(store, queries, None, top_k)}]
+    for name, metadata_filter in filters.items():
+        rows.append(
+            {"points": n, "filter": name, "index": "no",
+             **measure(store, queries, metadata_filter, top_k)}
+        )
+
+    store._ensure_payload_indexes()
+    wait_until_indexed(store)
+    for name, metadata_filter in filters.items():
+        rows.append(
+            {"points": n, "filter": name, "index": "yes",
+             **measure(store, queries, metadata_filter, top_k)}
+        )
+
+    store.delete_collection()
+    return rows
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark filtered vs unfiltered search")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+        help="Collection sizes (default: 10000 100000 1000000)",
+    )
+    parser.add_argument(
+        "--dim",
+        type=int,
+        default=256,
+        help="Vector dimension (default: 256; 1536 needs ~6GB RAM at 1M points)",
+    )
+    parser.add_argument("--queries", type=int, default=200, help="Queries per setting")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--host", type=str, default=None, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=None, help="Qdrant port")
+
+    args = parser.parse_args()
+    logger.info(f"Indexed payload fields: {list(PAYLOAD_INDEXES)}")
+
+    results = []
+    for n in args.sizes:
+        results.extend(run_size(n, args.dim, args.queries, args.top_k, args.host, args.port))
+
+    print(f"\n{'points':>10}  {'filter':<22}{'index':>6}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for row in results:
+        print(
+            f"{row['points']:>10}  {row['filter']:<22}{row['index']:>6}"
+            f"{row['p50_ms']:>12.2f}{row['p95_ms']:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Matryoshka検索性能計測スクリプト
+
+同梱PDFのチャンクと評価データセットの質問を埋め込み、
+- 全次元ベクトルのHNSW検索
+- 先頭 d 次元（128/256/512）のHNSW検索 + 全次元での再スコアリング
+について、全次元の厳密検索に対する recall@k、検索遅延(p50/p95)、
+メモリ上に置くベクトルの推定サイズを比較する
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from qdrant_client.http import models as qdrant_models
+
+from src.config import get_settings
+from src.ingestion import get_embedder, get_parser, get_text_splitter
+from src.ingestion.text_splitter import TextChunk
+from src.retrieval.vector_store import QdrantVectorStore
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+UPLOAD_BATCH_SIZE = 256
+
+
+def load_chunks(pdf_dir: Path, max_files: int) -> list[TextChunk]:
+    """同梱PDFをチャンク分割"""
+    settings = get_settings()
+    parser = get_parser("pymupdf")
+    splitter = get_text_splitter(
+        "recursive", chunk_size=settings.chunk_size, chunk_overlap=settings.chunk_overlap
+    )
+
+    chunks: list[TextChunk] = []
+    for pdf_path in sorted(pdf_dir.glob("*.pdf"))[:max_files]:
+        doc = parser.parse(pdf_path)
+        for page in doc.pages:
+            chunks.extend(splitter.split(page.text, doc.file_name, page.page_number))
+    return chunks
+
+
+def embed(texts: list[str], cache_path: Path) -> np.ndarray:
+    """テキストを埋め込み（同じテキスト集合なら保存済みの埋め込みを再利用）"""
+    if cache_path.exists():
+        with np.load(cache_path) as data:
+            if len(data["embeddings"]) == len(texts):
+                logger.info(f"Loaded cached embeddings: {cache_path}")
+                return data["embeddings"]
+
+    embedder = get_embedder("openai")
+    embeddings = np.asarray(embedder.embed_texts(texts), dtype=np.float32)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(cache_path, embeddings=embeddings)
+    return embeddings
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, top_k: int) -> np.ndarray:
+    """全次元のコサイン類似度による厳密な上位k件（正解）"""
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :top_k]
+
+
+def wait_until_indexed(store: QdrantVectorStore, timeout: float = 600.0):
+    """最適化（HNSW構築）の完了を待つ"""
+    start = time.time()
+    while time.time() - start < timeout:
+        info = store.client.get_collection(collection_name=store.collection_name)
+        if info.status == qdrant_models.CollectionStatus.GREEN:
+            return
+        time.sleep(1.0)
+    logger.warning(f"Timed out waiting for {store.collection_name} to become green")
+
+
+def run_mode(
+    matryoshka_dim: int,
+    chunks: list[TextChunk],
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    expected: np.ndarray,
+    top_k: int,
+    rescore_limit: int,
+    host,
+    port,
+) -> dict:
+    """1つの設定でコレクションを作成し、recall と遅延を計測"""
+    store = QdrantVectorStore(
+        host=host,
+        port=port,
+        collection_name=f"bench_matryoshka_{matryoshka_dim or 'full'}",
+        embedding_dimension=corpus.shape[1],
+        matryoshka_dim=matryoshka_dim,
+        rescore_limit=rescore_limit,
+    )
+    store.delete_collection()
+    for start in range(0, len(chunks), UPLOAD_BATCH_SIZE):
+        end = start + UPLOAD_BATCH_SIZE
+        store.add_documents(chunks[start:end], corpus[start:end])
+    wait_until_indexed(store)
+
+    index_of = {chunk.chunk_id: i for i, chunk in enumerate(chunks)}
+    latencies, recalls = [], []
+    for query, truth in zip(queries, expected, strict=True):
+        start = time.perf_counter()
+        results = store.search(query, top_k=top_k, with_content=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {index_of[r.chunk_id] for r in results}
+        recalls.append(len(found & set(truth.tolist())) / top_k)
+
+    store.delete_collection()
+    in_memory_dim = matryoshka_dim or corpus.shape[1]
+    return {
+        "mode": f"matryoshka-{matryoshka_dim}" if matryoshka_dim else "full",
+        "ram_mb": len(chunks) * in_memory_dim * 4 / 1024**2,
+        "recall": float(np.mean(recalls)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark truncated-prefix search with full-dimension rescoring"
+    )
+    parser.add_argument(
+        "--dims",
+        type=int,
+        nargs="+",
+        default=[128, 256, 512],
+        help="Truncated dimensions to compare against full vectors (default: 128 256 512)",
+    )
+    parser.add_argument("--max-files", type=int, default=50, help="PDFs to chunk")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query")
+    parser.add_argument(
+        "--rescore-limit", type=int, default=None, help="Candidates rescored with full vectors"
+    )
+    parser.add_argument("--host", type=str, default=None, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=None, help="Qdrant port")
+
+    args = parser.parse_args()
+
+    settings = get_settings()
+    project_root = Path(__file__).parent.parent
+    dataset_path = project_root / "data" / "evaluation" / "qa_dataset.parquet"
+    pdf_dir = project_root / "data" / "raw" / "pdfs"
+    cache_dir = settings.processed_data_dir / "benchmark"
+
+    questions = pd.read_parquet(dataset_path)["question"].tolist()
+    chunks = load_chunks(pdf_dir, args.max_files)
+    logger.info(f"Loaded {len(questions)} questions and {len(chunks)} chunks")
+
+    corpus = embed([c.content for c in chunks], cache_dir / "matryoshka_corpus.npz")
+    queries = embed(questions, cache_dir / "matryoshka_queries.npz")
+    expected = exact_top_k(corpus, queries, args.top_k)
+
+    results = [
+        run_mode(
+            dim, chunks, corpus, queries, expected, args.top_k,
+            args.rescore_limit or settings.matryoshka_rescore_limit, args.host, args.port,
+        )
+        for dim in [0, *args.dims]
+    ]
+
+    print(
+        f"\n{'mode':<18}{'RAM (MB)':>10}{f'recall@{args.top_k}':>12}"
+        f"{'p50 (ms)':>10}{'p95 (ms)':>10}"
+    )
+    for row in results:
+        print(
+            f"{row['mode']:<18}{row['ram_mb']:>10.1f}{row['recall']:>12.3f}"
+            f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+文字n-gramインデックス性能計測スクリプト
+
+合成したチャンク（Zipf分布の語彙に年度・条番号・型番を埋め込んだもの）で
+n-gramインデックスを作成し、
+- インデックスの作成時間（追加・保存）とサイズ、最大常駐メモリ
+- 検索語ごとの検索遅延(p50/p95)
+を計測する。インデックスはメモリマップで読み込み直してから検索する。
+"""
+
+import logging
+import resource
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ingestion.text_splitter import TextChunk
+from src.retrieval.ngram_index import NgramIndex
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+KANJI = np.array([chr(c) for c in range(0x4E00, 0x4E00 + 2000)])
+HIRAGANA = np.array([chr(c) for c in range(0x3041, 0x3094)])
+
+QUERIES = [
+    "令和4年度の売上高は？",
+    "第12条の規定について",
+    "製品XK-4000の仕様を教えて",
+    "{common}と{rare}の関係",
+]
+
+
+def synthetic_vocabulary(rng: np.random.Generator) -> list[str]:
+    """合成チャンクの語彙（頻度順）"""
+    return ["".join(rng.choice(KANJI, size=rng.integers(2, 4))) for _ in range(50_000)]
+
+
+def synthetic_chunks(
+    n: int,
+    words_per_chunk: int,
+    vocabulary: list[str],
+    rng: np.random.Generator,
+    batch_size: int = 10_000,
+) -> Iterator[list[TextChunk]]:
+    """合成チャンクを batch_size 件ずつ生成（全件をメモリに載せない）"""
+    weights = 1 / np.arange(1, len(vocabulary) + 1) ** 1.1
+    for batch_start in range(0, n, batch_size):
+        size = min(batch_size, n - batch_start)
+        word_ids = rng.choice(
+            len(vocabulary), size=(size, words_per_chunk), p=weights / weights.sum()
+        )
+        particles = rng.choice(HIRAGANA, size=(size, words_per_chunk))
+
+        chunks = []
+        for j in range(size):
+            i = batch_start + j
+            parts = [vocabulary[w] + p for w, p in zip(word_ids[j], particles[j], strict=True)]
+            if i % 500 == 0:
+                parts.insert(1, f"令和{i % 7}年度")
+            if i % 300 == 0:
+                parts.insert(2, f"第{(i // 300) % 50}条")
+            if i % 1000 == 0:
+                parts.insert(3, f"製品XK-{i}")
+            chunks.append(
+                TextChunk(
+                    content="".join(parts),
+                    chunk_id=f"doc{i // 100}.pdf_p{i % 100}_c0",
+                    source_file=f"doc{i // 100}.pdf",
+                    page_number=i % 100,
+                    chunk_index=0,
+                )
+            )
+        yield chunks
+
+
+def measure(index: NgramIndex, query: str, repeats: int) -> dict:
+    index.search(query)  # メモリマップのページを読み込んでおく
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        results = index.search(query, limit=20)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "query": query,
+        "hits": len(results),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the character n-gram index")
+    parser.add_argument("--size", type=int, default=100_000, help="Number of synthetic chunks")
+    parser.add_argument("--words", type=int, default=200, help="Words per chunk")
+    parser.add_argument("--repeats", type=int, default=500, help="Searches per query")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vocabulary = synthetic_vocabulary(rng)
+    queries = [q.format(common=vocabulary[0], rare=vocabulary[-1]) for q in QUERIES]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir)
+        index = NgramIndex(path)
+        add_s = 0.0
+        for chunks in synthetic_chunks(args.size, args.words, vocabulary, rng):
+            start = time.perf_counter()
+            index.add_chunks(chunks)
+            add_s += time.perf_counter() - start
+        logger.info(f"Added {args.size} chunks")
+        start = time.perf_counter()
+        index.save()
+        save_s = time.perf_counter() - start
+
+        index = NgramIndex.load(path)
+        # ランの書き出し・保存時のマージも含めたプロセス全体の最大常駐メモリ
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        rows = [measure(index, query, args.repeats) for query in queries]
+        size_mb = index.nbytes / 1024**2
+
+    print(
+        f"\nChunks: {args.size}, add: {add_s:.1f} s, save: {save_s:.1f} s, "
+        f"index size: {size_mb:.1f} MB, peak RSS: {peak_rss_mb:.0f} MB"
+    )
+    print(f"{'query':<32}{'hits':>6}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+    for row in rows:
+        print(f"{row['query']:<32}{row['hits']:>6}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+ベクトル量子化性能計測スクリプト
+
+float32 / int8 / binary の各量子化方式について、Qdrant とローカル（NumPy）
+バックエンドそれぞれで
+- メモリ上に置くベクトルのサイズ
+- 検索遅延(p50/p95)
+- float32 の厳密検索に対する recall@k
+を比較する
+
+--embeddings に実際の埋め込み（benchmark_matryoshka.py が保存する npz など）を
+指定しない場合は合成データを使う（合成データでは binary の recall は低めに出る）。
+"""
+
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from qdrant_client.http import models as qdrant_models
+
+from src.ingestion.text_splitter import TextChunk
+from src.retrieval.local_vector_store import LocalVectorStore
+from src.retrieval.vector_store import QdrantVectorStore, VectorStoreBase
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+MODES = ["", "int8", "binary"]
+
+# Qdrantがメモリ上に置く1成分あたりのバイト数（量子化時の元ベクトルはディスク）
+QDRANT_BYTES_PER_DIM = {"": 4.0, "int8": 1.0, "binary": 1 / 8}
+
+
+def load_vectors(
+    embeddings_path: Path | None, queries_path: Path | None, n: int, dim: int, num_queries: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """コーパスとクエリのベクトルを用意"""
+    rng = np.random.default_rng(42)
+    if embeddings_path is None:
+        corpus = rng.standard_normal((n, dim), dtype=np.float32)
+    else:
+        with np.load(embeddings_path) as data:
+            corpus = data["embeddings"].astype(np.float32)
+
+    if queries_path is not None:
+        with np.load(queries_path) as data:
+            return corpus, data["embeddings"][:num_queries].astype(np.float32)
+
+    # クエリファイルがなければコーパスの点にノイズを加えたものを使う
+    picked = corpus[rng.choice(len(corpus), size=num_queries, replace=False)]
+    noise = rng.standard_normal(picked.shape, dtype=np.float32)
+    noise *= np.linalg.norm(picked, axis=1, keepdims=True) / np.sqrt(picked.shape[1])
+    return corpus, picked + 0.5 * noise
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, top_k: int) -> np.ndarray:
+    """float32 のコサイン類似度による厳密な上位k件（正解）"""
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ corpus.T), axis=1)[:, :top_k]
+
+
+def wait_until_indexed(store: QdrantVectorStore, timeout: float = 600.0):
+    """最適化（HNSW・量子化）の完了を待つ"""
+    start = time.time()
+    while time.time() - start < timeout:
+        info = store.client.get_collection(collection_name=store.collection_name)
+        if info.status == qdrant_models.CollectionStatus.GREEN:
+            return
+        time.sleep(1.0)
+    logger.warning(f"Timed out waiting for {store.collection_name} to become green")
+
+
+def build_qdrant(mode: str, corpus: np.ndarray, oversampling: float, host, port) -> QdrantVectorStore:
+    store = QdrantVectorStore(
+        host=host,
+        port=port,
+        collection_name=f"bench_quantization_{mode or 'float32'}",
+        embedding_dimension=corpus.shape[1],
+        matryoshka_dim=0,
+        quantization=mode,
+        oversampling=oversampling,
+    )
+    store.delete_collection()
+    store.client.upload_collection(
+        collection_name=store.collection_name,
+        vectors=corpus,
+        payload=({"chunk_id": str(i)} for i in range(len(corpus))),
+        ids=list(range(len(corpus))),
+        batch_size=1024,
+        parallel=2,
+    )
+    wait_until_indexed(store)
+    return store
+
+
+def build_local(mode: str, corpus: np.ndarray, oversampling: float, path: Path) -> LocalVectorStore:
+    store = LocalVectorStore(
+        path=path / (mode or "float32"),
+        embedding_dimension=corpus.shape[1],
+        quantization=mode,
+        oversampling=oversampling,
+    )
+    chunks = [
+        TextChunk(content="", chunk_id=str(i), source_file="", page_number=0, chunk_index=i)
+        for i in range(len(corpus))
+    ]
+    store.add_documents(chunks, corpus)
+    store.search(corpus[0], top_k=1)  # 量子化コードを作成しておく
+    return store
+
+
+def measure(store: VectorStoreBase, queries: np.ndarray, expected: np.ndarray, top_k: int) -> dict:
+    latencies, recalls = [], []
+    for query, truth in zip(queries, expected, strict=True):
+        start = time.perf_counter()
+        results = store.search(query, top_k=top_k, with_content=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {int(r.chunk_id) for r in results}
+        recalls.append(len(found & set(truth.tolist())) / top_k)
+    return {
+        "recall": float(np.mean(recalls)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark int8 / binary vector quantization")
+    parser.add_argument("--embeddings", type=Path, default=None, help="npz with corpus embeddings")
+    parser.add_argument("--query-embeddings", type=Path, default=None, help="npz with query embeddings")
+    parser.add_argument("--size", type=int, default=100_000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=1536, help="Synthetic vector dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--oversampling", type=float, default=3.0, help="Rescoring oversampling")
+    parser.add_argument(
+        "--backends", type=str, nargs="+", default=["qdrant", "local"], help="qdrant and/or local"
+    )
+    parser.add_argument("--host", type=str, default=None, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=None, help="Qdrant port")
+
+    args = parser.parse_args()
+
+    corpus, queries = load_vectors(
+        args.embeddings, args.query_embeddings, args.size, args.dim, args.queries
+    )
+    expected = exact_top_k(corpus, queries, args.top_k)
+    logger.info(f"Corpus: {corpus.shape}, queries: {len(queries)}")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for mode in MODES:
+            label = mode or "float32"
+            if "qdrant" in args.backends:
+                store = build_qdrant(mode, corpus, args.oversampling, args.host, args.port)
+                ram = corpus.shape[0] * corpus.shape[1] * QDRANT_BYTES_PER_DIM[mode]
+                rows.append(
+                    {"backend": "qdrant", "mode": label, "ram_mb": ram / 1024**2,
+                     **measure(store, queries, expected, args.top_k)}
+                )
+                store.delete_collection()
+            if "local" in args.backends:
+                store = build_local(mode, corpus, args.oversampling, Path(tmp_dir))
+                info = store.get_collection_info()
+                ram = info["quantized_bytes"] or info["vectors_bytes"]
+                rows.append(
+                    {"backend": "local", "mode": label, "ram_mb": ram / 1024**2,
+                     **measure(store, queries, expected, args.top_k)}
+                )
+
+    print(
+        f"\n{'backend':<10}{'mode':<10}{'RAM (MB)':>10}{f'recall@{args.top_k}':>12}"
+        f"{'p50 (ms)':>10}{'p95 (ms)':>10}"
+    )
+    for row in rows:
+        print(
+            f"{row['backend']:<10}{row['mode']:<10}{row['ram_mb']:>10.1f}{row['recall']:>12.3f}"
+            f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+        )
+    print("\nRAM: vectors searched in memory (quantized modes rescore from on-disk float32)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+リランカー性能計測スクリプト
+
+同梱PDFから作成したチャンクと評価データセットの質問を使い、
+推論バックエンドごとに候補数20/50/100件のリランク遅延(p50/p95)を計測する
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.ingestion import get_parser, get_text_splitter
+from src.retrieval.reranker import RERANKER_BACKENDS, Reranker
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def load_candidate_texts(pdf_dir: Path, max_chunks: int, max_files: int = 5) -> list[str]:
+    """同梱PDFをチャンク分割してリランク候補テキストを作成"""
+    parser = get_parser("pymupdf")
+    splitter = get_text_splitter("recursive", chunk_size=1000, chunk_overlap=200)
+
+    texts: list[str] = []
+    for pdf_path in sorted(pdf_dir.glob("*.pdf"))[:max_files]:
+        doc = parser.parse(pdf_path)
+        for page in doc.pages:
+            for chunk in splitter.split(page.text, doc.file_name, page.page_number):
+                texts.append(chunk.content)
+                if len(texts) >= max_chunks:
+                    return texts
+    return texts
+
+
+def benchmark(
+    reranker: Reranker,
+    questions: list[str],
+    texts: list[str],
+    candidate_counts: list[int],
+    repeats: int,
+) -> list[dict]:
+    """候補数ごとにリランク遅延を計測"""
+    # ウォームアップ（初回のグラフ構築・メモリ確保を計測から除外）
+    reranker.score(questions[0], texts[: min(8, len(texts))])
+
+    rows = []
+    for count in candidate_counts:
+        contents = texts[:count]
+        latencies = []
+        for i in range(repeats):
+            question = questions[i % len(questions)]
+            start = time.perf_counter()
+            reranker.score(question, contents)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        rows.append(
+            {
+                "backend": reranker.backend,
+                "candidates": len(contents),
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p95_ms": float(np.percentile(latencies, 95)),
+            }
+        )
+    return rows
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark reranker latency")
+    parser.add_argument(
+        "--backends",
+        type=str,
+        nargs="+",
+        default=list(RERANKER_BACKENDS),
+        help="Reranker backends to benchmark (default: torch quantized onnx)",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        nargs="+",
+        default=[20, 50, 100],
+        help="Candidate counts (default: 20 50 100)",
+    )
+    parser.add_argument("--repeats", type=int, default=20, help="Repeats per setting")
+    parser.add_argument("--max-length", type=int, default=None, help="Max sequence length")
+    parser.add_argument("--batch-size", type=int, default=None, help="Inference batch size")
+    parser.add_argument("--num-threads", type=int, default=None, help="CPU threads")
+
+    args = parser.parse_args()
+
+    project_root = Path(__file__).parent.parent
+    dataset_path = project_root / "data" / "evaluation" / "qa_dataset.parquet"
+    pdf_dir = project_root / "data" / "raw" / "pdfs"
+
+    questions = pd.read_parquet(dataset_path)["question"].tolist()
+    texts = load_candidate_texts(pdf_dir, max_chunks=max(args.candidates))
+    logger.info(f"Loaded {len(questions)} questions and {len(texts)} candidate chunks")
+
+    results = []
+    for backend in args.backends:
+        reranker = Reranker(
+            backend=backend,
+            max_length=args.max_length,
+            batch_size=args.batch_size,
+            num_threads=args.num_threads,
+        )
+        results.extend(
+            benchmark(reranker, questions, texts, args.candidates, args.repeats)
+        )
+
+    print(f"\n{'backend':<12}{'candidates':>12}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for row in results:
+        print(
+            f"{row['backend']:<12}{row['candidates']:>12}"
+            f"{row['p50_ms']:>12.1f}{row['p95_ms']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+カテゴリシャード検索性能計測スクリプト
+
+同じ合成データを
+- 単一コレクション（category_id のペイロードインデックスでフィルタ）
+- カテゴリごとのシャードコレクション
+に投入し、カテゴリ指定検索とカテゴリ指定なし検索の遅延を比較する
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from qdrant_client.http import models as qdrant_models
+
+from src.retrieval.vector_store import (
+    QdrantVectorStore,
+    ShardedQdrantVectorStore,
+    VectorStoreBase,
+    shard_collection_name,
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+NUM_CATEGORIES = 6
+
+
+def wait_until_indexed(store: QdrantVectorStore, timeout: float = 600.0):
+    """最適化（HNSW・インデックス構築）の完了を待つ"""
+    start = time.time()
+    while time.time() - start < timeout:
+        info = store.client.get_collection(collection_name=store.collection_name)
+        if info.status == qdrant_models.CollectionStatus.GREEN:
+            return
+        time.sleep(1.0)
+    logger.warning(f"Timed out waiting for {store.collection_name} to become green")
+
+
+def upload(store: QdrantVectorStore, vectors: np.ndarray, categories: np.ndarray, ids: np.ndarray):
+    """ベクトルとペイロードを一括投入"""
+    store.client.upload_collection(
+        collection_name=store.collection_name,
+        vectors=vectors,
+        payload=(
+            {"chunk_id": f"bench_{i}", "category_id": int(c)}
+            for i, c in zip(ids, categories, strict=True)
+        ),
+        ids=[int(i) for i in ids],
+        batch_size=1024,
+        parallel=2,
+    )
+    wait_until_indexed(store)
+
+
+def measure(store: VectorStoreBase, queries: np.ndarray, metadata_filter, top_k: int) -> dict:
+    """クエリごとの検索遅延を計測"""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        store.search(query, top_k=top_k, metadata_filter=metadata_filter, with_content=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def recall_vs_single(
+    single: VectorStoreBase, sharded: VectorStoreBase, queries: np.ndarray, top_k: int
+) -> float:
+    """カテゴリ指定なし検索で、統合結果が単一コレクションの結果とどれだけ一致するか"""
+    overlaps = []
+    for query in queries:
+        expected = {r.chunk_id for r in single.search(query, top_k, with_content=False)}
+        actual = {r.chunk_id for r in sharded.search(query, top_k, with_content=False)}
+        overlaps.append(len(expected & actual) / max(len(expected), 1))
+    return float(np.mean(overlaps))
+
+
+def run_size(n: int, dim: int, num_queries: int, top_k: int, host, port) -> list[dict]:
+    """指定件数で単一コレクションとシャードを比較"""
+    rng = np.random.default_rng(42)
+    base_name = f"bench_shard_{n}"
+
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    # 実データに近づけるため、カテゴリの件数に偏りを持たせる
+    weights = np.linspace(2.0, 0.5, NUM_CATEGORIES)
+    categories = rng.choice(
+        np.arange(1, NUM_CATEGORIES + 1), size=n, p=weights / weights.sum()
+    )
+    ids = np.arange(n)
+
+    single = QdrantVectorStore(
+        host=host, port=port, collection_name=base_name, embedding_dimension=dim
+    )
+    single.delete_collection()
+    logger.info(f"Uploading {n} points to single collection {base_name}")
+    upload(single, vectors, categories, ids)
+
+    sharded = ShardedQdrantVectorStore(
+        host=host, port=port, collection_name=base_name, embedding_dimension=dim
+    )
+    for category in range(1, NUM_CATEGORIES + 1):
+        shard = sharded.shard(category)
+        shard.delete_collection()
+        mask = categories == category
+        logger.info(
+            f"Uploading {int(mask.sum())} points to {shard_collection_name(base_name, category)}"
+        )
+        upload(shard, vectors[mask], categories[mask], ids[mask])
+
+    queries = rng.standard_normal((num_queries, dim), dtype=np.float32)
+    rows = []
+    for label, metadata_filter in [
+        ("category (largest)", {"category_id": 1}),
+        ("category (smallest)", {"category_id": NUM_CATEGORIES}),
+        ("categories any-of(2)", {"category_id": [1, 2]}),
+        ("none (fan-out)", None),
+    ]:
+        for layout, store in [("single+filter", single), ("sharded", sharded)]:
+            rows.append(
+                {"points": n, "filter": label, "layout": layout,
+                 **measure(store, queries, metadata_filter, top_k)}
+            )
+
+    overlap = recall_vs_single(single, sharded, queries[:50], top_k)
+    logger.info(f"Fan-out top-{top_k} overlap with single collection: {overlap:.3f}")
+
+    single.delete_collection()
+    sharded.delete_collection()
+    return rows
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark category-sharded collections vs payload-filtered search"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+        help="Collection sizes (default: 10000 100000 1000000)",
+    )
+    parser.add_argument("--dim", type=int, default=256, help="Vector dimension (default: 256)")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per setting")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--host", type=str, default=None, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=None, help="Qdrant port")
+
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        results.extend(run_size(n, args.dim, args.queries, args.top_k, args.host, args.port))
+
+    print(f"\n{'points':>10}  {'filter':<22}{'layout':<15}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+    for row in results:
+        print(
+            f"{row['points']:>10}  {row['filter']:<22}{row['layout']:<15}"
+            f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,10 @@ from src.ingestion import get_embedder, get_parser, get_text_splitter
 from src.ingestion.image_processor import get_image_processor
 from src.ingestion.document_classifier import get_document_classifier
 from src.retrieval import get_vector_store
+from src.retrieval.centroids import get_document_centroids
+from src.rag.query_router import get_category_centroids
+from src.retrieval.context_expansion import get_adjacency_index
+from src.retrieval.ngram_index import get_ngram_index
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -28,9 +32,13 @@ def ingest_pdfs(
     parser_type: str = "hybrid",
     use_vision: bool = True,
     use_mock_embedder: bool = False,
+    shard_by_category: bool = False,
 ):
     """
     PDFディレクトリ内のファイルをベクトルDBに取り込む
+
+    shard_by_category=True の場合はカテゴリごとのコレクションに分けて格納する
+    （検索時は VECTOR_STORE_TYPE=qdrant_sharded を設定する）。
     """
     settings = get_settings()
 
@@ -38,7 +46,11 @@ def ingest_pdfs(
     parser = get_parser(parser_type)
     splitter = get_text_splitter("table_aware", chunk_size=chunk_size, chunk_overlap=chunk_overlap)
     embedder = get_embedder("mock" if use_mock_embedder else "openai")
-    vector_store = get_vector_store()
+    vector_store = get_vector_store("qdrant_sharded" if shard_by_category else None)
+    adjacency = get_adjacency_index()
+    ngram_index = get_ngram_index()
+    centroids = get_category_centroids()
+    document_centroids = get_document_centroids()
     
     # Vision & Classifier
     image_processor = get_image_processor() if use_vision else None
@@ -102,14 +114,16 @@ def ingest_pdfs(
 
             logger.info(f"  - Generated {len(all_chunks)} chunks (with vision: {use_vision})")
 
-            # 4. 埋め込み生成
-            embedded_chunks = embedder.embed_chunks(all_chunks)
+            # 4. 埋め込み生成（行はチャンクの順の float32 行列）
+            embeddings = embedder.embed_chunks(all_chunks)
             logger.info(f"  - Generated embeddings")
 
             # 5. ベクトルDBに格納
-            chunks_list = [c for c, _ in embedded_chunks]
-            embeddings_list = [e for _, e in embedded_chunks]
-            count = vector_store.add_documents(chunks_list, embeddings_list)
+            count = vector_store.add_documents(all_chunks, embeddings)
+            adjacency.add_chunks(all_chunks)
+            ngram_index.add_chunks(all_chunks)
+            centroids.add(classification["category_id"], embeddings, source=doc.file_name)
+            document_centroids.replace(doc.file_name, embeddings)
             total_chunks += count
 
             logger.info(f"  - Added {count} documents to vector store")
@@ -120,6 +134,13 @@ def ingest_pdfs(
             logger.error(traceback.format_exc())
             continue
 
+    # 隣接チャンク拡張用・文字列一致用のインデックスと、クエリルーター・階層検索用の重心を保存
+    vector_store.flush()
+    adjacency.save()
+    ngram_index.save()
+    centroids.save()
+    document_centroids.save()
+
     # サマリー
     logger.info("=" * 50)
     logger.info("Ingestion Summary (v4 Vision + Auto-Tagging):")
@@ -162,6 +183,11 @@ def main():
         action="store_true",
         help="Use mock embedder (for development)",
     )
+    parser.add_argument(
+        "--shard-by-category",
+        action="store_true",
+        help="Store each category in its own collection (query with VECTOR_STORE_TYPE=qdrant_sharded)",
+    )
 
     args = parser.parse_args()
 
@@ -178,6 +204,7 @@ def main():
         chunk_overlap=args.chunk_overlap,
         use_vision=not args.no_vision,
         use_mock_embedder=args.mock,
+        shard_by_category=args.shard_by_category,
     )
 
 
@@ -0,0 +1,101 @@
+"""
+インデックスのスナップショット書き出し・読み込みスクリプト
+
+取り込み済みのベクトルストア（埋め込み・ペイロード・スパースベクトル）と
+補助インデックス（n-gram・チャンク隣接・重心）をディレクトリに書き出し、
+新しいAPIレプリカやテスト環境で取り込みをやり直さずに復元する。
+
+    python scripts/snapshot_index.py export data/snapshots/latest
+    python scripts/snapshot_index.py import data/snapshots/latest --store local
+    python scripts/snapshot_index.py verify data/snapshots/latest
+"""
+
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.retrieval import get_vector_store
+from src.retrieval.snapshot import export_snapshot, import_snapshot, read_manifest, verify_snapshot
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export / import a snapshot of the retrieval index")
+    parser.add_argument("command", choices=["export", "import", "verify"], help="Operation")
+    parser.add_argument("path", type=str, help="Snapshot directory")
+    parser.add_argument(
+        "--store",
+        type=str,
+        default=None,
+        help="Vector store type: qdrant, qdrant_sharded, local (default: VECTOR_STORE_TYPE)",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1000, help="Chunks per read/write batch (default: 1000)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=4, help="Concurrent upsert batches on import (default: 4)"
+    )
+    parser.add_argument(
+        "--no-auxiliary",
+        action="store_true",
+        help="Skip n-gram / adjacency / centroid indexes",
+    )
+    parser.add_argument(
+        "--recreate",
+        action="store_true",
+        help="Delete the target collection before import",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Check file checksums before import",
+    )
+
+    args = parser.parse_args()
+    path = Path(args.path)
+    started_at = time.perf_counter()
+
+    if args.command == "verify":
+        verify_snapshot(path)
+        print(json.dumps(read_manifest(path), ensure_ascii=False, indent=2))
+        return
+
+    vector_store = get_vector_store(args.store)
+
+    if args.command == "export":
+        manifest = export_snapshot(
+            vector_store, path, batch_size=args.batch_size, include_auxiliary=not args.no_auxiliary
+        )
+        count = manifest["count"]
+    else:
+        if not (path / "manifest.json").exists():
+            logger.error(f"Snapshot not found: {path}")
+            sys.exit(1)
+        if args.recreate:
+            vector_store.delete_collection()
+        count = import_snapshot(
+            path,
+            vector_store,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            include_auxiliary=not args.no_auxiliary,
+            verify=args.verify,
+        )
+        logger.info(f"Vector store: {vector_store.get_collection_info()}")
+
+    elapsed = time.perf_counter() - started_at
+    logger.info(f"{args.command.capitalize()}ed {count} chunks in {elapsed:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+HNSWパラメータ調整スクリプト
+
+取り込み済みコレクションのベクトルを読み出し、HNSWの構築パラメータ (m, ef_construct)
+ごとに一時コレクションを作成して、検索時の hnsw_ef を変えながら
+厳密検索に対する recall@k と検索遅延(p95)を計測する。
+結果のうち recall と遅延の両方で他に劣らない設定（パレートフロンティア）を表示する。
+
+クエリは評価データセットの質問を埋め込んで使う（--sample-queries を指定した場合は
+コーパスのベクトルにノイズを加えたもので代用し、OpenAI APIを呼ばない）。
+"""
+
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from qdrant_client.http import models as qdrant_models
+
+from src.config import get_settings
+from src.ingestion import get_embedder
+from src.retrieval.vector_store import FULL_VECTOR, QdrantVectorStore
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+SCROLL_BATCH_SIZE = 1024
+
+
+def load_corpus_vectors(store: QdrantVectorStore, limit: int | None) -> np.ndarray:
+    """コレクションから全次元のベクトルを読み出す"""
+    vectors, offset = [], None
+    while True:
+        points, offset = store.client.scroll(
+            collection_name=store.collection_name,
+            limit=SCROLL_BATCH_SIZE,
+            offset=offset,
+            with_payload=False,
+            with_vectors=True,
+        )
+        for point in points:
+            vector = point.vector
+            vectors.append(vector[FULL_VECTOR] if isinstance(vector, dict) else vector)
+        if offset is None or (limit is not None and len(vectors) >= limit):
+            break
+    return np.asarray(vectors[:limit], dtype=np.float32)
+
+
+def load_queries(corpus: np.ndarray, num_queries: int, sample: bool) -> np.ndarray:
+    """評価データセットの質問の埋め込み（sample=True の場合はコーパスから合成）"""
+    if sample:
+        rng = np.random.default_rng(42)
+        picked = corpus[rng.choice(len(corpus), size=num_queries, replace=False)]
+        noise = rng.standard_normal(picked.shape, dtype=np.float32)
+        noise *= np.linalg.norm(picked, axis=1, keepdims=True) / np.sqrt(picked.shape[1])
+        return picked + 0.5 * noise
+
+    dataset_path = get_settings().data_dir / "evaluation" / "qa_dataset.parquet"
+    questions = pd.read_parquet(dataset_path)["question"].tolist()[:num_queries]
+    return np.asarray(get_embedder("openai").embed_texts(questions), dtype=np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, top_k: int) -> np.ndarray:
+    """コサイン類似度による厳密な上位k件（正解）"""
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ corpus.T), axis=1)[:, :top_k]
+
+
+def wait_until_indexed(store: QdrantVectorStore, timeout: float = 1800.0):
+    """最適化（HNSW構築）の完了を待つ"""
+    start = time.time()
+    while time.time() - start < timeout:
+        info = store.client.get_collection(collection_name=store.collection_name)
+        if info.status == qdrant_models.CollectionStatus.GREEN:
+            return
+        time.sleep(1.0)
+    logger.warning(f"Timed out waiting for {store.collection_name} to become green")
+
+
+def build(corpus: np.ndarray, m: int, ef_construct: int, host, port) -> tuple[QdrantVectorStore, float]:
+    """指定の構築パラメータで一時コレクションを作成（構築時間を返す）"""
+    store = QdrantVectorStore(
+        host=host,
+        port=port,
+        collection_name=f"tune_hnsw_m{m}_ef{ef_construct}",
+        embedding_dimension=corpus.shape[1],
+        matryoshka_dim=0,
+        quantization="",
+        hnsw_m=m,
+        hnsw_ef_construct=ef_construct,
+    )
+    store.delete_collection()
+    start = time.perf_counter()
+    store.client.upload_collection(
+        collection_name=store.collection_name,
+        vectors=corpus,
+        payload=({"chunk_id": str(i)} for i in range(len(corpus))),
+        ids=list(range(len(corpus))),
+        batch_size=1024,
+        parallel=2,
+    )
+    wait_until_indexed(store)
+    return store, time.perf_counter() - start
+
+
+def measure(
+    store: QdrantVectorStore,
+    queries: np.ndarray,
+    expected: np.ndarray,
+    top_k: int,
+    hnsw_ef: int | None,
+    exact: bool = False,
+) -> dict:
+    latencies, recalls = [], []
+    for query, truth in zip(queries, expected, strict=True):
+        start = time.perf_counter()
+        results = store.search(
+            query.tolist(), top_k=top_k, with_content=False, hnsw_ef=hnsw_ef, exact=exact
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {int(r.chunk_id) for r in results}
+        recalls.append(len(found & set(truth.tolist())) / top_k)
+    return {
+        "recall": float(np.mean(recalls)),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def pareto_frontier(rows: list[dict]) -> list[dict]:
+    """recall が高く p95 遅延が小さい方向で、他の設定に劣らない設定（遅延順）"""
+    frontier, best_recall = [], -1.0
+    for row in sorted(rows, key=lambda r: (r["p95_ms"], -r["recall"])):
+        if row["recall"] > best_recall:
+            frontier.append(row)
+            best_recall = row["recall"]
+    return frontier
+
+
+def print_rows(rows: list[dict], top_k: int) -> None:
+    print(
+        f"{'m':>4}{'ef_construct':>14}{'hnsw_ef':>9}{'build (s)':>11}"
+        f"{f'recall@{top_k}':>12}{'p50 (ms)':>10}{'p95 (ms)':>10}"
+    )
+    for row in rows:
+        print(
+            f"{row['m']:>4}{row['ef_construct']:>14}{row['hnsw_ef']:>9}{row['build_s']:>11.1f}"
+            f"{row['recall']:>12.3f}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+        )
+
+
+def main():
+    """メイン処理"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Sweep HNSW parameters and print the recall/latency Pareto frontier"
+    )
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32], help="HNSW m values")
+    parser.add_argument(
+        "--ef-construct", type=int, nargs="+", default=[64, 100, 200], help="ef_construct values"
+    )
+    parser.add_argument(
+        "--hnsw-ef", type=int, nargs="+", default=[16, 32, 64, 128, 256], help="Query-time ef values"
+    )
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--limit", type=int, default=None, help="Max corpus vectors to use")
+    parser.add_argument(
+        "--sample-queries",
+        action="store_true",
+        help="Synthesize queries from corpus vectors instead of embedding the QA questions",
+    )
+    parser.add_argument("--collection", type=str, default=None, help="Source collection")
+    parser.add_argument("--host", type=str, default=None, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=None, help="Qdrant port")
+
+    args = parser.parse_args()
+
+    source = QdrantVectorStore(host=args.host, port=args.port, collection_name=args.collection)
+    corpus = load_corpus_vectors(source, args.limit)
+    if len(corpus) == 0:
+        logger.error(f"No vectors in {source.collection_name}; run ingest_documents.py first")
+        return
+    queries = load_queries(corpus, args.queries, args.sample_queries)
+    expected = exact_top_k(corpus, queries, args.top_k)
+    logger.info(f"Corpus: {corpus.shape}, queries: {len(queries)}")
+
+    rows = []
+    for m in args.m:
+        for ef_construct in args.ef_construct:
+            store, build_s = build(corpus, m, ef_construct, args.host, args.port)
+            if not rows:
+                exact = measure(store, queries, expected, args.top_k, None, exact=True)
+                logger.info(f"Exact search: p95 {exact['p95_ms']:.2f} ms")
+            for hnsw_ef in args.hnsw_ef:
+                rows.append(
+                    {"m": m, "ef_construct": ef_construct, "hnsw_ef": hnsw_ef, "build_s": build_s,
+                     **measure(store, queries, expected, args.top_k, hnsw_ef)}
+                )
+            store.delete_collection()
+
+    print("\nAll settings:")
+    print_rows(rows, args.top_k)
+    print("\nPareto frontier (recall vs p95 latency):")
+    print_rows(pareto_frontier(rows), args.top_k)
+
+
+if __name__ == "__main__":
+    main()
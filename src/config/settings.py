@@ -32,6 +32,40 @@ class Settings(BaseSettings):
     qdrant_host: str = Field(default="localhost", description="Qdrant Host")
     qdrant_port: int = Field(default=6333, description="Qdrant Port")
     qdrant_collection: str = Field(default="laboro_rag", description="Qdrant Collection Name")
+    vector_store_type: str = Field(
+        default="qdrant",
+        description="Vector store: qdrant, qdrant_sharded (one collection per category), local (NumPy)",
+    )
+    matryoshka_dim: int = Field(
+        default=0,
+        description="Index a truncated embedding prefix of this size for the first search pass (0 = disabled)",
+    )
+    matryoshka_rescore_limit: int = Field(
+        default=200, description="Candidates from the truncated pass rescored with full vectors"
+    )
+    vector_quantization: str = Field(
+        default="",
+        description="Quantize indexed vectors: 'int8', 'binary' or '' (float32 only)",
+    )
+    quantization_oversampling: float = Field(
+        default=3.0,
+        description="Candidates fetched with quantized vectors per result, rescored with float32",
+    )
+    quantization_rescore: bool = Field(
+        default=True, description="Rescore quantized candidates with the original vectors"
+    )
+    hnsw_m: int = Field(default=16, description="HNSW graph degree for new collections")
+    hnsw_ef_construct: int = Field(
+        default=100, description="HNSW build-time search width for new collections"
+    )
+    hnsw_ef: int = Field(
+        default=0, description="HNSW query-time search width (0 = server default)"
+    )
+    sparse_vectors_enabled: bool = Field(
+        default=False,
+        description="Store Sudachi term-weight sparse vectors next to the dense vector and "
+        "fuse both inside Qdrant in hybrid retriever (requires re-ingest)",
+    )
 
     # API Server
     api_host: str = Field(default="0.0.0.0", description="API Host")
@@ -42,17 +76,116 @@ class Settings(BaseSettings):
 
     # Logging
     log_level: str = Field(default="INFO", description="Log Level")
+    tracing_enabled: bool = Field(
+        default=False, description="Attach per-stage timings to retrieval and RAG responses"
+    )
 
     # RAG Configuration
     chunk_size: int = Field(default=800, description="Text chunk size")
     chunk_overlap: int = Field(default=200, description="Chunk overlap")
     retrieval_top_k: int = Field(default=5, description="Number of documents to retrieve")
     retriever_type: str = Field(
-        default="hybrid", description="Retriever type: simple, hybrid, multi_query"
+        default="hybrid", description="Retriever type: simple, hybrid, multi_query, hierarchical"
     )
     use_rerank: bool = Field(default=True, description="Use reranking in hybrid retriever")
     hybrid_alpha: float = Field(default=0.7, description="Vector search weight in hybrid retriever (0.7 = vector重視)")
     rrf_k: int = Field(default=60, description="RRF parameter in hybrid retriever")
+    semantic_cache_enabled: bool = Field(
+        default=False, description="Reuse retrieval results for near-duplicate queries"
+    )
+    semantic_cache_threshold: float = Field(
+        default=0.97, description="Cosine similarity required for a semantic cache hit"
+    )
+    semantic_cache_size: int = Field(default=512, description="Max semantic cache entries")
+    semantic_cache_ttl: float = Field(
+        default=3600.0, description="Semantic cache entry lifetime in seconds"
+    )
+    revision_check_interval: float = Field(
+        default=5.0,
+        description="Seconds between Qdrant collection state checks that invalidate the "
+        "semantic cache after writes from other processes (ingest, snapshot import)",
+    )
+    multi_query_count: int = Field(
+        default=3, description="Queries (original + paraphrases) used by multi_query retriever"
+    )
+    multi_query_expander: str = Field(
+        default="template", description="Paraphrase generator for multi_query: template, llm"
+    )
+    query_expansion_max_tokens: int = Field(
+        default=2048,
+        description="Completion token budget for LLM paraphrases (includes reasoning tokens)",
+    )
+    hierarchical_top_documents: int = Field(
+        default=5, description="Documents selected by centroid before chunk search in hierarchical retriever"
+    )
+    mmr_enabled: bool = Field(
+        default=False,
+        description="Select a diverse top-k from the candidates by maximal marginal relevance",
+    )
+    mmr_lambda: float = Field(
+        default=0.7, description="MMR trade-off (1.0 = relevance only, 0.0 = diversity only)"
+    )
+    ngram_index_enabled: bool = Field(
+        default=False,
+        description="Fuse exact-substring candidates from the character n-gram index in hybrid retriever",
+    )
+
+    # Reranker
+    reranker_model: str = Field(
+        default="cl-nagoya/ruri-reranker-small", description="Cross-Encoder model for reranking"
+    )
+    reranker_backend: str = Field(
+        default="torch", description="Reranker inference backend: torch, quantized (int8), onnx"
+    )
+    reranker_max_length: int = Field(
+        default=512, description="Max token length of (query, chunk) pairs in reranker"
+    )
+    reranker_batch_size: int = Field(default=32, description="Reranker batch size")
+    reranker_num_threads: int = Field(
+        default=0, description="CPU threads for reranker inference (0 = framework default)"
+    )
+    reranker_cache_size: int = Field(
+        default=10000, description="Max cached reranker scores (0 = disable cache)"
+    )
+    rerank_oversample: int = Field(
+        default=4, description="Candidates fetched per result for reranking (top_k x oversample)"
+    )
+    rerank_min_k: int = Field(
+        default=3, description="Minimum results kept after adaptive rerank cutoff"
+    )
+    rerank_score_threshold: float = Field(
+        default=0.05, description="Drop reranked results scoring below this value"
+    )
+    rerank_max_gap: float = Field(
+        default=0.5, description="Cut reranked results where the score drops by more than this"
+    )
+
+    # Query Router
+    query_router_enabled: bool = Field(
+        default=True,
+        description="Route agentic queries by category centroids; call the LLM only when unsure",
+    )
+    query_router_min_similarity: float = Field(
+        default=0.3, description="Below this centroid similarity the router does not filter by category"
+    )
+    query_router_min_margin: float = Field(
+        default=0.02, description="Required similarity gap between the top two categories"
+    )
+
+    # Context Expansion
+    context_expansion: str = Field(
+        default="",
+        description="Expand hits with adjacent chunks: 'neighbors', 'page' or '' (disabled)",
+    )
+    context_window: int = Field(
+        default=1, description="Adjacent chunks on each side added in 'neighbors' mode"
+    )
+
+    # Content Store
+    content_store_path: str = Field(
+        default="",
+        description="SQLite file for chunk text kept outside the vector index (empty = store in payload)",
+    )
 
     # Paths
     @property
@@ -75,6 +208,39 @@ class Settings(BaseSettings):
         """処理済みデータディレクトリパス"""
         return self.data_dir / "processed"
 
+    @property
+    def adjacency_index_file(self) -> Path:
+        """チャンク隣接インデックスのパス"""
+        return self.processed_data_dir / "chunk_adjacency.json"
+
+    @property
+    def category_centroids_file(self) -> Path:
+        """カテゴリ重心ファイルのパス"""
+        return self.processed_data_dir / "category_centroids.npz"
+
+    @property
+    def document_centroids_file(self) -> Path:
+        """ドキュメント重心ファイルのパス"""
+        return self.processed_data_dir / "document_centroids.npz"
+
+    @property
+    def ngram_index_dir(self) -> Path:
+        """文字n-gramインデックスの保存先"""
+        return self.processed_data_dir / "ngram_index"
+
+    @property
+    def local_index_dir(self) -> Path:
+        """ローカル（NumPy）ベクトルストアの保存先"""
+        return self.processed_data_dir / "local_index"
+
+    @property
+    def content_store_file(self) -> Path | None:
+        """本文ストアのパス（未設定ならNone、相対パスはプロジェクトルート基準）"""
+        if not self.content_store_path:
+            return None
+        path = Path(self.content_store_path)
+        return path if path.is_absolute() else self.project_root / path
+
 
 @lru_cache
 def get_settings() -> Settings:
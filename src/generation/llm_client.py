@@ -12,6 +12,7 @@ from dataclasses import dataclass
 from openai import OpenAI
 
 from src.config import get_settings
+from src.tracing import count, span
 
 logger = logging.getLogger(__name__)
 
@@ -116,10 +117,14 @@ class OpenAIClient(LLMClientBase):
         else:
             completion_params["max_tokens"] = max_tokens
 
-        response = self.client.chat.completions.create(**completion_params)
+        with span("llm"):
+            response = self.client.chat.completions.create(**completion_params)
 
         choice = response.choices[0]
         usage = response.usage
+        if usage:
+            count("prompt_tokens", usage.prompt_tokens)
+            count("completion_tokens", usage.completion_tokens)
 
         return LLMResponse(
             content=choice.message.content or "",
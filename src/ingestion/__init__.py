@@ -1,6 +1,15 @@
 """Ingestion module for PDF parsing, text splitting, and embedding generation"""
 
-from .embedder import EmbedderBase, MockEmbedder, OpenAIEmbedder, get_embedder
+from .embedder import (
+    EmbedderBase,
+    Embedding,
+    EmbeddingMatrix,
+    MockEmbedder,
+    OpenAIEmbedder,
+    as_embedding,
+    as_embedding_matrix,
+    get_embedder,
+)
 from .pdf_parser import (
     HybridPDFParser,
     ParsedDocument,
@@ -10,6 +19,12 @@ from .pdf_parser import (
     PyMuPDFParser,
     get_parser,
 )
+from .sparse_encoder import (
+    SparseEncoderBase,
+    SudachiSparseEncoder,
+    get_shared_sparse_encoder,
+    get_sparse_encoder,
+)
 from .text_splitter import (
     RecursiveTextSplitter,
     TableAwareTextSplitter,
@@ -37,5 +52,14 @@ __all__ = [
     "EmbedderBase",
     "OpenAIEmbedder",
     "MockEmbedder",
+    "Embedding",
+    "EmbeddingMatrix",
+    "as_embedding",
+    "as_embedding_matrix",
     "get_embedder",
+    # Sparse Encoder
+    "SparseEncoderBase",
+    "SudachiSparseEncoder",
+    "get_sparse_encoder",
+    "get_shared_sparse_encoder",
 ]
@@ -1,41 +1,82 @@
 """
 埋め込み生成モジュール
 
-OpenAI Embeddings APIを使用してテキストをベクトル化
+OpenAI Embeddings APIを使用してテキストをベクトル化。
+埋め込みは float32 の NumPy 配列（1件は1次元、複数件は (件数, 次元) の行列）で返す。
 """
 
+import asyncio
+import base64
 import logging
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
+from typing import Any
 
-from openai import OpenAI
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
 
 from src.config import get_settings
 from src.ingestion.text_splitter import TextChunk
+from src.tracing import count, span
 
 logger = logging.getLogger(__name__)
 
+# 埋め込みを受け取る引数の型（リストは互換性のために受け付ける）
+Embedding = np.ndarray | Sequence[float]
+EmbeddingMatrix = np.ndarray | Sequence[Sequence[float]]
+
+
+def as_embedding(embedding: Embedding) -> np.ndarray:
+    """埋め込みを1次元の float32 配列に変換（既に float32 の配列ならコピーしない）"""
+    return np.ascontiguousarray(embedding, dtype=np.float32).reshape(-1)
+
+
+def as_embedding_matrix(embeddings: EmbeddingMatrix) -> np.ndarray:
+    """埋め込みのリスト・行列を (件数, 次元) の float32 行列に変換（既に float32 の行列ならコピーしない）"""
+    if len(embeddings) == 0:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+
+
+def decode_embedding(data: Any) -> np.ndarray:
+    """APIの埋め込み（base64のfloat32列、またはfloatのリスト）を float32 配列に変換"""
+    if isinstance(data, str):
+        return np.frombuffer(base64.b64decode(data), dtype=np.float32)
+    return np.asarray(data, dtype=np.float32)
+
 
 class EmbedderBase(ABC):
     """埋め込み生成基底クラス"""
 
     @abstractmethod
-    def embed_text(self, text: str) -> list[float]:
-        """単一テキストを埋め込み"""
+    def embed_text(self, text: str) -> np.ndarray:
+        """単一テキストを埋め込み（float32 の1次元配列）"""
         pass
 
     @abstractmethod
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        """複数テキストを一括埋め込み"""
+    def embed_texts(self, texts: list[str]) -> np.ndarray:
+        """複数テキストを一括埋め込み（(件数, 次元) の float32 行列）"""
         pass
 
-    @abstractmethod
-    def embed_chunks(self, chunks: list[TextChunk]) -> list[tuple[TextChunk, list[float]]]:
-        """チャンクを埋め込み"""
-        pass
+    def embed_chunks(self, chunks: list[TextChunk]) -> np.ndarray:
+        """チャンクを埋め込み（行は chunks の順）"""
+        return self.embed_texts([chunk.content for chunk in chunks])
+
+    async def aembed_text(self, text: str) -> np.ndarray:
+        """単一テキストを埋め込み（非同期版、デフォルトはワーカースレッドで実行）"""
+        return await asyncio.to_thread(self.embed_text, text)
+
+    async def aembed_texts(self, texts: list[str]) -> np.ndarray:
+        """複数テキストを一括埋め込み（非同期版、デフォルトはワーカースレッドで実行）"""
+        return await asyncio.to_thread(self.embed_texts, texts)
 
 
 class OpenAIEmbedder(EmbedderBase):
-    """OpenAI Embeddings API を使用した埋め込み生成"""
+    """
+    OpenAI Embeddings API を使用した埋め込み生成
+
+    埋め込みは base64 形式で受け取り、floatのリストを経由せずに行列へ書き込む。
+    """
 
     def __init__(
         self,
@@ -49,40 +90,91 @@ class OpenAIEmbedder(EmbedderBase):
         self.batch_size = batch_size
 
         self.client = OpenAI(api_key=self.api_key)
+        self._async_client: AsyncOpenAI | None = None
         logger.info(f"Initialized OpenAI Embedder with model: {self.model}")
 
-    def embed_text(self, text: str) -> list[float]:
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """非同期クライアント（初回の非同期呼び出し時に作成）"""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=self.api_key)
+        return self._async_client
+
+    @staticmethod
+    def _write_embeddings(response: Any, out: np.ndarray) -> None:
+        """レスポンスの埋め込みを行列の対応する行に書き込む（index順に並べ直す）"""
+        for data in response.data:
+            out[data.index] = decode_embedding(data.embedding)
+
+    def embed_text(self, text: str) -> np.ndarray:
         """単一テキストを埋め込み"""
-        response = self.client.embeddings.create(
-            model=self.model,
-            input=text,
-        )
-        return response.data[0].embedding
+        with span("embed"):
+            response = self.client.embeddings.create(
+                model=self.model,
+                input=text,
+                encoding_format="base64",
+            )
+        count("embedded_texts")
+        return decode_embedding(response.data[0].embedding)
 
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+    def embed_texts(self, texts: list[str]) -> np.ndarray:
         """複数テキストを一括埋め込み（バッチ処理）"""
-        all_embeddings = []
+        embeddings: np.ndarray | None = None
 
         for i in range(0, len(texts), self.batch_size):
             batch = texts[i : i + self.batch_size]
             logger.info(f"Embedding batch {i // self.batch_size + 1} ({len(batch)} texts)")
 
-            response = self.client.embeddings.create(
+            with span("embed"):
+                response = self.client.embeddings.create(
+                    model=self.model,
+                    input=batch,
+                    encoding_format="base64",
+                )
+
+            if embeddings is None:
+                # 次元は最初のレスポンスから決める（dimensions指定やモデルの違いに対応）
+                dimension = len(decode_embedding(response.data[0].embedding))
+                embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+            self._write_embeddings(response, embeddings[i : i + len(batch)])
+
+        count("embedded_texts", len(texts))
+        return embeddings if embeddings is not None else np.zeros((0, 0), dtype=np.float32)
+
+    async def aembed_text(self, text: str) -> np.ndarray:
+        """単一テキストを埋め込み（AsyncOpenAIによる非同期版）"""
+        with span("embed"):
+            response = await self.async_client.embeddings.create(
                 model=self.model,
-                input=batch,
+                input=text,
+                encoding_format="base64",
             )
+        count("embedded_texts")
+        return decode_embedding(response.data[0].embedding)
+
+    async def aembed_texts(self, texts: list[str]) -> np.ndarray:
+        """複数テキストを一括埋め込み（非同期版、バッチは並行して送信）"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        batches = [
+            texts[i : i + self.batch_size] for i in range(0, len(texts), self.batch_size)
+        ]
+        with span("embed"):
+            responses = await asyncio.gather(
+                *(
+                    self.async_client.embeddings.create(
+                        model=self.model, input=batch, encoding_format="base64"
+                    )
+                    for batch in batches
+                )
+            )
+        count("embedded_texts", len(texts))
 
-            batch_embeddings = [data.embedding for data in response.data]
-            all_embeddings.extend(batch_embeddings)
-
-        return all_embeddings
-
-    def embed_chunks(self, chunks: list[TextChunk]) -> list[tuple[TextChunk, list[float]]]:
-        """チャンクを埋め込み"""
-        texts = [chunk.content for chunk in chunks]
-        embeddings = self.embed_texts(texts)
-
-        return list(zip(chunks, embeddings, strict=True))
+        dimension = len(decode_embedding(responses[0].data[0].embedding))
+        embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+        for start, response in zip(range(0, len(texts), self.batch_size), responses, strict=True):
+            self._write_embeddings(response, embeddings[start : start + self.batch_size])
+        return embeddings
 
 
 class MockEmbedder(EmbedderBase):
@@ -96,25 +188,21 @@ class MockEmbedder(EmbedderBase):
         self.dimension = dimension
         logger.warning("Using MockEmbedder - for development only!")
 
-    def embed_text(self, text: str) -> list[float]:
+    def embed_text(self, text: str) -> np.ndarray:
         """ダミー埋め込みを生成"""
         import hashlib
 
         # テキストのハッシュから決定的なベクトルを生成
-        hash_bytes = hashlib.sha256(text.encode()).digest()
-        vector = []
-        for i in range(self.dimension):
-            byte_idx = i % len(hash_bytes)
-            vector.append((hash_bytes[byte_idx] / 255.0) * 2 - 1)
-        return vector
-
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        """複数テキストのダミー埋め込み"""
-        return [self.embed_text(text) for text in texts]
+        hash_bytes = np.frombuffer(hashlib.sha256(text.encode()).digest(), dtype=np.uint8)
+        vector = np.resize(hash_bytes, self.dimension).astype(np.float32)
+        return vector / np.float32(255.0) * 2 - 1
 
-    def embed_chunks(self, chunks: list[TextChunk]) -> list[tuple[TextChunk, list[float]]]:
-        """チャンクのダミー埋め込み"""
-        return [(chunk, self.embed_text(chunk.content)) for chunk in chunks]
+    def embed_texts(self, texts: list[str]) -> np.ndarray:
+        """複数テキストのダミー埋め込み"""
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            embeddings[i] = self.embed_text(text)
+        return embeddings
 
 
 def get_embedder(embedder_type: str = "openai", **kwargs) -> EmbedderBase:
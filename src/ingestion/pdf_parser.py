@@ -15,7 +15,7 @@ import pdfplumber
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ParsedPage:
     """パース済みページデータ"""
 
@@ -0,0 +1,138 @@
+"""
+スパースベクトル生成モジュール
+
+SudachiPyで形態素解析した内容語から、語彙ID → 重み のスパースベクトルを作成する。
+Qdrantの名前付きスパースベクトル（IDF補正付き）として保存し、
+サーバー側で密ベクトル検索と統合（ハイブリッド検索）するために使う。
+"""
+
+import logging
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import Counter
+from functools import lru_cache
+
+from sudachipy import SplitMode, dictionary
+
+logger = logging.getLogger(__name__)
+
+# 検索語として残す品詞（大分類）
+CONTENT_POS = ("名詞", "動詞", "形容詞", "形状詞", "接頭辞", "接尾辞")
+
+# 「する」「いる」など、意味の薄い補助的な用法の語を除く品詞（中分類）
+EXCLUDED_POS_DETAILS = ("非自立可能",)
+
+# SudachiPyの1回の入力上限（バイト）より十分小さい単位で区切って解析する
+MAX_TOKENIZE_CHARS = 4000
+
+SPLIT_MODES = {"A": SplitMode.A, "B": SplitMode.B, "C": SplitMode.C}
+
+
+def term_id(term: str) -> int:
+    """語の決定的な語彙ID（語彙表を持たずに取り込み・検索で同じIDになる）"""
+    return zlib.crc32(term.encode("utf-8"))
+
+
+class SparseEncoderBase(ABC):
+    """
+    スパースベクトル生成基底クラス
+
+    ベクトルは {語彙ID: 重み} の dict で表す。IDFはQdrant側（Modifier.IDF）で
+    掛けるため、ここでは文書内の語の頻度に基づく重みだけを計算する。
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, avg_doc_length: float = 200.0):
+        # BM25の語頻度の飽和パラメータ（avg_doc_length はチャンクの平均的な語数の目安）
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = avg_doc_length
+
+    @abstractmethod
+    def tokenize(self, text: str) -> list[str]:
+        """テキストを検索語のリストに変換"""
+        pass
+
+    def encode_document(self, text: str) -> dict[int, float]:
+        """チャンクのスパースベクトル（BM25の語頻度項）"""
+        terms = self.tokenize(text)
+        if not terms:
+            return {}
+        norm = self.k1 * (1 - self.b + self.b * len(terms) / self.avg_doc_length)
+        return {
+            term_id(term): tf * (self.k1 + 1) / (tf + norm)
+            for term, tf in Counter(terms).items()
+        }
+
+    def encode_documents(self, texts: list[str]) -> list[dict[int, float]]:
+        """複数チャンクのスパースベクトル"""
+        return [self.encode_document(text) for text in texts]
+
+    def encode_query(self, text: str) -> dict[int, float]:
+        """クエリのスパースベクトル（出現した語ごとに重み1）"""
+        return {term_id(term): 1.0 for term in set(self.tokenize(text))}
+
+
+class SudachiSparseEncoder(SparseEncoderBase):
+    """
+    SudachiPyによるスパースベクトル生成
+
+    内容語（名詞・動詞・形容詞など）の正規化形を小文字にしたものを検索語とする。
+    Sudachiのトークナイザはスレッドセーフではないため、スレッドごとに作成する。
+    """
+
+    def __init__(self, split_mode: str = "B", **kwargs):
+        super().__init__(**kwargs)
+        if split_mode not in SPLIT_MODES:
+            raise ValueError(
+                f"Unknown split mode: {split_mode}. Available: {list(SPLIT_MODES.keys())}"
+            )
+        self.split_mode = SPLIT_MODES[split_mode]
+        self._dictionary = dictionary.Dictionary()
+        self._local = threading.local()
+        logger.info(f"Initialized SudachiSparseEncoder (mode={split_mode})")
+
+    def _tokenizer(self):
+        tokenizer = getattr(self._local, "tokenizer", None)
+        if tokenizer is None:
+            if hasattr(self._dictionary, "tokenizer"):
+                tokenizer = self._dictionary.tokenizer(mode=self.split_mode)
+            else:
+                tokenizer = self._dictionary.create(mode=self.split_mode)
+            self._local.tokenizer = tokenizer
+        return tokenizer
+
+    def tokenize(self, text: str) -> list[str]:
+        tokenizer = self._tokenizer()
+        terms = []
+        for line in text.splitlines():
+            for start in range(0, len(line), MAX_TOKENIZE_CHARS):
+                piece = line[start : start + MAX_TOKENIZE_CHARS]
+                if not piece.strip():
+                    continue
+                for morpheme in tokenizer.tokenize(piece):
+                    pos = morpheme.part_of_speech()
+                    if pos[0] not in CONTENT_POS or pos[1] in EXCLUDED_POS_DETAILS:
+                        continue
+                    terms.append(morpheme.normalized_form().lower())
+        return terms
+
+
+def get_sparse_encoder(encoder_type: str = "sudachi", **kwargs) -> SparseEncoderBase:
+    """スパースベクトル生成器ファクトリー"""
+    encoders = {
+        "sudachi": SudachiSparseEncoder,
+    }
+
+    if encoder_type not in encoders:
+        raise ValueError(
+            f"Unknown sparse encoder type: {encoder_type}. Available: {list(encoders.keys())}"
+        )
+
+    return encoders[encoder_type](**kwargs)
+
+
+@lru_cache
+def get_shared_sparse_encoder() -> SparseEncoderBase:
+    """プロセス共有のスパースベクトル生成器（辞書の読み込みは初回のみ）"""
+    return get_sparse_encoder()
@@ -13,9 +13,9 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class TextChunk:
-    """テキストチャンク"""
+    """テキストチャンク（取り込みで大量に作るため __slots__ でインスタンスごとのdictを持たない）"""
 
     content: str
     chunk_id: str
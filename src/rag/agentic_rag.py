@@ -11,14 +11,18 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Optional, Any
 
+import numpy as np
+
 from src.config import get_settings
 from src.generation.llm_client import LLMClientBase, get_llm_client
 from src.generation.prompt_templates import get_prompt
 from src.ingestion.embedder import EmbedderBase, get_embedder
 from src.ingestion.document_classifier import CATEGORIES
 from src.rag.base import RAGBase, RAGResponse
+from src.rag.query_router import EmbeddingQueryRouter
 from src.retrieval.retriever import RetrieverBase, get_retriever
 from src.retrieval.vector_store import SearchResult, VectorStoreBase, get_vector_store
+from src.tracing import count, span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +64,9 @@ class AgenticRAG(RAGBase):
 
     司令塔AIがドキュメントカテゴリを判定して検索を最適化し、
     画像解析結果を含めた高度な回答を生成する。
+
+    クエリルーターが有効な場合は、カテゴリ重心と字句的な手がかりで先に判定し、
+    判定に自信がない場合のみ司令塔AI（LLM）を呼び出す。
     """
 
     def __init__(
@@ -71,6 +78,7 @@ class AgenticRAG(RAGBase):
         top_k: int = 5,
         max_iterations: int = 1,
         quality_threshold: int = 4,
+        query_router: Optional[EmbeddingQueryRouter] = None,
     ):
         settings = get_settings()
         self.top_k = top_k or settings.retrieval_top_k
@@ -88,6 +96,10 @@ class AgenticRAG(RAGBase):
             embedder=self.embedder,
         )
 
+        if query_router is None and settings.query_router_enabled:
+            query_router = EmbeddingQueryRouter(embedder=self.embedder)
+        self.query_router = query_router
+
         # プロンプト (v4用にカテゴリ情報を注入)
         self.query_analyzer_prompt = self._build_analyzer_prompt()
         self.answer_generator_prompt = get_prompt("answer_generator")
@@ -116,14 +128,16 @@ class AgenticRAG(RAGBase):
     def description(self) -> str:
         return "司令塔AIによるカテゴリ絞り込みと画像解析結果を統合した高度なRAG"
 
+    @traced("rag")
     def query(self, question: str) -> RAGResponse:
         """質問に対して回答を生成"""
         logger.info(f"AgenticRAG v4 query: {question[:50]}...")
 
         # 1. 司令塔AIによる分析
-        analysis = self._analyze_query(question)
+        with span("analyze"):
+            analysis, routed_by, query_embedding = self._route_query(question)
         logger.info(
-            f"Commander Analysis: category_id={analysis.category_id}, "
+            f"Commander Analysis ({routed_by}): category_id={analysis.category_id}, "
             f"strategy={analysis.search_strategy.value}"
         )
 
@@ -136,13 +150,48 @@ class AgenticRAG(RAGBase):
         if analysis.search_strategy == SearchStrategy.DECOMPOSE:
             response = self._handle_complex_query(question, analysis, metadata_filter)
         else:
-            response = self._handle_simple_query(question, metadata_filter)
+            response = self._handle_simple_query(question, metadata_filter, query_embedding)
 
         # 4. 自己評価と改善
-        final_response = self._reflect_and_improve(response)
+        with span("reflect"):
+            final_response = self._reflect_and_improve(response)
 
+        final_response.metadata["routed_by"] = routed_by
         return final_response
 
+    def _route_query(self, question: str) -> tuple[QueryAnalysis, str, Optional[np.ndarray]]:
+        """
+        ルーターで判定し、自信がない場合のみ司令塔AIに判定させる
+
+        Returns:
+            (分析結果, 判定元, ルーターが計算した質問の埋め込み)
+            埋め込みはリトリーバーと同じEmbedderで計算した場合のみ返し、検索で再利用する。
+        """
+        query_embedding = None
+        if self.query_router is not None:
+            decision = self.query_router.route(question)
+            if getattr(self.retriever, "embedder", None) is self.query_router.embedder:
+                query_embedding = decision.query_embedding
+            if decision.confident:
+                count("router_hits")
+                return (
+                    QueryAnalysis(
+                        query_type=QueryType.COMPLEX if decision.decompose else QueryType.SIMPLE,
+                        search_strategy=(
+                            SearchStrategy.DECOMPOSE if decision.decompose else SearchStrategy.DIRECT
+                        ),
+                        sub_queries=decision.sub_queries,
+                        category_id=decision.category_id,
+                        reasoning=decision.reasoning,
+                    ),
+                    "router",
+                    query_embedding,
+                )
+            count("router_fallbacks")
+            logger.info(f"Router uncertain, asking Commander ({decision.reasoning})")
+
+        return self._analyze_query(question), "llm", query_embedding
+
     def _analyze_query(self, question: str) -> QueryAnalysis:
         """司令塔AIが戦略とカテゴリを決定"""
         response = self.llm_client.generate(
@@ -172,12 +221,18 @@ class AgenticRAG(RAGBase):
                 reasoning="Parse error fallback",
             )
 
-    def _handle_simple_query(self, question: str, metadata_filter: Optional[dict] = None) -> RAGResponse:
-        """シンプルなクエリを処理 (フィルタ適用)"""
+    def _handle_simple_query(
+        self,
+        question: str,
+        metadata_filter: Optional[dict] = None,
+        query_embedding: Optional[np.ndarray] = None,
+    ) -> RAGResponse:
+        """シンプルなクエリを処理 (フィルタ適用、ルーターの埋め込みがあれば再利用)"""
         retrieval_result = self.retriever.retrieve(
             question, 
             top_k=self.top_k, 
-            metadata_filter=metadata_filter
+            metadata_filter=metadata_filter,
+            query_embedding=query_embedding,
         )
         sources = retrieval_result.results
 
@@ -200,12 +255,13 @@ class AgenticRAG(RAGBase):
             "これらを本物の図表と同様に扱い、数値や傾向を回答に反映させてください。"
         )
         
-        response = self.llm_client.generate(
-            prompt=prompt, 
-            system_prompt=system_msg,
-            temperature=0.0, 
-            max_tokens=8192
-        )
+        with span("generate"):
+            response = self.llm_client.generate(
+                prompt=prompt, 
+                system_prompt=system_msg,
+                temperature=0.0, 
+                max_tokens=8192
+            )
 
         return RAGResponse(
             question=question,
@@ -229,19 +285,22 @@ class AgenticRAG(RAGBase):
         sub_answers = []
         all_sources: list[SearchResult] = []
 
-        for sub_query in sub_queries:
-            retrieval_result = self.retriever.retrieve(
-                sub_query, 
-                top_k=self.top_k, 
-                metadata_filter=metadata_filter
-            )
+        # サブクエリの検索は一括で実行（埋め込み・検索の往復を1回にまとめる）
+        retrieval_results = self.retriever.retrieve_many(
+            sub_queries,
+            top_k=self.top_k,
+            metadata_filter=metadata_filter,
+        )
+
+        for sub_query, retrieval_result in zip(sub_queries, retrieval_results, strict=True):
             sources = retrieval_result.results
             all_sources.extend(sources)
 
             if sources:
                 context = self._format_context(sources)
                 prompt = self.answer_generator_prompt.format(context=context, question=sub_query)
-                response = self.llm_client.generate(prompt, temperature=0.0)
+                with span("generate"):
+                    response = self.llm_client.generate(prompt, temperature=0.0)
                 sub_answers.append(f"Q: {sub_query}\nA: {response.content}")
 
         # 統合
@@ -250,7 +309,8 @@ class AgenticRAG(RAGBase):
             synthesis_prompt = self.synthesis_prompt.format(
                 original_question=question, sub_answers=sub_answers_text
             )
-            synthesis_response = self.llm_client.generate(synthesis_prompt, temperature=0.0)
+            with span("synthesize"):
+                synthesis_response = self.llm_client.generate(synthesis_prompt, temperature=0.0)
             final_answer = synthesis_response.content
         else:
             final_answer = "関連するドキュメントが見つかりませんでした。"
@@ -318,5 +378,5 @@ class AgenticRAG(RAGBase):
             question=response.question,
             answer=llm_response.content,
             sources=response.sources,
-            metadata={{**response.metadata, "improved": True}},
+            metadata={**response.metadata, "improved": True},
         )
\ No newline at end of file
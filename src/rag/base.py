@@ -4,6 +4,7 @@ RAG基底クラスモジュール
 全てのRAG実装の抽象基底クラスを定義
 """
 
+import asyncio
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -11,7 +12,7 @@ from datetime import datetime
 from src.retrieval.vector_store import SearchResult
 
 
-@dataclass
+@dataclass(slots=True)
 class RAGResponse:
     """RAGレスポンス"""
 
@@ -73,6 +74,14 @@ class RAGBase(ABC):
         """
         pass
 
+    async def aquery(self, question: str) -> RAGResponse:
+        """
+        質問に対して回答を生成（非同期版）
+
+        デフォルト実装は query をワーカースレッドで実行し、イベントループを塞がない。
+        """
+        return await asyncio.to_thread(self.query, question)
+
     def _format_context(self, sources: list[SearchResult]) -> str:
         """
         検索結果をコンテキスト文字列にフォーマット
@@ -10,6 +10,7 @@ Naive RAG実装
 4. LLMで回答生成
 """
 
+import asyncio
 import logging
 from typing import Optional
 
@@ -19,7 +20,8 @@ from src.generation.prompt_templates import get_prompt
 from src.ingestion.embedder import EmbedderBase, get_embedder
 from src.rag.base import RAGBase, RAGResponse
 from src.retrieval.retriever import RetrieverBase, get_retriever
-from src.retrieval.vector_store import VectorStoreBase, get_vector_store
+from src.retrieval.vector_store import SearchResult, VectorStoreBase, get_vector_store
+from src.tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -97,6 +99,7 @@ class NaiveRAG(RAGBase):
     def description(self) -> str:
         return "単純なベクトル検索と回答生成を行うベースラインRAG"
 
+    @traced("rag")
     def query(self, question: str) -> RAGResponse:
         """
         質問に対して回答を生成
@@ -110,8 +113,23 @@ class NaiveRAG(RAGBase):
 
         # 1. 検索
         retrieval_result = self.retriever.retrieve(question, top_k=self.top_k)
-        sources = retrieval_result.results
+        return self._generate(question, retrieval_result.results)
 
+    @traced("rag")
+    async def aquery(self, question: str) -> RAGResponse:
+        """
+        質問に対して回答を生成（非同期版）
+
+        検索は非同期クライアントでイベントループ上で実行し、
+        LLM呼び出しのみワーカースレッドに渡す。
+        """
+        logger.info(f"NaiveRAG aquery: {question[:50]}...")
+
+        retrieval_result = await self.retriever.aretrieve(question, top_k=self.top_k)
+        return await asyncio.to_thread(self._generate, question, retrieval_result.results)
+
+    def _generate(self, question: str, sources: list[SearchResult]) -> RAGResponse:
+        """検索結果から回答を生成"""
         if not sources:
             logger.warning("No documents retrieved")
             return RAGResponse(
@@ -126,11 +144,12 @@ class NaiveRAG(RAGBase):
 
         # 3. 回答生成
         prompt = self.user_prompt.format(context=context, question=question)
-        response = self.llm_client.generate(
-            prompt=prompt,
-            system_prompt=self.system_prompt.template,
-            max_tokens=8192,  # gpt-5-miniは推論トークンも含むため大きめに設定
-        )
+        with span("generate"):
+            response = self.llm_client.generate(
+                prompt=prompt,
+                system_prompt=self.system_prompt.template,
+                max_tokens=8192,  # gpt-5-miniは推論トークンも含むため大きめに設定
+            )
 
         logger.info(f"Generated answer ({response.usage.get('total_tokens', 0)} tokens)")
 
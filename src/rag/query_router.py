@@ -0,0 +1,153 @@
+"""
+クエリルーターモジュール
+
+司令塔AI（LLM）を呼ばずに、検索カテゴリと検索戦略をローカルで判定する
+- カテゴリ: 質問の埋め込みと、取り込み時に作成したカテゴリ重心とのコサイン類似度
+- 分解の要否: 疑問符の数や接続表現などの字句的な手がかり
+
+判定に自信がない場合は uncertain を返し、呼び出し側がLLMにフォールバックする。
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from src.config import get_settings
+from src.ingestion.embedder import EmbedderBase, get_embedder
+from src.retrieval.centroids import EmbeddingCentroids
+
+logger = logging.getLogger(__name__)
+
+# 複数の論点を含む質問によく現れる接続表現
+CONJUNCTION_MARKERS = (
+    "また",
+    "および",
+    "及び",
+    "並びに",
+    "ならびに",
+    "それぞれ",
+    "一方",
+    "さらに",
+    "違い",
+    "比較",
+    "と比べ",
+)
+
+_QUESTION_SPLIT = re.compile(r"(?<=[？?])\s*|(?<=か。)\s*")
+
+
+class CategoryCentroids(EmbeddingCentroids):
+    """
+    カテゴリごとのチャンク埋め込みの重心
+
+    取り込み時に埋め込みの和と件数をドキュメントごとに加算していき、npzとして保存する。
+    同じドキュメントを取り込み直すと前回の加算分を差し引いてから加算する。
+    """
+
+    key_field = "category_ids"
+    key_type = int
+    label = "category centroids"
+
+
+@dataclass
+class RouteDecision:
+    """ルーターの判定結果"""
+
+    confident: bool
+    category_id: Optional[int]
+    decompose: bool
+    sub_queries: list[str] = field(default_factory=list)
+    reasoning: str = ""
+    # カテゴリ判定に使った質問の埋め込み（検索で再利用する、重心がなければNone）
+    query_embedding: Optional[np.ndarray] = None
+
+
+def split_questions(question: str) -> list[str]:
+    """疑問符・「か。」で区切られた複数の質問に分割"""
+    parts = [p.strip() for p in _QUESTION_SPLIT.split(question)]
+    return [p for p in parts if len(p) > 1]
+
+
+class EmbeddingQueryRouter:
+    """
+    埋め込み重心によるクエリルーター
+
+    カテゴリの判定:
+    - 最上位の類似度と2位との差が min_margin 以上なら確定
+      （最上位の類似度が min_similarity 未満ならカテゴリを絞らない）
+    - 差が小さい場合は uncertain
+
+    分解の判定:
+    - 質問が2つ以上に分割できれば分解（分割結果をサブクエリにする）
+    - 分割できないが接続表現を含む場合は uncertain（分解方法はLLMに任せる）
+    """
+
+    def __init__(
+        self,
+        embedder: EmbedderBase | None = None,
+        centroids: CategoryCentroids | None = None,
+        min_similarity: float | None = None,
+        min_margin: float | None = None,
+    ):
+        settings = get_settings()
+        self.embedder = embedder or get_embedder()
+        self.centroids = centroids if centroids is not None else get_category_centroids()
+        self.min_similarity = (
+            min_similarity if min_similarity is not None else settings.query_router_min_similarity
+        )
+        self.min_margin = min_margin if min_margin is not None else settings.query_router_min_margin
+
+    def _route_category(
+        self, question: str
+    ) -> tuple[bool, Optional[int], str, Optional[np.ndarray]]:
+        # 重心がなければ埋め込みAPIを呼ばない
+        if len(self.centroids) == 0:
+            return False, None, "no centroids", None
+
+        query_embedding = self.embedder.embed_text(question)
+        similarities = self.centroids.similarities(query_embedding)
+
+        best_id, best = similarities[0]
+        second = similarities[1][1] if len(similarities) > 1 else -1.0
+        margin = best - second
+        detail = f"top={best_id}:{best:.3f}, margin={margin:.3f}"
+
+        if margin < self.min_margin and best >= self.min_similarity:
+            return False, None, f"ambiguous category ({detail})", query_embedding
+        if best < self.min_similarity:
+            return True, None, f"no close category ({detail})", query_embedding
+        return True, best_id, f"category by centroid ({detail})", query_embedding
+
+    def _route_strategy(self, question: str) -> tuple[bool, bool, list[str], str]:
+        questions = split_questions(question)
+        if len(questions) >= 2:
+            return True, True, questions, f"{len(questions)} questions"
+        if any(marker in question for marker in CONJUNCTION_MARKERS):
+            return False, False, [], "conjunction without separate questions"
+        return True, False, [], "single question"
+
+    def route(self, question: str) -> RouteDecision:
+        """カテゴリと検索戦略を判定"""
+        category_ok, category_id, category_reason, query_embedding = self._route_category(
+            question
+        )
+        strategy_ok, decompose, sub_queries, strategy_reason = self._route_strategy(question)
+
+        return RouteDecision(
+            confident=category_ok and strategy_ok,
+            category_id=category_id,
+            decompose=decompose,
+            sub_queries=sub_queries,
+            reasoning=f"router: {category_reason}; {strategy_reason}",
+            query_embedding=query_embedding,
+        )
+
+
+@lru_cache
+def get_category_centroids() -> CategoryCentroids:
+    """プロセス共有のカテゴリ重心を取得（初回のみファイルから読み込む）"""
+    return CategoryCentroids.load(get_settings().category_centroids_file)
@@ -1,17 +1,25 @@
 """Retrieval module for vector store and document retrieval"""
 
+from .local_vector_store import LocalVectorStore
 from .retriever import (
+    HierarchicalRetriever,
     HybridRetriever,
     MultiQueryRetriever,
     RetrieverBase,
     RetrievalResult,
     SimpleRetriever,
     get_retriever,
+    maximal_marginal_relevance,
+    reciprocal_rank_fusion,
+    reciprocal_rank_fusion_batch,
 )
 from .vector_store import (
     QdrantVectorStore,
     SearchResult,
+    SearchResultBatch,
     VectorStoreBase,
+    aclose_vector_stores,
+    close_vector_stores,
     get_vector_store,
 )
 
@@ -19,13 +27,21 @@ __all__ = [
     # Vector Store
     "VectorStoreBase",
     "QdrantVectorStore",
+    "LocalVectorStore",
     "SearchResult",
+    "SearchResultBatch",
     "get_vector_store",
+    "close_vector_stores",
+    "aclose_vector_stores",
     # Retriever
     "RetrieverBase",
     "SimpleRetriever",
     "HybridRetriever",
     "MultiQueryRetriever",
+    "HierarchicalRetriever",
     "RetrievalResult",
     "get_retriever",
+    "maximal_marginal_relevance",
+    "reciprocal_rank_fusion",
+    "reciprocal_rank_fusion_batch",
 ]
@@ -0,0 +1,189 @@
+"""
+埋め込み重心モジュール
+
+キー（カテゴリID・ソースファイル名など）ごとにチャンク埋め込みの重心を持ち、
+クエリ埋め込みとのコサイン類似度で近いキーを選ぶ
+"""
+
+import logging
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.config import get_settings
+from src.ingestion.embedder import Embedding, EmbeddingMatrix, as_embedding, as_embedding_matrix
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCentroids:
+    """
+    キーごとのチャンク埋め込みの重心
+
+    取り込み時に埋め込みの和と件数を加算していき、npzとして保存する。
+    キーが1ドキュメントに対応する場合は replace で置き換え、再取り込みで二重に数えない。
+    サブクラスは保存時のキー配列の名前（key_field）と型（key_type）を指定する。
+    """
+
+    key_field = "keys"
+    key_type: type = str
+    label = "centroids"
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self._sums: dict[Any, np.ndarray] = {}
+        self._counts: dict[Any, int] = {}
+        # ソースファイル名 → (キー, 埋め込みの和, 件数)（add で source を指定した加算分）
+        self._sources: dict[str, tuple[Any, np.ndarray, int]] = {}
+        self._matrix: np.ndarray | None = None
+        self._keys: list[Any] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, key: Any, embeddings: EmbeddingMatrix, source: str | None = None) -> None:
+        """
+        キーのチャンク埋め込みを加算
+
+        source（ソースファイル名）を指定すると、そのドキュメントの前回の加算分を
+        元のキーから差し引いてから加算する（再取り込みで二重に数えず、分類が
+        変わったドキュメントの古い埋め込みも残さない）。
+        """
+        if len(embeddings) == 0:
+            return
+        vectors = as_embedding_matrix(embeddings)
+        vector_sum = vectors.sum(axis=0)
+        with self._lock:
+            if source is not None:
+                self._subtract_source(source)
+                self._sources[source] = (key, vector_sum.copy(), len(vectors))
+            if key in self._sums:
+                self._sums[key] += vector_sum
+            else:
+                self._sums[key] = vector_sum
+            self._counts[key] = self._counts.get(key, 0) + len(vectors)
+            self._matrix = None
+
+    def _subtract_source(self, source: str) -> None:
+        """ドキュメントの前回の加算分を差し引く（ロック内で呼ぶ）"""
+        previous = self._sources.pop(source, None)
+        if previous is None:
+            return
+        key, vector_sum, n = previous
+        if key not in self._counts:
+            return
+        self._counts[key] -= n
+        if self._counts[key] <= 0:
+            del self._sums[key], self._counts[key]
+        else:
+            self._sums[key] -= vector_sum
+
+    def replace(self, key: Any, embeddings: EmbeddingMatrix) -> None:
+        """キーの埋め込みを置き換え（再取り込みしたドキュメントの古い埋め込みを残さない）"""
+        if len(embeddings) == 0:
+            return
+        vectors = as_embedding_matrix(embeddings)
+        with self._lock:
+            self._sums[key] = vectors.sum(axis=0)
+            self._counts[key] = len(vectors)
+            self._matrix = None
+
+    def _centroid_matrix(self) -> tuple[list[Any], np.ndarray]:
+        """正規化した重心の行列（キー順）"""
+        with self._lock:
+            if self._matrix is None:
+                self._keys = sorted(self._sums)
+                matrix = np.stack([self._sums[k] for k in self._keys])
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                self._matrix = matrix / np.maximum(norms, 1e-12)
+            return self._keys, self._matrix
+
+    def similarities(self, query_embedding: Embedding) -> list[tuple[Any, float]]:
+        """各重心とのコサイン類似度（降順）"""
+        if not self._sums:
+            return []
+        keys, matrix = self._centroid_matrix()
+        query = as_embedding(query_embedding)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        scores = matrix @ query
+        order = np.argsort(scores)[::-1]
+        return [(keys[i], float(scores[i])) for i in order]
+
+    def nearest(self, query_embedding: Embedding, n: int) -> list[Any]:
+        """類似度の高い上位n件のキー"""
+        return [key for key, _ in self.similarities(query_embedding)[:n]]
+
+    def save(self, path: Path | None = None) -> None:
+        """npzに保存"""
+        path = path or self.path
+        if path is None:
+            raise ValueError(f"No path given for {self.label}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        key_dtype = np.int64 if self.key_type is int else str
+        with self._lock:
+            keys = sorted(self._sums)
+            sources = sorted(self._sources)
+            np.savez(
+                path,
+                **{self.key_field: np.asarray(keys, dtype=key_dtype)},
+                sums=np.stack([self._sums[k] for k in keys])
+                if keys
+                else np.zeros((0, 0), dtype=np.float32),
+                counts=np.asarray([self._counts[k] for k in keys], dtype=np.int64),
+                source_names=np.asarray(sources, dtype=str),
+                source_keys=np.asarray([self._sources[s][0] for s in sources], dtype=key_dtype),
+                source_sums=np.stack([self._sources[s][1] for s in sources])
+                if sources
+                else np.zeros((0, 0), dtype=np.float32),
+                source_counts=np.asarray([self._sources[s][2] for s in sources], dtype=np.int64),
+            )
+        logger.info(f"Saved {self.label} ({len(keys)} entries): {path}")
+
+    @classmethod
+    def load(cls, path: Path) -> "EmbeddingCentroids":
+        """npzから読み込み（ファイルがなければ空）"""
+        centroids = cls(path)
+        if not path.exists():
+            logger.warning(f"{cls.label.capitalize()} not found: {path}")
+            return centroids
+
+        with np.load(path) as data:
+            for key, vector_sum, n in zip(
+                data[cls.key_field], data["sums"], data["counts"], strict=True
+            ):
+                centroids._sums[cls.key_type(key)] = vector_sum.astype(np.float32)
+                centroids._counts[cls.key_type(key)] = int(n)
+            if "source_keys" in data.files:
+                for source, key, vector_sum, n in zip(
+                    data["source_names"],
+                    data["source_keys"],
+                    data["source_sums"],
+                    data["source_counts"],
+                    strict=True,
+                ):
+                    centroids._sources[str(source)] = (
+                        cls.key_type(key),
+                        vector_sum.astype(np.float32),
+                        int(n),
+                    )
+        logger.info(f"Loaded {cls.label} ({len(centroids)} entries): {path}")
+        return centroids
+
+
+class DocumentCentroids(EmbeddingCentroids):
+    """ソースファイル（ドキュメント）ごとのチャンク埋め込みの重心"""
+
+    key_field = "source_files"
+    key_type = str
+    label = "document centroids"
+
+
+@lru_cache
+def get_document_centroids() -> DocumentCentroids:
+    """プロセス共有のドキュメント重心を取得（初回のみファイルから読み込む）"""
+    return DocumentCentroids.load(get_settings().document_centroids_file)
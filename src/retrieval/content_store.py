@@ -0,0 +1,209 @@
+"""
+チャンク本文ストアモジュール
+
+チャンク本文（画像キャプション込み）や分類理由などの大きなフィールドを
+ベクトルインデックスの外に保存し、chunk_idで一括取得する
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from src.ingestion.text_splitter import TextChunk
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # zstandardは任意依存（未導入時はzlibで圧縮）
+    zstandard = None
+
+# SQLiteの1文あたりのプレースホルダ上限に余裕を持たせたバッチサイズ
+_SQL_BATCH = 500
+
+
+class ContentStoreBase(ABC):
+    """本文ストア基底クラス"""
+
+    @abstractmethod
+    def put_many(self, chunks: list[TextChunk], extra_fields: tuple[str, ...] = ()) -> int:
+        """
+        チャンク本文を保存（同じchunk_idは上書き）
+
+        Args:
+            chunks: 保存するチャンク
+            extra_fields: 本文と一緒に退避するメタデータのキー
+        """
+        pass
+
+    @abstractmethod
+    def get_many(self, chunk_ids: list[str]) -> dict[str, str]:
+        """chunk_idから本文を一括取得（存在しないIDは含まれない）"""
+        pass
+
+    @abstractmethod
+    def get_extra_many(self, chunk_ids: list[str]) -> dict[str, dict]:
+        """chunk_idから退避したメタデータを一括取得"""
+        pass
+
+    @abstractmethod
+    def delete_many(self, chunk_ids: list[str]) -> int:
+        """chunk_idの本文と退避したメタデータを削除（コレクション削除時など）"""
+        pass
+
+    def close(self) -> None:
+        """リソースを解放"""
+
+
+class SQLiteContentStore(ContentStoreBase):
+    """
+    SQLiteによる本文ストア
+
+    本文は zstd（未導入時は zlib）で圧縮して保存する。
+    1つの接続をロックで共有し、複数スレッドから利用できる。
+    zstd の圧縮・展開オブジェクトはスレッド間で共有できないため、スレッドごとに作成する。
+    """
+
+    CODEC_NONE = 0
+    CODEC_ZLIB = 1
+    CODEC_ZSTD = 2
+
+    def __init__(self, path: str | Path, compress: bool = True):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compress = compress
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " chunk_id TEXT PRIMARY KEY,"
+            " codec INTEGER NOT NULL,"
+            " content BLOB NOT NULL,"
+            " extra TEXT)"
+        )
+        self._conn.commit()
+
+        self._codecs = threading.local()
+
+        logger.info(f"Initialized SQLite content store: {self.path}")
+
+    def _compressor(self) -> "zstandard.ZstdCompressor":
+        """このスレッドのzstd圧縮オブジェクト"""
+        compressor = getattr(self._codecs, "compressor", None)
+        if compressor is None:
+            compressor = self._codecs.compressor = zstandard.ZstdCompressor(level=3)
+        return compressor
+
+    def _decompressor(self) -> "zstandard.ZstdDecompressor":
+        """このスレッドのzstd展開オブジェクト"""
+        decompressor = getattr(self._codecs, "decompressor", None)
+        if decompressor is None:
+            decompressor = self._codecs.decompressor = zstandard.ZstdDecompressor()
+        return decompressor
+
+    def _encode(self, text: str) -> tuple[int, bytes]:
+        raw = text.encode("utf-8")
+        if not self.compress:
+            return self.CODEC_NONE, raw
+        if zstandard is not None:
+            return self.CODEC_ZSTD, self._compressor().compress(raw)
+        return self.CODEC_ZLIB, zlib.compress(raw, 6)
+
+    def _decode(self, codec: int, data: bytes) -> str:
+        if codec == self.CODEC_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read this content store")
+            data = self._decompressor().decompress(data)
+        elif codec == self.CODEC_ZLIB:
+            data = zlib.decompress(data)
+        return data.decode("utf-8")
+
+    def put_many(self, chunks: list[TextChunk], extra_fields: tuple[str, ...] = ()) -> int:
+        rows = []
+        for chunk in chunks:
+            codec, blob = self._encode(chunk.content)
+            extra = {k: chunk.metadata[k] for k in extra_fields if k in chunk.metadata}
+            rows.append(
+                (chunk.chunk_id, codec, blob, json.dumps(extra, ensure_ascii=False) if extra else None)
+            )
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_id, codec, content, extra) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def _select(self, columns: str, chunk_ids: list[str]) -> list[tuple]:
+        unique_ids = list(dict.fromkeys(chunk_ids))
+        rows: list[tuple] = []
+        with self._lock:
+            for i in range(0, len(unique_ids), _SQL_BATCH):
+                batch = unique_ids[i : i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows.extend(
+                    self._conn.execute(
+                        f"SELECT chunk_id, {columns} FROM chunks WHERE chunk_id IN ({placeholders})",
+                        batch,
+                    ).fetchall()
+                )
+        return rows
+
+    def get_many(self, chunk_ids: list[str]) -> dict[str, str]:
+        if not chunk_ids:
+            return {}
+        return {
+            chunk_id: self._decode(codec, blob)
+            for chunk_id, codec, blob in self._select("codec, content", chunk_ids)
+        }
+
+    def get_extra_many(self, chunk_ids: list[str]) -> dict[str, dict]:
+        if not chunk_ids:
+            return {}
+        return {
+            chunk_id: json.loads(extra)
+            for chunk_id, extra in self._select("extra", chunk_ids)
+            if extra
+        }
+
+    def delete_many(self, chunk_ids: list[str]) -> int:
+        unique_ids = list(dict.fromkeys(chunk_ids))
+        deleted = 0
+        with self._lock:
+            for i in range(0, len(unique_ids), _SQL_BATCH):
+                batch = unique_ids[i : i + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                deleted += self._conn.execute(
+                    f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch
+                ).rowcount
+            self._conn.commit()
+        return deleted
+
+    def count(self) -> int:
+        """保存済みチャンク数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_content_store(store_type: str = "sqlite", **kwargs) -> ContentStoreBase:
+    """本文ストアファクトリー"""
+    stores = {
+        "sqlite": SQLiteContentStore,
+    }
+
+    if store_type not in stores:
+        raise ValueError(f"Unknown content store type: {store_type}. Available: {list(stores.keys())}")
+
+    return stores[store_type](**kwargs)
@@ -0,0 +1,302 @@
+"""
+コンテキスト拡張モジュール
+
+検索でヒットしたチャンクを、同じページ内の前後のチャンク（またはページ全体）で
+拡張し、重なり部分を除いて1つの連続したテキストにまとめる
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from pathlib import Path
+
+from src.config import get_settings
+from src.ingestion.text_splitter import TextChunk
+from src.retrieval.vector_store import SearchResult, VectorStoreBase
+from src.tracing import count, span
+
+logger = logging.getLogger(__name__)
+
+EXPANSION_MODES = ("neighbors", "page")
+
+# これより短い一致は偶然とみなし、重なりとして扱わない
+MIN_OVERLAP_CHARS = 8
+
+
+class ChunkAdjacencyIndex:
+    """
+    チャンクの隣接インデックス
+
+    (source_file, page_number) ごとに chunk_index 順の (chunk_index, chunk_id, is_table)
+    を保持する。取り込み時に作成し、JSONとして保存する。
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self._pages: dict[tuple[str, int], list[tuple[int, str, bool]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def add_chunks(self, chunks: list[TextChunk]) -> None:
+        """チャンクを登録（同じページの既存エントリは置き換える）"""
+        pages: dict[tuple[str, int], list[tuple[int, str, bool]]] = {}
+        for chunk in chunks:
+            pages.setdefault((chunk.source_file, chunk.page_number), []).append(
+                (chunk.chunk_index, chunk.chunk_id, bool(chunk.metadata.get("is_table", False)))
+            )
+        with self._lock:
+            for key, entries in pages.items():
+                self._pages[key] = sorted(entries)
+
+    def page_entries(self, source_file: str, page_number: int) -> list[tuple[int, str, bool]]:
+        """ページ内のエントリ（chunk_index順）"""
+        return self._pages.get((source_file, page_number), [])
+
+    def save(self, path: Path | None = None) -> None:
+        """JSONに保存"""
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path given for adjacency index")
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            data: dict[str, dict[str, list]] = {}
+            for (source_file, page_number), entries in self._pages.items():
+                data.setdefault(source_file, {})[str(page_number)] = [list(e) for e in entries]
+
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+        logger.info(f"Saved chunk adjacency index ({len(self._pages)} pages): {path}")
+
+    @classmethod
+    def load(cls, path: Path) -> "ChunkAdjacencyIndex":
+        """JSONから読み込み（ファイルがなければ空のインデックス）"""
+        index = cls(path)
+        if not path.exists():
+            logger.warning(f"Chunk adjacency index not found: {path}")
+            return index
+
+        data = json.loads(path.read_text(encoding="utf-8"))
+        for source_file, pages in data.items():
+            for page_number, entries in pages.items():
+                index._pages[(source_file, int(page_number))] = [
+                    (int(ci), cid, bool(is_table)) for ci, cid, is_table in entries
+                ]
+        logger.info(f"Loaded chunk adjacency index ({len(index)} pages): {path}")
+        return index
+
+
+def merge_overlapping(texts: list[str], max_overlap: int) -> str:
+    """
+    連続するチャンクを結合（分割時に重複させた部分は1回だけ残す）
+
+    前のチャンクの末尾と次のチャンクの先頭が一致する最長部分を探し、
+    一致しなければ改行で区切って結合する。
+    """
+    merged = ""
+    for text in texts:
+        if not merged:
+            merged = text
+            continue
+        limit = min(len(merged), len(text), max_overlap)
+        for size in range(limit, MIN_OVERLAP_CHARS - 1, -1):
+            if merged.endswith(text[:size]):
+                merged += text[size:]
+                break
+        else:
+            merged += "\n" + text
+    return merged
+
+
+@dataclass
+class _Group:
+    """同じページ内で結合するチャンクの範囲"""
+
+    hit: SearchResult
+    source_file: str
+    page_number: int
+    start: int
+    end: int
+    hit_ids: list[str]
+
+
+class ContextExpander:
+    """
+    検索結果のコンテキスト拡張
+
+    - mode="neighbors": ヒットの前後 window 件のチャンクを結合
+    - mode="page": ヒットを含むページの全テキストチャンクを結合
+
+    同じページで範囲が重なる（または接する）ヒットは1件にまとめ、
+    スコアは最上位のヒットのものを使う。表のチャンクは拡張しない。
+    隣接チャンクの本文はベクトルストアの hydrate() で1回にまとめて取得する。
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStoreBase,
+        adjacency: ChunkAdjacencyIndex | None = None,
+        mode: str = "neighbors",
+        window: int | None = None,
+        max_overlap: int | None = None,
+    ):
+        if mode not in EXPANSION_MODES:
+            raise ValueError(f"Unknown expansion mode: {mode}. Available: {list(EXPANSION_MODES)}")
+
+        settings = get_settings()
+        self.vector_store = vector_store
+        self.adjacency = adjacency or get_adjacency_index()
+        self.mode = mode
+        self.window = window if window is not None else settings.context_window
+        self.max_overlap = max_overlap or settings.chunk_overlap
+
+    def _text_entries(self, result: SearchResult) -> list[tuple[int, str, bool]]:
+        entries = self.adjacency.page_entries(result.source_file, result.page_number)
+        return [e for e in entries if not e[2]]
+
+    def _plan(self, results: list[SearchResult]) -> list[_Group | SearchResult]:
+        """ヒットごとの結合範囲を決め、重なる範囲をまとめる（ランク順を維持）"""
+        planned: list[_Group | SearchResult] = []
+        for result in results:
+            chunk_index = result.metadata.get("chunk_index")
+            entries = self._text_entries(result)
+            positions = [ci for ci, _, _ in entries]
+            if (
+                chunk_index is None
+                or result.metadata.get("is_table")
+                or chunk_index not in positions
+            ):
+                planned.append(result)
+                continue
+
+            if self.mode == "page":
+                start, end = positions[0], positions[-1]
+            else:
+                start, end = chunk_index - self.window, chunk_index + self.window
+
+            for group in planned:
+                if (
+                    isinstance(group, _Group)
+                    and group.source_file == result.source_file
+                    and group.page_number == result.page_number
+                    and start <= group.end + 1
+                    and group.start - 1 <= end
+                ):
+                    group.start = min(group.start, start)
+                    group.end = max(group.end, end)
+                    group.hit_ids.append(result.chunk_id)
+                    break
+            else:
+                planned.append(
+                    _Group(
+                        hit=result,
+                        source_file=result.source_file,
+                        page_number=result.page_number,
+                        start=start,
+                        end=end,
+                        hit_ids=[result.chunk_id],
+                    )
+                )
+        return planned
+
+    def _group_ids(self, group: _Group) -> list[str]:
+        return [
+            chunk_id
+            for ci, chunk_id, _ in self._text_entries(group.hit)
+            if group.start <= ci <= group.end
+        ]
+
+    def _placeholders(
+        self, planned: list[_Group | SearchResult], known: dict[str, str]
+    ) -> list[SearchResult]:
+        """本文を取得する必要のある隣接チャンク（本文未取得の検索結果として作成）"""
+        placeholders: dict[str, SearchResult] = {}
+        for group in planned:
+            if not isinstance(group, _Group):
+                continue
+            for chunk_id in self._group_ids(group):
+                if chunk_id not in known and chunk_id not in placeholders:
+                    placeholders[chunk_id] = SearchResult(
+                        chunk_id=chunk_id,
+                        content="",
+                        score=0.0,
+                        source_file=group.source_file,
+                        page_number=group.page_number,
+                        metadata={},
+                    )
+        return list(placeholders.values())
+
+    def _assemble(
+        self, planned: list[_Group | SearchResult], contents: dict[str, str]
+    ) -> list[SearchResult]:
+        expanded = []
+        for group in planned:
+            if not isinstance(group, _Group):
+                expanded.append(group)
+                continue
+
+            chunk_ids = [cid for cid in self._group_ids(group) if contents.get(cid)]
+            if len(chunk_ids) <= 1 and len(group.hit_ids) == 1:
+                expanded.append(group.hit)
+                continue
+
+            expanded.append(
+                replace(
+                    group.hit,
+                    content=merge_overlapping(
+                        [contents[cid] for cid in chunk_ids], self.max_overlap
+                    ),
+                    metadata={
+                        **group.hit.metadata,
+                        "expansion": self.mode,
+                        "expanded_chunk_ids": chunk_ids,
+                        "merged_hits": group.hit_ids,
+                    },
+                )
+            )
+        return expanded
+
+    @staticmethod
+    def _known_contents(results: list[SearchResult]) -> dict[str, str]:
+        return {r.chunk_id: r.content for r in results if r.is_hydrated}
+
+    def expand(self, results: list[SearchResult]) -> list[SearchResult]:
+        """検索結果（本文取得済み）を隣接チャンクで拡張"""
+        if not results or len(self.adjacency) == 0:
+            return results
+
+        with span("expand"):
+            planned = self._plan(results)
+            contents = self._known_contents(results)
+            placeholders = self._placeholders(planned, contents)
+            if placeholders:
+                contents.update(self._known_contents(self.vector_store.hydrate(placeholders)))
+            count("expanded_chunks", len(placeholders))
+            return self._assemble(planned, contents)
+
+    async def aexpand(self, results: list[SearchResult]) -> list[SearchResult]:
+        """expand の非同期版"""
+        if not results or len(self.adjacency) == 0:
+            return results
+
+        with span("expand"):
+            planned = self._plan(results)
+            contents = self._known_contents(results)
+            placeholders = self._placeholders(planned, contents)
+            if placeholders:
+                contents.update(
+                    self._known_contents(await self.vector_store.ahydrate(placeholders))
+                )
+            count("expanded_chunks", len(placeholders))
+            return self._assemble(planned, contents)
+
+
+@lru_cache
+def get_adjacency_index() -> ChunkAdjacencyIndex:
+    """プロセス共有の隣接インデックスを取得（初回のみファイルから読み込む）"""
+    return ChunkAdjacencyIndex.load(get_settings().adjacency_index_file)
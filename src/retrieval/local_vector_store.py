@@ -0,0 +1,552 @@
+"""
+ローカルベクトルストアモジュール
+
+Qdrantを使わず、正規化した埋め込みをNumPyの行列として保持する総当たり検索
+（Qdrantのない開発・テスト環境や、小〜中規模のコーパス向け）
+"""
+
+import json
+import logging
+import shutil
+import threading
+from collections.abc import Iterator
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+from src.config import get_settings
+from src.ingestion.embedder import Embedding, EmbeddingMatrix, as_embedding, as_embedding_matrix
+from src.ingestion.text_splitter import TextChunk
+from src.retrieval.content_store import ContentStoreBase, get_content_store
+from src.retrieval.vector_store import (
+    HEAVY_PAYLOAD_KEYS,
+    QUANTIZATION_MODES,
+    RANGE_OPERATORS,
+    ChunkBatch,
+    SearchResult,
+    SearchResultBatch,
+    VectorStoreBase,
+    chunk_from_payload,
+    chunk_payload,
+    restore_external_content,
+)
+from src.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# 量子化コードを float32 に戻してスコアを計算する際の1ブロックの行数
+_BLOCK_ROWS = 8192
+
+# 1バイトあたりの立っているビット数（np.bitwise_count のない NumPy 1.x 用）
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """ビットをパックした符号（uint8）とクエリ符号とのハミング距離"""
+    xor = np.bitwise_xor(codes, query_code)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(xor).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[xor].sum(axis=1, dtype=np.int32)
+
+
+class QuantizedVectors:
+    """
+    量子化したベクトル（候補の絞り込み用、メモリ上に保持）
+
+    - int8: 全成分共通のスケール（絶対値の99パーセンタイル）で int8 に縮約
+    - binary: 各成分の符号を1ビットとしてパック（d/8 バイト）し、ハミング距離で比較
+    """
+
+    def __init__(self, mode: str, codes: np.ndarray, scale: float = 1.0):
+        self.mode = mode
+        self.codes = codes
+        self.scale = scale
+
+    @classmethod
+    def build(cls, mode: str, vectors: np.ndarray) -> "QuantizedVectors":
+        if mode == "int8":
+            scale = float(np.quantile(np.abs(vectors), 0.99)) if len(vectors) else 1.0
+            codes = np.empty(vectors.shape, dtype=np.int8)
+            for start in range(0, len(vectors), _BLOCK_ROWS):
+                block = vectors[start : start + _BLOCK_ROWS] * (127.0 / max(scale, 1e-12))
+                codes[start : start + _BLOCK_ROWS] = np.clip(np.rint(block), -127, 127)
+            return cls(mode, codes, scale)
+        if mode == "binary":
+            return cls(mode, np.packbits(vectors > 0, axis=1))
+        raise ValueError(f"Unknown quantization: {mode}. Available: {list(QUANTIZATION_MODES)}")
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes
+
+    def scores(self, query: np.ndarray, rows: np.ndarray | None) -> np.ndarray:
+        """近似スコア（大きいほど類似）"""
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.mode == "binary":
+            query_code = np.packbits(query > 0)
+            return -hamming_distances(codes, query_code).astype(np.float32)
+
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), _BLOCK_ROWS):
+            block = codes[start : start + _BLOCK_ROWS].astype(np.float32)
+            scores[start : start + _BLOCK_ROWS] = block @ query
+        return scores
+
+
+def _condition_mask(column: np.ndarray, key: str, value: Any) -> np.ndarray:
+    """フィルタ値を行のマスクに変換（QdrantVectorStore._build_condition と同じ解釈）"""
+    if isinstance(value, dict):
+        if "any" in value:
+            allowed = set(value["any"])
+            return np.fromiter((v in allowed for v in column), dtype=bool, count=len(column))
+        unknown = set(value) - set(RANGE_OPERATORS)
+        if unknown:
+            raise ValueError(f"Unsupported filter operators for {key}: {sorted(unknown)}")
+        numbers = np.array(
+            [v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan for v in column],
+            dtype=np.float64,
+        )
+        mask = ~np.isnan(numbers)
+        for op, bound in value.items():
+            mask &= {
+                "gt": numbers > bound,
+                "gte": numbers >= bound,
+                "lt": numbers < bound,
+                "lte": numbers <= bound,
+            }[op]
+        return mask
+
+    if isinstance(value, (list, tuple, set)):
+        allowed = set(value)
+        return np.fromiter((v in allowed for v in column), dtype=bool, count=len(column))
+
+    return np.fromiter((v == value for v in column), dtype=bool, count=len(column))
+
+
+class LocalVectorStore(VectorStoreBase):
+    """
+    NumPyによるローカルベクトルストア
+
+    ディレクトリに以下を保存する（flush() 時）。
+    - vectors.npy: 正規化済み float32 の埋め込み（読み込み時は mmap）
+    - payloads.jsonl: 行ごとのペイロード（Qdrantと同じ形式）
+    - codes_{int8|binary}.npy: 量子化コード（量子化有効時）
+    - meta.json: 次元数・件数・量子化スケール
+
+    量子化有効時は、量子化コードで top_k × oversampling 件に絞り込んでから
+    float32 のベクトルで再スコアリングする。
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        embedding_dimension: int | None = None,
+        content_store: ContentStoreBase | None = None,
+        quantization: str | None = None,
+        oversampling: float | None = None,
+    ):
+        settings = get_settings()
+        self.path = Path(path) if path is not None else settings.local_index_dir
+        self.embedding_dimension = embedding_dimension or settings.embedding_dimension
+        self.quantization = (
+            quantization if quantization is not None else settings.vector_quantization
+        )
+        if self.quantization and self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"Unknown quantization: {self.quantization}. Available: {list(QUANTIZATION_MODES)}"
+            )
+        self.oversampling = oversampling or settings.quantization_oversampling
+        self.rescore = settings.quantization_rescore
+
+        if content_store is None and settings.content_store_file is not None:
+            content_store = get_content_store(path=settings.content_store_file)
+        self.content_store = content_store
+
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((0, self.embedding_dimension), dtype=np.float32)
+        self._payloads: list[dict[str, Any]] = []
+        self._rows: dict[str, int] = {}
+        self._quantized: QuantizedVectors | None = None
+        self._columns: dict[str, np.ndarray] = {}
+        self._metadata: dict[int, tuple[dict, dict]] = {}
+        self._dirty = False
+        self._load()
+
+        logger.info(
+            f"Initialized local vector store: {self.path} ({len(self._payloads)} points, "
+            f"quantization: {self.quantization or 'none'})"
+        )
+
+    # --- 永続化 ---
+
+    def _load(self) -> None:
+        meta_path = self.path / "meta.json"
+        if not meta_path.exists():
+            return
+
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta["dimension"] != self.embedding_dimension:
+            raise ValueError(
+                f"Local index at {self.path} has dimension {meta['dimension']}, "
+                f"expected {self.embedding_dimension}"
+            )
+        self._vectors = np.load(self.path / "vectors.npy", mmap_mode="r")
+        with open(self.path / "payloads.jsonl", encoding="utf-8") as f:
+            self._payloads = [json.loads(line) for line in f]
+        self._rows = {p["chunk_id"]: i for i, p in enumerate(self._payloads)}
+
+        codes_path = self.path / f"codes_{self.quantization}.npy"
+        if self.quantization and codes_path.exists():
+            self._quantized = QuantizedVectors(
+                self.quantization,
+                np.load(codes_path),
+                meta.get("scales", {}).get(self.quantization, 1.0),
+            )
+
+    def flush(self) -> None:
+        """ベクトル・ペイロード・量子化コードをディレクトリに保存"""
+        with self._lock:
+            if not self._dirty:
+                return
+            vectors, payloads = self._vectors, self._payloads
+            quantized = self._quantized_vectors()
+            self._dirty = False
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_vectors = self.path / "vectors.tmp.npy"
+        np.save(tmp_vectors, vectors)
+        tmp_payloads = self.path / "payloads.jsonl.tmp"
+        with open(tmp_payloads, "w", encoding="utf-8") as f:
+            for payload in payloads:
+                f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+        meta = {"dimension": self.embedding_dimension, "count": len(payloads), "scales": {}}
+        if quantized is not None:
+            np.save(self.path / f"codes_{quantized.mode}.npy", quantized.codes)
+            meta["scales"][quantized.mode] = quantized.scale
+
+        tmp_vectors.replace(self.path / "vectors.npy")
+        tmp_payloads.replace(self.path / "payloads.jsonl")
+        (self.path / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+        logger.info(f"Saved local vector store ({len(payloads)} points): {self.path}")
+
+    # --- 追加 ---
+
+    def add_documents(
+        self, chunks: list[TextChunk], embeddings: EmbeddingMatrix
+    ) -> int:
+        """ドキュメントを追加（同じchunk_idは上書き）"""
+        if len(chunks) != len(embeddings):
+            raise ValueError("chunks and embeddings must have the same length")
+        if not chunks:
+            return 0
+
+        if self.content_store is not None:
+            self.content_store.put_many(chunks, extra_fields=HEAVY_PAYLOAD_KEYS)
+
+        vectors = _normalize(as_embedding_matrix(embeddings))
+        external_content = self.content_store is not None
+
+        with self._lock:
+            matrix = self._vectors
+            payloads = list(self._payloads)
+            rows = dict(self._rows)
+            updates: list[tuple[int, int]] = []
+            new_positions: list[int] = []
+
+            for i, chunk in enumerate(chunks):
+                payload = chunk_payload(chunk, external_content=external_content)
+                row = rows.get(chunk.chunk_id)
+                if row is None:
+                    rows[chunk.chunk_id] = len(payloads)
+                    payloads.append(payload)
+                    new_positions.append(i)
+                else:
+                    payloads[row] = payload
+                    updates.append((row, i))
+
+            if updates:
+                matrix = np.array(matrix)  # mmap（読み取り専用）を書き換え可能なコピーにする
+                for row, i in updates:
+                    matrix[row] = vectors[i]
+            if new_positions:
+                matrix = np.concatenate([matrix, vectors[new_positions]])
+
+            self._vectors = matrix
+            self._payloads = payloads
+            self._rows = rows
+            self._quantized = None
+            self._columns = {}
+            self._metadata = {}
+            self._dirty = True
+            self._bump_revision()
+
+        logger.info(f"Added {len(chunks)} documents to local vector store")
+        return len(chunks)
+
+    # --- 検索 ---
+
+    def _quantized_vectors(self) -> QuantizedVectors | None:
+        """量子化コード（追加後の初回検索時に作り直す、ロック内で呼ぶ）"""
+        if not self.quantization:
+            return None
+        if self._quantized is None or len(self._quantized.codes) != len(self._vectors):
+            self._quantized = QuantizedVectors.build(self.quantization, self._vectors)
+        return self._quantized
+
+    def _column(self, key: str) -> np.ndarray:
+        """フィルタ用にペイロードの1フィールドを配列化（追加されるまでキャッシュ）"""
+        column = self._columns.get(key)
+        if column is None:
+            column = np.empty(len(self._payloads), dtype=object)
+            column[:] = [p.get(key) for p in self._payloads]
+            self._columns[key] = column
+        return column
+
+    def _filter_rows(self, metadata_filter: Optional[dict[str, Any]]) -> np.ndarray | None:
+        """フィルタに一致する行番号（フィルタなしは None = 全行）"""
+        if not metadata_filter:
+            return None
+        mask = np.ones(len(self._payloads), dtype=bool)
+        for key, value in metadata_filter.items():
+            mask &= _condition_mask(self._column(key), key, value)
+        return np.flatnonzero(mask)
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """スコア上位k件の位置（降順）"""
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def _search_rows(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        metadata_filter: Optional[dict[str, Any]],
+        exact: bool = False,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """上位の行番号とコサイン類似度"""
+        with self._lock:
+            vectors = self._vectors
+            rows = self._filter_rows(metadata_filter)
+            quantized = None if exact else self._quantized_vectors()
+
+        candidates = rows
+        if quantized is not None:
+            approx = quantized.scores(query, rows)
+            if not self.rescore:
+                top = self._top(approx, top_k)
+                selected = top if rows is None else rows[top]
+                exact = vectors[selected] @ query
+                return selected, exact
+            limit = max(top_k, int(top_k * self.oversampling))
+            top = self._top(approx, limit)
+            candidates = top if rows is None else rows[top]
+
+        scores = (vectors if candidates is None else vectors[candidates]) @ query
+        top = self._top(scores, top_k)
+        return (top if candidates is None else candidates[top]), scores[top]
+
+    def _row_metadata(self, row: int) -> dict:
+        """
+        行のメタデータ（固定フィールド・大きいフィールドを除いたペイロード）
+
+        ヒットごとにdictを作らないよう、元のペイロードと組にして行ごとにキャッシュし
+        検索結果間で共有する（検索結果のメタデータは書き換えない前提）。
+        """
+        payload = self._payloads[row]
+        cached = self._metadata.get(row)
+        if cached is not None and cached[0] is payload:
+            return cached[1]
+        excluded = ("chunk_id", "content", "source_file", "page_number", *HEAVY_PAYLOAD_KEYS)
+        metadata = {k: v for k, v in payload.items() if k not in excluded}
+        self._metadata[row] = (payload, metadata)
+        return metadata
+
+    def _to_search_result(
+        self, row: int, score: float, with_content: bool, with_vectors: bool = False
+    ) -> SearchResult:
+        payload = self._payloads[row]
+        return SearchResult(
+            chunk_id=payload["chunk_id"],
+            content=payload.get("content", "") if with_content else "",
+            score=float(score),
+            source_file=payload.get("source_file", ""),
+            page_number=payload.get("page_number", 0),
+            metadata=self._row_metadata(row),
+            point_id=str(row),
+            vector=np.array(self._vectors[row]) if with_vectors else None,
+        )
+
+    def search(
+        self,
+        query_embedding: Embedding,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """
+        類似検索（メタデータフィルタ対応）
+
+        常に総当たり検索のため hnsw_ef は使わない。exact=True の場合は
+        量子化コードでの絞り込みを行わず float32 で全件を比較する。
+        """
+        if not self._payloads:
+            return []
+
+        query = _normalize(as_embedding(query_embedding))
+        with span("vector_search"):
+            rows, scores = self._search_rows(query, top_k, metadata_filter, exact)
+            results = [
+                self._to_search_result(int(row), score, with_content, with_vectors)
+                for row, score in zip(rows, scores, strict=True)
+            ]
+        if with_content and self.content_store is not None:
+            return self.hydrate(results)
+        return results
+
+    def search_batch(
+        self,
+        query_embeddings: EmbeddingMatrix,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> SearchResultBatch:
+        """複数クエリの一括類似検索（列形式、ヒットごとの SearchResult を作らない）"""
+        queries = _normalize(as_embedding_matrix(query_embeddings))
+        if not self._payloads or len(queries) == 0:
+            return SearchResultBatch.from_lists([[] for _ in range(len(queries))])
+
+        with span("vector_search"):
+            hits = [self._search_rows(query, top_k, metadata_filter, exact) for query in queries]
+            rows = np.concatenate([r for r, _ in hits])
+            row_list = rows.tolist()
+            payloads = [self._payloads[row] for row in row_list]
+            chunk_ids = [p["chunk_id"] for p in payloads]
+
+            contents = [""] * len(payloads)
+            if with_content and self.content_store is not None:
+                stored = self.content_store.get_many(chunk_ids)
+                contents = [stored.get(chunk_id, "") for chunk_id in chunk_ids]
+            elif with_content:
+                contents = [p.get("content", "") for p in payloads]
+
+            return SearchResultBatch(
+                chunk_ids=np.array(chunk_ids, dtype=object),
+                scores=np.concatenate([s for _, s in hits]).astype(np.float64),
+                offsets=np.cumsum([0] + [len(r) for r, _ in hits], dtype=np.int64),
+                contents=contents,
+                source_files=[p.get("source_file", "") for p in payloads],
+                page_numbers=np.array([p.get("page_number", 0) for p in payloads], dtype=np.int64),
+                metadata=[self._row_metadata(row) for row in row_list],
+                point_ids=[str(row) for row in row_list],
+                vectors=np.array(self._vectors[rows]) if with_vectors else None,
+            )
+
+    def fetch(
+        self,
+        chunk_ids: list[str],
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """chunk_idを指定してチャンクを取得（フィルタに一致するもののみ、入力の順序）"""
+        with self._lock:
+            rows = [self._rows[c] for c in chunk_ids if c in self._rows]
+            allowed = self._filter_rows(metadata_filter)
+        if allowed is not None:
+            allowed_rows = set(allowed.tolist())
+            rows = [row for row in rows if row in allowed_rows]
+        results = [
+            self._to_search_result(row, 0.0, with_content, with_vectors) for row in rows
+        ]
+        if with_content and self.content_store is not None:
+            return self.hydrate(results)
+        return results
+
+    def hydrate(self, results: list[SearchResult]) -> list[SearchResult]:
+        """本文未取得の検索結果に本文を補完（本文ストア → ペイロードの順）"""
+        with span("hydrate"):
+            if self.content_store is not None:
+                missing = [r.chunk_id for r in results if not r.is_hydrated]
+                contents = self.content_store.get_many(missing) if missing else {}
+                results = [
+                    r if r.is_hydrated or r.chunk_id not in contents
+                    else replace(r, content=contents[r.chunk_id])
+                    for r in results
+                ]
+            return [
+                r if r.is_hydrated or r.chunk_id not in self._rows
+                else replace(
+                    r, content=self._payloads[self._rows[r.chunk_id]].get("content", "")
+                )
+                for r in results
+            ]
+
+    def iter_chunks(self, batch_size: int = 1000) -> Iterator[ChunkBatch]:
+        """全チャンクを行順に batch_size 件ずつ取り出す（埋め込みは正規化済み）"""
+        with self._lock:
+            vectors, payloads = self._vectors, self._payloads
+
+        for start in range(0, len(payloads), batch_size):
+            batch = [dict(payload) for payload in payloads[start : start + batch_size]]
+            if self.content_store is not None:
+                restore_external_content(batch, self.content_store)
+            yield (
+                [chunk_from_payload(payload) for payload in batch],
+                np.array(vectors[start : start + batch_size]),
+                None,
+            )
+
+    # --- 管理 ---
+
+    def delete_collection(self) -> bool:
+        """保存済みのインデックスを含めて全て削除"""
+        try:
+            with self._lock:
+                self._vectors = np.zeros((0, self.embedding_dimension), dtype=np.float32)
+                self._payloads = []
+                self._rows = {}
+                self._quantized = None
+                self._columns = {}
+                self._metadata = {}
+                self._dirty = False
+                self._bump_revision()
+            if self.path.exists():
+                shutil.rmtree(self.path)
+            logger.info(f"Deleted local vector store: {self.path}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete local vector store: {e}")
+            return False
+
+    def get_collection_info(self) -> dict:
+        """インデックス情報を取得"""
+        with self._lock:
+            quantized = self._quantized_vectors()
+            return {
+                "name": str(self.path),
+                "points_count": len(self._payloads),
+                "quantization": self.quantization or None,
+                "vectors_bytes": int(self._vectors.nbytes),
+                "quantized_bytes": quantized.nbytes if quantized is not None else 0,
+            }
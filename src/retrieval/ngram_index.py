@@ -0,0 +1,437 @@
+"""
+文字n-gramインデックスモジュール
+
+チャンク本文の文字2-gram・3-gramの転置インデックス。数値・条番号・型番・固有名詞など、
+密ベクトル検索では取りこぼしやすい文字列の完全一致候補を高速に取り出す。
+取り込み時に作成して配列ファイルとして保存し、検索時はメモリマップで読み込む。
+
+ディレクトリ構成:
+    keys.u64        n-gramのキー（昇順、uint64）
+    offsets.i64     キーごとの postings の開始位置（CSR、int64）
+    postings.u32    行番号（キーごとに昇順、uint32）
+    chunk_ids.npy   行番号に対応するchunk_id
+    meta.json       バージョン・件数（最後に書く）
+"""
+
+import json
+import logging
+import math
+import re
+import shutil
+import tempfile
+import threading
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from src.config import get_settings
+from src.ingestion.text_splitter import TextChunk
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+# 配列の保存先のファイル名
+ARRAY_FILES = {"keys": "keys.u64", "offsets": "offsets.i64", "postings": "postings.u32"}
+
+# 追加分はこの件数の (キー, 行番号) ごとに並べ替えてディスクに書き出し、保存時も
+# この件数程度のキーの範囲ごとにまとめる（メモリに載せるのは1回分だけ）
+RUN_POSTINGS = 8_000_000
+
+# 1文字をUnicodeのコードポイント（21ビット）として詰め、n-gramを64ビットの整数で表す
+CODE_BITS = 21
+
+# クエリを検索語に区切る文字（空白・ひらがな・句読点・括弧など）
+# ひらがなは助詞などの機能語が多いため区切りとして扱う
+TERM_SEPARATORS = re.compile(r"[\sぁ-ゟ、。「」『』【】〈〉《》・,!?()\[\]{}<>:;\"'/|]+")
+
+# 検索語の最小文字数
+MIN_TERM_CHARS = 2
+
+
+def normalize_text(text: str) -> str:
+    """全角・半角と大文字・小文字を揃え、空白を除く（PDFの改行をまたいだ一致のため）"""
+    return "".join(unicodedata.normalize("NFKC", text).lower().split())
+
+
+def _codes(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+
+def ngram_keys(codes: np.ndarray, n: int) -> np.ndarray:
+    """コードポイント列の n-gram（n=2, 3）のキー"""
+    if len(codes) < n:
+        return np.zeros(0, dtype=np.uint64)
+    keys = codes[: len(codes) - n + 1].copy()
+    for offset in range(1, n):
+        keys = (keys << np.uint64(CODE_BITS)) | codes[offset : len(codes) - n + 1 + offset]
+    return keys
+
+
+def chunk_keys(text: str) -> np.ndarray:
+    """チャンク本文に含まれる2-gram・3-gramのキー（重複なし）"""
+    codes = _codes(normalize_text(text))
+    return np.unique(np.concatenate([ngram_keys(codes, 2), ngram_keys(codes, 3)]))
+
+
+def query_terms(query: str) -> list[str]:
+    """クエリから検索語（ひらがな・記号で区切った2文字以上の文字列）を取り出す"""
+    normalized = unicodedata.normalize("NFKC", query).lower()
+    terms = [t for t in TERM_SEPARATORS.split(normalized) if len(t) >= MIN_TERM_CHARS]
+    return list(dict.fromkeys(terms))
+
+
+def _load_array(path: Path, dtype: type, length: int) -> np.ndarray:
+    """生の配列ファイルをメモリマップで読み込み（空のファイルはマップできないため空配列）"""
+    if length == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(length,))
+
+
+def _read_slice(array: np.ndarray, start: int, end: int) -> np.ndarray:
+    """配列の [start, end) を読み込み（メモリマップはファイルから読み、全体をマップに載せない）"""
+    if isinstance(array, np.memmap) and array.filename is not None:
+        return np.fromfile(
+            array.filename,
+            dtype=array.dtype,
+            count=end - start,
+            offset=array.offset + start * array.itemsize,
+        )
+    return np.asarray(array[start:end])
+
+
+class NgramIndex:
+    """
+    文字n-gramの転置インデックス
+
+    keys（n-gramのキー、昇順）・offsets・postings（行番号、キーごとに昇順）の
+    CSR形式で持つ。行番号は chunk_ids の位置に対応する。
+    取り込み時は add_chunks で追加し、save で既存のインデックスとまとめて書き出す
+    （同じchunk_idは置き換える）。
+
+    追加分の (キー, 行番号) は run_postings 件ごとに並べ替えてランとして一時ディレクトリに
+    書き出す。save ではキーの範囲ごとに既存のインデックスと各ランから切り出して並べ替え、
+    ファイルに追記するため、メモリにはインデックス全体ではなく1範囲分だけを載せる。
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        max_postings: int = 10_000,
+        run_postings: int = RUN_POSTINGS,
+    ):
+        self.path = path
+        # これより多くのチャンクに出現する検索語は一般的な語で、文字列一致の候補としては
+        # 区別がつかないため使わない（密ベクトル検索に任せる）
+        self.max_postings = max_postings
+        self.run_postings = run_postings
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings = np.zeros(0, dtype=np.uint32)
+        self._chunk_ids = np.zeros(0, dtype="S1")
+        self._lock = threading.Lock()
+        self._reset_pending()
+
+    def _reset_pending(self) -> None:
+        """追加分を破棄（ロック内で呼ぶ）"""
+        self._rows_by_id: dict[str, int] | None = None
+        self._new_ids: list[str] = []
+        # 行ごとの最新の世代（0: 既存のインデックス、1以降: ラン）。古い世代の行は保存時に除く
+        self._generations: list[int] = []
+        self._buffer: list[tuple[int, np.ndarray]] = []
+        self._buffered = 0
+        self._runs: list[tuple[np.ndarray, np.ndarray]] = []
+        self._run_dir: Path | None = None
+
+    def __len__(self) -> int:
+        return len(self._chunk_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """インデックスの配列のサイズ"""
+        return sum(
+            a.nbytes for a in (self._keys, self._offsets, self._postings, self._chunk_ids)
+        )
+
+    # --- 追加 ---
+
+    def _row_index(self) -> dict[str, int]:
+        """chunk_id → 行番号（初回の追加時に既存のインデックスから作る、ロック内で呼ぶ）"""
+        if self._rows_by_id is None:
+            chunk_ids = self._chunk_ids.tolist()
+            self._rows_by_id = {c.decode("utf-8"): row for row, c in enumerate(chunk_ids)}
+            self._generations = [0] * len(chunk_ids)
+        return self._rows_by_id
+
+    def add_chunks(self, chunks: list[TextChunk]) -> None:
+        """チャンクを登録（save で書き出すまでは検索に反映されない）"""
+        keyed = [(chunk.chunk_id, chunk_keys(chunk.content)) for chunk in chunks]
+        with self._lock:
+            rows_by_id = self._row_index()
+            for chunk_id, keys in keyed:
+                row = rows_by_id.get(chunk_id)
+                if row is None:
+                    row = len(self._generations)
+                    rows_by_id[chunk_id] = row
+                    self._new_ids.append(chunk_id)
+                    self._generations.append(0)
+                elif self._generations[row] == len(self._runs) + 1:
+                    # 未書き出しの追加分に同じチャンクがあれば、世代で新旧を区別できるよう先に書き出す
+                    self._spill()
+                self._generations[row] = len(self._runs) + 1
+                self._buffer.append((row, keys))
+                self._buffered += len(keys)
+                if self._buffered >= self.run_postings:
+                    self._spill()
+
+    def _sorted_buffer(self) -> tuple[np.ndarray, np.ndarray]:
+        """未書き出しの追加分を (キー, 行番号) 順に並べた配列（ロック内で呼ぶ）"""
+        keys = np.concatenate([np.zeros(0, dtype=np.uint64)] + [k for _, k in self._buffer])
+        rows = np.repeat(
+            np.asarray([row for row, _ in self._buffer], dtype=np.uint32),
+            np.asarray([len(k) for _, k in self._buffer], dtype=np.int64),
+        )
+        order = np.lexsort((rows, keys))
+        return keys[order], rows[order]
+
+    def _spill(self) -> None:
+        """未書き出しの追加分をランとして一時ディレクトリに書き出す（ロック内で呼ぶ）"""
+        keys, rows = self._sorted_buffer()
+        if len(keys):
+            if self._run_dir is None:
+                self._run_dir = Path(tempfile.mkdtemp(prefix="ngram-runs-"))
+            prefix = self._run_dir / f"run{len(self._runs)}"
+            np.save(f"{prefix}_keys.npy", keys)
+            np.save(f"{prefix}_rows.npy", rows)
+            keys = np.load(f"{prefix}_keys.npy", mmap_mode="r")
+            rows = np.load(f"{prefix}_rows.npy", mmap_mode="r")
+        self._runs.append((keys, rows))
+        self._buffer, self._buffered = [], 0
+
+    # --- 検索 ---
+
+    def _gram_rows(self, gram: np.uint64) -> np.ndarray:
+        position = int(np.searchsorted(self._keys, gram))
+        if position >= len(self._keys) or self._keys[position] != gram:
+            return self._postings[:0]
+        return self._postings[self._offsets[position] : self._offsets[position + 1]]
+
+    def _term_rows(self, term: str) -> np.ndarray | None:
+        """
+        検索語のn-gramを全て含む行（出現位置は確認しないため、候補は検索語を含むものの上位集合）
+
+        3文字以上は3-gram、2文字は2-gramで引く。出現数の少ないn-gramから順に
+        二分探索で絞り込む。出現するチャンクが max_postings を超える検索語は None。
+        """
+        codes = _codes(normalize_text(term))
+        grams = np.unique(ngram_keys(codes, 3 if len(codes) >= 3 else 2))
+        if len(grams) == 0:
+            return None
+        postings = sorted((self._gram_rows(gram) for gram in grams), key=len)
+        rows = postings[0]
+        if len(rows) > self.max_postings:
+            return None
+        for other in postings[1:]:
+            if len(rows) == 0:
+                break
+            positions = np.minimum(np.searchsorted(other, rows), len(other) - 1)
+            rows = rows[other[positions] == rows]
+        return rows if len(rows) <= self.max_postings else None
+
+    def search(self, query: str, limit: int = 20) -> list[tuple[str, float]]:
+        """
+        クエリの検索語を含むチャンクを取得
+
+        検索語ごとに、含むチャンク数から求めたIDF（log(1 + N/df)）を加算したスコア順に返す。
+
+        Returns:
+            (chunk_id, スコア) のリスト（スコア降順）
+        """
+        if len(self._chunk_ids) == 0:
+            return []
+
+        row_lists, weights = [], []
+        for term in query_terms(query):
+            rows = self._term_rows(term)
+            if rows is None or len(rows) == 0:
+                continue
+            row_lists.append(rows)
+            weights.append(np.full(len(rows), math.log1p(len(self._chunk_ids) / len(rows))))
+        if not row_lists:
+            return []
+
+        rows, inverse = np.unique(np.concatenate(row_lists), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(weights))
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            top = top[np.argsort(-scores[top], kind="stable")]
+        else:
+            top = np.argsort(-scores, kind="stable")
+        return [
+            (self._chunk_ids[rows[i]].decode("utf-8"), float(scores[i])) for i in top
+        ]
+
+    # --- 永続化 ---
+
+    def _range_bounds(self, runs: list[tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        """
+        保存時に1回でまとめるキーの範囲の境界（昇順、先頭は最小のキー）
+
+        既存のインデックスと各ランから一定間隔でキーを標本にとり、1範囲の postings が
+        run_postings 件程度になる間隔で境界を選ぶ。
+        """
+        step = max(self.run_postings // 64, 1)
+        samples = [np.zeros(0, dtype=np.uint64)] + [np.asarray(keys[::step]) for keys, _ in runs]
+        if len(self._postings):
+            positions = np.arange(0, len(self._postings), step)
+            samples.append(
+                np.asarray(self._keys[np.searchsorted(self._offsets, positions, side="right") - 1])
+            )
+        return np.unique(np.sort(np.concatenate(samples))[::64])
+
+    def _range_postings(
+        self,
+        runs: list[tuple[np.ndarray, np.ndarray]],
+        generations: np.ndarray,
+        low: np.uint64,
+        high: np.uint64 | None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """キーが [low, high) の (キー, 行番号)（置き換えられた古い世代の行は除く、未整列）"""
+        key_parts, row_parts = [np.zeros(0, dtype=np.uint64)], [np.zeros(0, dtype=np.uint32)]
+
+        def take(generation: int, keys: np.ndarray, rows: np.ndarray) -> None:
+            keep = generations[rows] == generation
+            key_parts.append(keys[keep])
+            row_parts.append(rows[keep])
+
+        start = int(np.searchsorted(self._keys, low))
+        end = len(self._keys) if high is None else int(np.searchsorted(self._keys, high))
+        if end > start:
+            offsets = _read_slice(self._offsets, start, end + 1)
+            take(
+                0,
+                np.repeat(_read_slice(self._keys, start, end), np.diff(offsets)),
+                _read_slice(self._postings, int(offsets[0]), int(offsets[-1])),
+            )
+        for generation, (keys, rows) in enumerate(runs, start=1):
+            start = int(np.searchsorted(keys, low))
+            end = len(keys) if high is None else int(np.searchsorted(keys, high))
+            if end > start:
+                take(generation, _read_slice(keys, start, end), _read_slice(rows, start, end))
+        return np.concatenate(key_parts), np.concatenate(row_parts)
+
+    def save(self, path: Path | None = None) -> None:
+        """
+        追加分をまとめてディレクトリに保存
+
+        keys / offsets / postings はキーの範囲ごとに追記し、書き終えてから置き換える。
+        meta.json は最後に書く。
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path given for n-gram index")
+        path.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            self._row_index()
+            runs = self._runs + [self._sorted_buffer()]
+            generations = np.asarray(self._generations, dtype=np.int32)
+            bounds = self._range_bounds(runs)
+
+            tmp_paths = {name: path / f"{name}.tmp" for name in ARRAY_FILES.values()}
+            ngrams = postings = 0
+            with (
+                open(tmp_paths[ARRAY_FILES["keys"]], "wb") as keys_file,
+                open(tmp_paths[ARRAY_FILES["offsets"]], "wb") as offsets_file,
+                open(tmp_paths[ARRAY_FILES["postings"]], "wb") as postings_file,
+            ):
+                for i, low in enumerate(bounds):
+                    high = bounds[i + 1] if i + 1 < len(bounds) else None
+                    keys, rows = self._range_postings(runs, generations, low, high)
+                    if len(keys) == 0:
+                        continue
+                    order = np.lexsort((rows, keys))
+                    keys, rows = keys[order], rows[order]
+                    starts = np.flatnonzero(np.append(True, keys[1:] != keys[:-1]))
+                    keys[starts].tofile(keys_file)
+                    (starts + postings).astype(np.int64).tofile(offsets_file)
+                    rows.tofile(postings_file)
+                    ngrams += len(starts)
+                    postings += len(rows)
+                np.asarray([postings], dtype=np.int64).tofile(offsets_file)
+
+            chunk_ids = np.asarray(
+                self._chunk_ids.tolist() + [c.encode("utf-8") for c in self._new_ids],
+                dtype=bytes,
+            )
+            tmp_path = path / "chunk_ids.tmp.npy"
+            np.save(tmp_path, chunk_ids if len(chunk_ids) else np.zeros(0, dtype="S1"))
+            tmp_path.replace(path / "chunk_ids.npy")
+            for tmp_path in tmp_paths.values():
+                tmp_path.replace(path / tmp_path.stem)
+            # 旧形式（.npy）のファイルが残っていれば削除
+            for name in ARRAY_FILES:
+                (path / f"{name}.npy").unlink(missing_ok=True)
+
+            meta = {
+                "version": INDEX_VERSION,
+                "chunks": len(chunk_ids),
+                "ngrams": ngrams,
+                "postings": postings,
+            }
+            tmp_path = path / "meta.json.tmp"
+            tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+            tmp_path.replace(path / "meta.json")
+
+            run_dir = self._run_dir
+            self._open(path, meta)
+            self._reset_pending()
+        if run_dir is not None:
+            shutil.rmtree(run_dir, ignore_errors=True)
+        logger.info(
+            f"Saved n-gram index ({meta['chunks']} chunks, {meta['ngrams']} n-grams, "
+            f"{meta['postings']} postings, {len(runs)} runs, {len(bounds)} key ranges): {path}"
+        )
+
+    def _open(self, path: Path, meta: dict) -> None:
+        """保存済みの配列をメモリマップで開く"""
+        if meta["version"] == 1:
+            # 旧形式（各配列の .npy）
+            self._keys = np.load(path / "keys.npy", mmap_mode="r")
+            self._offsets = np.load(path / "offsets.npy", mmap_mode="r")
+            self._postings = np.load(path / "postings.npy", mmap_mode="r")
+        else:
+            self._keys = _load_array(path / ARRAY_FILES["keys"], np.uint64, meta["ngrams"])
+            self._offsets = _load_array(
+                path / ARRAY_FILES["offsets"], np.int64, meta["ngrams"] + 1
+            )
+            self._postings = _load_array(
+                path / ARRAY_FILES["postings"], np.uint32, meta["postings"]
+            )
+        self._chunk_ids = np.load(path / "chunk_ids.npy", mmap_mode="r")
+
+    @classmethod
+    def load(cls, path: Path, **kwargs) -> "NgramIndex":
+        """ディレクトリからメモリマップで読み込み（なければ空のインデックス）"""
+        index = cls(path, **kwargs)
+        meta_path = path / "meta.json"
+        if not meta_path.exists():
+            logger.warning(f"N-gram index not found: {path}")
+            return index
+
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("version") not in (1, INDEX_VERSION):
+            logger.warning(f"Unsupported n-gram index version {meta.get('version')}: {path}")
+            return index
+
+        index._open(path, meta)
+        logger.info(f"Loaded n-gram index ({len(index)} chunks): {path}")
+        return index
+
+
+@lru_cache
+def get_ngram_index() -> NgramIndex:
+    """プロセス共有のn-gramインデックスを取得（初回のみファイルから読み込む）"""
+    return NgramIndex.load(get_settings().ngram_index_dir)
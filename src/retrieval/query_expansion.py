@@ -0,0 +1,165 @@
+"""
+クエリ拡張モジュール
+
+マルチクエリ検索のために質問文の言い換えを生成する
+"""
+
+import logging
+import re
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from src.config import get_settings
+from src.generation.llm_client import LLMClientBase, get_llm_client
+
+logger = logging.getLogger(__name__)
+
+
+# 文末の疑問・依頼表現（長いものから順に除去を試みる）
+QUESTION_SUFFIXES = [
+    "について教えてください",
+    "を教えてください",
+    "とは何ですか",
+    "は何ですか",
+    "はどれですか",
+    "はいくらですか",
+    "はいつですか",
+    "はどこですか",
+    "はどのようなものですか",
+    "はどうなっていますか",
+    "ですか",
+    "ますか",
+]
+
+# 検索語の言い換え辞書（公的文書で使われやすい表現に寄せる）
+SYNONYMS = {
+    "方法": "手順",
+    "手順": "方法",
+    "理由": "背景",
+    "原因": "要因",
+    "目的": "趣旨",
+    "金額": "費用",
+    "費用": "経費",
+    "割合": "比率",
+    "比率": "割合",
+    "条件": "要件",
+    "要件": "条件",
+    "違い": "相違点",
+    "メリット": "利点",
+    "デメリット": "課題",
+    "対象": "対象者",
+    "期限": "期日",
+    "義務": "規定",
+    "推移": "動向",
+    "現状": "実態",
+    "増加": "拡大",
+    "減少": "縮小",
+}
+
+
+class QueryExpanderBase(ABC):
+    """クエリ拡張基底クラス"""
+
+    @abstractmethod
+    def expand(self, query: str, num_queries: int = 3) -> list[str]:
+        """
+        質問文の言い換えを生成
+
+        Returns:
+            元の質問を先頭に含む、重複のないクエリのリスト（最大num_queries件）
+        """
+        pass
+
+
+def _unique(queries: list[str], limit: int) -> list[str]:
+    seen: set[str] = set()
+    unique = []
+    for q in queries:
+        q = q.strip()
+        if q and q not in seen:
+            seen.add(q)
+            unique.append(q)
+    return unique[:limit]
+
+
+class TemplateQueryExpander(QueryExpanderBase):
+    """
+    ルールベースのクエリ拡張（API呼び出しなし）
+
+    - 文末の疑問表現を除去したキーワード形
+    - 言い換え辞書による語の置換
+    """
+
+    def _strip_question(self, query: str) -> str:
+        core = re.sub(r"[？?。\s]+$", "", query)
+        for suffix in QUESTION_SUFFIXES:
+            if core.endswith(suffix):
+                return core[: -len(suffix)]
+        return core
+
+    def expand(self, query: str, num_queries: int = 3) -> list[str]:
+        core = self._strip_question(query)
+        candidates = [query, core]
+
+        for word, synonym in SYNONYMS.items():
+            if word in core:
+                candidates.append(core.replace(word, synonym, 1))
+
+        return _unique(candidates, num_queries)
+
+
+class LLMQueryExpander(QueryExpanderBase):
+    """
+    LLMによるクエリ拡張（短い出力の軽量な呼び出し1回）
+
+    推論モデル（gpt-5-mini など）は推論トークンも max_tokens に含まれるため、
+    予算が小さいと出力が空になる。既定値は設定の query_expansion_max_tokens。
+    """
+
+    def __init__(self, llm_client: Optional[LLMClientBase] = None, max_tokens: int | None = None):
+        self.llm_client = llm_client or get_llm_client()
+        self.max_tokens = max_tokens or get_settings().query_expansion_max_tokens
+
+    def expand(self, query: str, num_queries: int = 3) -> list[str]:
+        if num_queries <= 1:
+            return [query]
+
+        prompt = (
+            f"次の質問を、文書検索で使う別の表現に{num_queries - 1}通り言い換えてください。\n"
+            "言い換えのみを1行に1つずつ出力してください。\n\n"
+            f"質問: {query}"
+        )
+        try:
+            response = self.llm_client.generate(
+                prompt, temperature=0.0, max_tokens=self.max_tokens
+            )
+            lines = [
+                re.sub(r"^\s*(?:[-・*]|\d+[.)）])\s*", "", line)
+                for line in response.content.splitlines()
+            ]
+        except Exception as e:
+            logger.warning(f"Query expansion failed: {e}. Using original query only.")
+            lines = []
+
+        queries = _unique([query, *lines], num_queries)
+        if len(queries) == 1:
+            logger.warning(
+                f"Query expansion returned no paraphrases (max_tokens={self.max_tokens}). "
+                "Using original query only."
+            )
+        return queries
+
+
+def get_query_expander(expander_type: str = "template", **kwargs) -> QueryExpanderBase:
+    """クエリ拡張ファクトリー"""
+    expanders = {
+        "template": TemplateQueryExpander,
+        "llm": LLMQueryExpander,
+    }
+
+    if expander_type not in expanders:
+        raise ValueError(
+            f"Unknown expander type: {expander_type}. Available: {list(expanders.keys())}"
+        )
+
+    return expanders[expander_type](**kwargs)
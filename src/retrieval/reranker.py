@@ -4,14 +4,136 @@
 Cross-Encoderを使用して検索結果を再スコアリング
 """
 
+import hashlib
 import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import replace
+from functools import lru_cache
 
 from sentence_transformers import CrossEncoder
 
+from src.config import get_settings
 from src.retrieval.vector_store import SearchResult
+from src.tracing import count, span
 
 logger = logging.getLogger(__name__)
 
+RERANKER_BACKENDS = ("torch", "quantized", "onnx")
+
+
+def _normalize_query(query: str) -> str:
+    """キャッシュキー用に質問文を正規化（全角半角・空白・大文字小文字の揺れを吸収）"""
+    return " ".join(unicodedata.normalize("NFKC", query).lower().split())
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def adaptive_cutoff(
+    scores: list[float],
+    top_k: int,
+    min_k: int = 1,
+    score_threshold: float | None = None,
+    max_gap: float | None = None,
+) -> int:
+    """
+    降順のリランクスコアから返却件数を決定
+
+    min_k件までは必ず残し、それ以降はスコアが閾値を下回った位置、
+    または直前とのスコア差がmax_gapを超えた位置で打ち切る。
+
+    Returns:
+        返却件数（min_k以上 top_k以下、ただし候補数を超えない）
+    """
+    limit = min(top_k, len(scores))
+    keep = min(max(min_k, 1), limit)
+    while keep < limit:
+        score = scores[keep]
+        if score_threshold is not None and score < score_threshold:
+            break
+        if max_gap is not None and scores[keep - 1] - score > max_gap:
+            break
+        keep += 1
+    return keep
+
+
+class RerankScoreCache:
+    """
+    Cross-Encoderスコアのキャッシュ（LRU, スレッドセーフ）
+
+    キーは (正規化した質問のハッシュ, chunk_id, チャンク本文のハッシュ, モデル名,
+    バックエンド, 最大トークン長)。バックエンドや切り詰め長が異なるとスコアも変わるため、
+    別のエントリとして扱う。本文が変わった（再取り込みした）チャンクは別のキーになり、
+    古い本文のスコアは参照されないまま上限を超えたときに削除される。
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple[str, str, str, str, str, int], float] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def query_key(query: str) -> str:
+        """質問文のキャッシュキー"""
+        return _digest(_normalize_query(query))
+
+    def get(
+        self,
+        query_key: str,
+        chunk_id: str,
+        model_name: str,
+        content: str,
+        backend: str = "torch",
+        max_length: int = 0,
+    ) -> float | None:
+        """キャッシュ済みスコアを取得（なければNone）"""
+        key = (query_key, chunk_id, _digest(content), model_name, backend, max_length)
+        with self._lock:
+            score = self._entries.get(key)
+            if score is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return score
+
+    def put(
+        self,
+        query_key: str,
+        chunk_id: str,
+        model_name: str,
+        content: str,
+        score: float,
+        backend: str = "torch",
+        max_length: int = 0,
+    ) -> None:
+        """スコアを保存（上限を超えたら最も古いものから削除）"""
+        key = (query_key, chunk_id, _digest(content), model_name, backend, max_length)
+        with self._lock:
+            self._entries[key] = score
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """キャッシュ統計"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
 
 class Reranker:
     """
@@ -19,29 +141,170 @@ class Reranker:
 
     Cross-Encoderで質問とチャンクのペアを直接評価し、
     関連性スコアを算出して上位k件に絞る
+
+    推論の高速化:
+    - backend="quantized": 線形層をint8に動的量子化（CPU向け）
+    - backend="onnx": ONNX Runtimeで推論
+    - 最大系列長を明示して長いチャンクを切り詰める
+    - ペアを長さ順に並べてバッチ化し、パディングを最小化する
     """
 
     def __init__(
         self,
-        model_name: str = "cl-nagoya/ruri-reranker-small",
+        model_name: str | None = None,
         device: str = "cpu",
+        backend: str | None = None,
+        max_length: int | None = None,
+        batch_size: int | None = None,
+        num_threads: int | None = None,
+        score_cache: RerankScoreCache | None = None,
     ):
         """
         Args:
             model_name: Cross-Encoderモデル名（デフォルト: 日本語対応モデル）
             device: 実行デバイス ("cpu" or "cuda")
+            backend: 推論バックエンド ("torch", "quantized", "onnx")
+            max_length: (質問, チャンク) ペアの最大トークン長
+            batch_size: 推論バッチサイズ
+            num_threads: CPU推論スレッド数（0は既定値）
+            score_cache: スコアキャッシュ（省略時は設定のサイズで作成、0なら無効）
         """
-        self.model_name = model_name
+        settings = get_settings()
+        self.model_name = model_name or settings.reranker_model
         self.device = device
-        logger.info(f"Loading Cross-Encoder model: {model_name}")
-        self.model = CrossEncoder(model_name, device=device, trust_remote_code=True)
+        self.backend = backend or settings.reranker_backend
+        self.max_length = max_length or settings.reranker_max_length
+        self.batch_size = batch_size or settings.reranker_batch_size
+        self.num_threads = (
+            num_threads if num_threads is not None else settings.reranker_num_threads
+        )
+
+        if score_cache is None and settings.reranker_cache_size > 0:
+            score_cache = RerankScoreCache(max_size=settings.reranker_cache_size)
+        self.score_cache = score_cache
+
+        if self.backend not in RERANKER_BACKENDS:
+            raise ValueError(
+                f"Unknown reranker backend: {self.backend}. Available: {list(RERANKER_BACKENDS)}"
+            )
+
+        if self.num_threads > 0:
+            import torch
+
+            torch.set_num_threads(self.num_threads)
+
+        logger.info(f"Loading Cross-Encoder model: {self.model_name} (backend={self.backend})")
+        self.model = self._load_model()
         logger.info("Cross-Encoder loaded successfully")
 
+    def _load_model(self) -> CrossEncoder:
+        """バックエンドに応じてCross-Encoderを読み込む"""
+        if self.backend == "onnx":
+            try:
+                return CrossEncoder(
+                    self.model_name,
+                    device=self.device,
+                    max_length=self.max_length,
+                    trust_remote_code=True,
+                    backend="onnx",
+                )
+            except (TypeError, ValueError, ImportError) as e:
+                # 古いsentence-transformersやonnxruntime未導入の場合はtorchで継続
+                logger.warning(f"ONNX backend unavailable ({e}), falling back to torch")
+                self.backend = "torch"
+
+        model = CrossEncoder(
+            self.model_name,
+            device=self.device,
+            max_length=self.max_length,
+            trust_remote_code=True,
+        )
+
+        if self.backend == "quantized":
+            if self.device != "cpu":
+                logger.warning("Dynamic int8 quantization is CPU only, using full precision")
+                self.backend = "torch"
+            else:
+                import torch
+
+                model.model = torch.quantization.quantize_dynamic(
+                    model.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                logger.info("Applied dynamic int8 quantization to Cross-Encoder")
+
+        return model
+
+    def score(self, query: str, contents: list[str]) -> list[float]:
+        """
+        質問と各チャンクの関連性スコアを算出
+
+        長さ順に並べ替えてからバッチ推論し、元の順序に戻して返す。
+        同じバッチ内の長さが揃うためパディング分の計算が減る。
+        """
+        if not contents:
+            return []
+
+        order = sorted(range(len(contents)), key=lambda i: len(contents[i]))
+        pairs = [(query, contents[i]) for i in order]
+
+        sorted_scores = self.model.predict(
+            pairs,
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+        )
+
+        scores = [0.0] * len(contents)
+        for position, index in enumerate(order):
+            scores[index] = float(sorted_scores[position])
+        return scores
+
+    def score_candidates(self, query: str, candidates: list[SearchResult]) -> list[float]:
+        """
+        検索結果の関連性スコアを算出（キャッシュ済みのペアは推論しない）
+
+        Returns:
+            candidatesと同じ順序のスコア
+        """
+        if self.score_cache is None:
+            return self.score(query, [c.content for c in candidates])
+
+        query_key = self.score_cache.query_key(query)
+        scores: list[float | None] = [
+            self.score_cache.get(
+                query_key, c.chunk_id, self.model_name, c.content, self.backend, self.max_length
+            )
+            for c in candidates
+        ]
+
+        missing = [i for i, s in enumerate(scores) if s is None]
+        if missing:
+            new_scores = self.score(query, [candidates[i].content for i in missing])
+            for i, new_score in zip(missing, new_scores, strict=True):
+                scores[i] = new_score
+                self.score_cache.put(
+                    query_key,
+                    candidates[i].chunk_id,
+                    self.model_name,
+                    candidates[i].content,
+                    new_score,
+                    self.backend,
+                    self.max_length,
+                )
+
+        count("rerank_cache_hits", len(candidates) - len(missing))
+        logger.debug(
+            f"Rerank cache: {len(candidates) - len(missing)}/{len(candidates)} pairs cached"
+        )
+        return scores
+
     def rerank(
         self,
         query: str,
         candidates: list[SearchResult],
         top_k: int = 5,
+        min_k: int | None = None,
+        score_threshold: float | None = None,
+        max_gap: float | None = None,
     ) -> list[SearchResult]:
         """
         候補をリランク
@@ -49,26 +312,30 @@ class Reranker:
         Args:
             query: 質問文
             candidates: 検索結果（多めに取得した候補）
-            top_k: 最終的に返す件数
+            top_k: 最終的に返す最大件数
+            min_k: 適応的打ち切りでも最低限返す件数（省略時は打ち切りなし）
+            score_threshold: これを下回るスコアの候補は返さない
+            max_gap: 直前の候補とのスコア差がこれを超えたら以降を返さない
 
         Returns:
-            リランク後の上位k件
+            リランク後の上位候補（scoreはリランクスコア、元のスコアは
+            metadata["vector_score"]に保持）
         """
         if not candidates:
             return []
 
-        if len(candidates) <= top_k:
+        adaptive = min_k is not None
+        if len(candidates) <= top_k and not adaptive:
             logger.info(
                 f"Candidate count ({len(candidates)}) <= top_k ({top_k}), skipping rerank"
             )
             return candidates
 
-        # クエリとドキュメントのペアを作成
-        pairs = [(query, c.content) for c in candidates]
-
         # Cross-Encoderでスコア算出
         logger.info(f"Reranking {len(candidates)} candidates with Cross-Encoder")
-        scores = self.model.predict(pairs)
+        with span("rerank"):
+            scores = self.score_candidates(query, candidates)
+        count("reranked_candidates", len(candidates))
 
         # スコア順にソート
         ranked = sorted(
@@ -77,11 +344,30 @@ class Reranker:
             reverse=True,
         )
 
-        # 上位k件を返す
-        reranked_results = [c for c, _ in ranked[:top_k]]
+        # 返却件数を決定（適応的打ち切り or 上位k件）
+        keep = top_k
+        if adaptive:
+            keep = adaptive_cutoff(
+                [score for _, score in ranked],
+                top_k=top_k,
+                min_k=min_k,
+                score_threshold=score_threshold,
+                max_gap=max_gap,
+            )
+
+        reranked_results = [
+            replace(c, score=score, metadata={**c.metadata, "vector_score": c.score})
+            for c, score in ranked[:keep]
+        ]
 
         logger.info(
             f"Reranking complete: {len(candidates)} -> {len(reranked_results)} documents"
         )
 
         return reranked_results
+
+
+@lru_cache
+def get_reranker() -> Reranker:
+    """プロセス共有のリランカーを取得（モデル読み込みは初回のみ）"""
+    return Reranker()
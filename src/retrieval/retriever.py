@@ -4,13 +4,40 @@
 クエリに基づいて関連ドキュメントを検索
 """
 
+import asyncio
+import json
 import logging
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Optional, Any
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Optional
 
-from src.ingestion.embedder import EmbedderBase, get_embedder
-from src.retrieval.vector_store import SearchResult, VectorStoreBase, get_vector_store
+import numpy as np
+
+from src.config import get_settings
+from src.ingestion.embedder import (
+    EmbedderBase,
+    Embedding,
+    EmbeddingMatrix,
+    as_embedding,
+    as_embedding_matrix,
+    get_embedder,
+)
+from src.retrieval.centroids import DocumentCentroids, get_document_centroids
+from src.retrieval.context_expansion import ContextExpander
+from src.retrieval.ngram_index import NgramIndex, get_ngram_index
+from src.retrieval.query_expansion import QueryExpanderBase, get_query_expander
+from src.retrieval.semantic_cache import SemanticRetrievalCache, get_semantic_cache
+from src.retrieval.vector_store import (
+    SearchResult,
+    SearchResultBatch,
+    VectorStoreBase,
+    get_vector_store,
+)
+from src.tracing import count, span, traced
+
+if TYPE_CHECKING:
+    from src.retrieval.reranker import Reranker
 
 logger = logging.getLogger(__name__)
 
@@ -32,107 +59,1025 @@ class RetrieverBase(ABC):
         self, 
         query: str, 
         top_k: int = 5, 
-        metadata_filter: Optional[dict[str, Any]] = None
+        metadata_filter: Optional[dict[str, Any]] = None,
+        *,
+        query_embedding: Optional[Embedding] = None,
     ) -> RetrievalResult:
-        """クエリに関連するドキュメントを検索"""
+        """
+        クエリに関連するドキュメントを検索
+
+        query_embedding: 計算済みのクエリの埋め込み（ルーターなどで算出済みなら再計算しない）
+        """
         pass
 
+    def retrieve_many(
+        self,
+        queries: list[str],
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        *,
+        query_embeddings: Optional[EmbeddingMatrix] = None,
+    ) -> list[RetrievalResult]:
+        """
+        複数クエリを一括検索
+
+        デフォルト実装は retrieve を順に呼び出す。
+        サブクラスは埋め込みと検索をまとめてオーバーライドできる。
+
+        Returns:
+            クエリごとの検索結果（入力と同じ順序）
+        """
+        if query_embeddings is None:
+            return [self.retrieve(query, top_k, metadata_filter) for query in queries]
+        return [
+            self.retrieve(query, top_k, metadata_filter, query_embedding=embedding)
+            for query, embedding in zip(queries, query_embeddings, strict=True)
+        ]
+
+    async def aretrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+    ) -> RetrievalResult:
+        """
+        クエリに関連するドキュメントを検索（非同期版）
+
+        デフォルト実装は retrieve をワーカースレッドで実行する。
+        """
+        return await asyncio.to_thread(self.retrieve, query, top_k, metadata_filter)
+
 
 class SimpleRetriever(RetrieverBase):
     """
     シンプルリトリーバー
+
+    use_rerank=True の場合は top_k × rerank_oversample 件の候補を取得し、
+    Cross-Encoderでリランクしてから適応的に件数を絞り込む。
+    use_mmr=True の場合も同じ件数の候補を埋め込み付きで取得し、MMRで
+    互いに似ていない top_k 件を選ぶ（リランクと併用した場合はリランクのスコアを関連度とする）。
+    context_expander を指定した場合は、残った結果を隣接チャンクで拡張する。
     """
 
+    name = "simple"
+
     def __init__(
         self,
         vector_store: VectorStoreBase | None = None,
         embedder: EmbedderBase | None = None,
+        use_rerank: bool = False,
+        reranker: "Reranker | None" = None,
+        rerank_oversample: int | None = None,
+        semantic_cache: SemanticRetrievalCache | None = None,
+        context_expander: ContextExpander | None = None,
+        use_mmr: bool | None = None,
+        mmr_lambda: float | None = None,
     ):
+        settings = get_settings()
         self.vector_store = vector_store or get_vector_store()
         self.embedder = embedder or get_embedder()
-        logger.info("Initialized SimpleRetriever")
+        if semantic_cache is None and settings.semantic_cache_enabled:
+            semantic_cache = get_semantic_cache()
+        self.semantic_cache = semantic_cache
+        if context_expander is None and settings.context_expansion:
+            context_expander = ContextExpander(self.vector_store, mode=settings.context_expansion)
+        self.context_expander = context_expander
+        self.use_rerank = use_rerank
+        self._reranker = reranker
+        self.rerank_oversample = rerank_oversample or settings.rerank_oversample
+        self.rerank_min_k = settings.rerank_min_k
+        self.rerank_score_threshold = settings.rerank_score_threshold
+        self.rerank_max_gap = settings.rerank_max_gap
+        self.use_mmr = settings.mmr_enabled if use_mmr is None else use_mmr
+        self.mmr_lambda = settings.mmr_lambda if mmr_lambda is None else mmr_lambda
+        logger.info(
+            f"Initialized {type(self).__name__} (rerank={use_rerank}, mmr={self.use_mmr})"
+        )
+
+    @property
+    def reranker(self) -> "Reranker":
+        """リランカー（初回利用時にプロセス共有インスタンスを読み込む）"""
+        if self._reranker is None:
+            from src.retrieval.reranker import get_reranker
 
+            self._reranker = get_reranker()
+        return self._reranker
+
+    def _candidate_count(self, top_k: int) -> int:
+        """ベクトル検索で取得する候補数"""
+        if self.use_rerank or self.use_mmr:
+            return top_k * self.rerank_oversample
+        return top_k
+
+    def _fetch_content_upfront(self) -> bool:
+        """
+        候補の検索時点で本文を取得するか
+
+        リランクには候補全件の本文が必要。それ以外で候補数が返却件数と
+        同じ場合も、2回に分けるより1回で取得した方が速い。MMRだけで絞る場合は
+        埋め込みだけで選べるため、残った結果の本文を後から取得する。
+        """
+        return self.use_rerank or not self.use_mmr
+
+    def _search(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        num_candidates: int,
+        metadata_filter: Optional[dict[str, Any]],
+    ) -> list[SearchResult]:
+        """候補のベクトル検索"""
+        return self.vector_store.search(
+            query_embedding,
+            top_k=num_candidates,
+            metadata_filter=metadata_filter,
+            with_content=self._fetch_content_upfront(),
+            with_vectors=self.use_mmr,
+        )
+
+    def _search_many(
+        self,
+        queries: list[str],
+        query_embeddings: EmbeddingMatrix,
+        num_candidates: int,
+        metadata_filter: Optional[dict[str, Any]],
+    ) -> list[list[SearchResult]]:
+        """複数クエリの候補のベクトル検索（バッチ検索1往復）"""
+        return self.vector_store.search_many(
+            query_embeddings,
+            top_k=num_candidates,
+            metadata_filter=metadata_filter,
+            with_content=self._fetch_content_upfront(),
+            with_vectors=self.use_mmr,
+        )
+
+    async def _asearch(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        num_candidates: int,
+        metadata_filter: Optional[dict[str, Any]],
+    ) -> list[SearchResult]:
+        """候補のベクトル検索（非同期版）"""
+        return await self.vector_store.asearch(
+            query_embedding,
+            top_k=num_candidates,
+            metadata_filter=metadata_filter,
+            with_content=self._fetch_content_upfront(),
+            with_vectors=self.use_mmr,
+        )
+
+    def _select(self, query: str, candidates: list[SearchResult], top_k: int) -> list[SearchResult]:
+        """候補をリランク・多様化して返却件数を決定"""
+        if self.use_rerank:
+            # MMRで選ぶ場合は、適応的な足切りだけ行い件数はMMRで絞る
+            candidates = self.reranker.rerank(
+                query,
+                candidates,
+                top_k=len(candidates) if self.use_mmr else top_k,
+                min_k=self.rerank_min_k,
+                score_threshold=self.rerank_score_threshold,
+                max_gap=self.rerank_max_gap,
+            )
+        if self.use_mmr:
+            with span("mmr"):
+                return maximal_marginal_relevance(candidates, top_k, self.mmr_lambda)
+        return candidates[:top_k]
+
+    def _finalize(self, query: str, candidates: list[SearchResult], top_k: int) -> list[SearchResult]:
+        """返却件数を決定し、残った結果の本文を補完（必要なら隣接チャンクで拡張）"""
+        count("candidates", len(candidates))
+        results = self.vector_store.hydrate(self._select(query, candidates, top_k))
+        if self.context_expander is not None:
+            results = self.context_expander.expand(results)
+        return results
+
+    async def _afinalize(
+        self, query: str, candidates: list[SearchResult], top_k: int
+    ) -> list[SearchResult]:
+        """_finalize の非同期版（リランクはCPU処理のためワーカースレッドで実行）"""
+        count("candidates", len(candidates))
+        if self.use_rerank:
+            selected = await asyncio.to_thread(self._select, query, candidates, top_k)
+        else:
+            selected = self._select(query, candidates, top_k)
+        results = await self.vector_store.ahydrate(selected)
+        if self.context_expander is not None:
+            results = await self.context_expander.aexpand(results)
+        return results
+
+    def _result_metadata(self, top_k: int, metadata_filter: Optional[dict[str, Any]]) -> dict:
+        return {
+            "retriever": self.name,
+            "top_k": top_k,
+            "filter": metadata_filter,
+            "rerank": self.use_rerank,
+            "mmr_lambda": self.mmr_lambda if self.use_mmr else None,
+            "expansion": self.context_expander.mode if self.context_expander else None,
+        }
+
+    def _cache_options(self) -> dict[str, Any]:
+        """
+        検索結果を変える設定（キャッシュキーに含める）
+
+        セマンティックキャッシュはプロセス内のリトリーバーで共有するため、
+        設定の異なるリトリーバー同士が互いの結果を返さないようにする。
+        """
+        options: dict[str, Any] = {"rerank": self.use_rerank, "mmr": self.use_mmr}
+        if self.use_rerank:
+            options["reranker"] = (
+                self._reranker.model_name
+                if self._reranker is not None
+                else get_settings().reranker_model
+            )
+            options["rerank_cutoff"] = [
+                self.rerank_min_k,
+                self.rerank_score_threshold,
+                self.rerank_max_gap,
+            ]
+        if self.use_rerank or self.use_mmr:
+            options["oversample"] = self.rerank_oversample
+        if self.use_mmr:
+            options["mmr_lambda"] = self.mmr_lambda
+        if self.context_expander is not None:
+            options["expansion"] = [self.context_expander.mode, self.context_expander.window]
+        return options
+
+    def _cache_key(self, top_k: int, metadata_filter: Optional[dict[str, Any]]) -> str:
+        store_name = getattr(self.vector_store, "collection_name", id(self.vector_store))
+        options = json.dumps(self._cache_options(), sort_keys=True, default=str)
+        namespace = f"{self.name}:{store_name}:{options}"
+        return SemanticRetrievalCache.make_key(namespace, metadata_filter, top_k)
+
+    def _cache_lookup(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        top_k: int,
+        metadata_filter: Optional[dict[str, Any]],
+    ) -> RetrievalResult | None:
+        """類似クエリのキャッシュ済み結果を取得"""
+        if self.semantic_cache is None:
+            return None
+
+        cached = self.semantic_cache.lookup(
+            query_embedding, self._cache_key(top_k, metadata_filter), self.vector_store.revision
+        )
+        if cached is None:
+            count("semantic_cache_misses")
+            return None
+
+        count("semantic_cache_hits")
+
+        return replace(
+            cached,
+            query=query,
+            metadata={**cached.metadata, "cache_hit": True, "cached_query": cached.query},
+        )
+
+    def _cache_store(
+        self,
+        query_embedding: Embedding,
+        top_k: int,
+        metadata_filter: Optional[dict[str, Any]],
+        result: RetrievalResult,
+        started_at: float,
+    ) -> None:
+        """検索結果と検索にかかった時間をキャッシュに保存"""
+        if self.semantic_cache is None:
+            return
+
+        self.semantic_cache.put(
+            query_embedding,
+            self._cache_key(top_k, metadata_filter),
+            self.vector_store.revision,
+            result,
+            cost_ms=(time.perf_counter() - started_at) * 1000,
+        )
+
+    @traced("retrieve")
     def retrieve(
         self, 
         query: str, 
         top_k: int = 5,
-        metadata_filter: Optional[dict[str, Any]] = None
+        metadata_filter: Optional[dict[str, Any]] = None,
+        *,
+        query_embedding: Optional[Embedding] = None,
     ) -> RetrievalResult:
         """クエリに関連するドキュメントを検索"""
-        query_embedding = self.embedder.embed_text(query)
-        results = self.vector_store.search(
-            query_embedding, 
-            top_k=top_k, 
-            metadata_filter=metadata_filter
+        if query_embedding is None:
+            query_embedding = self.embedder.embed_text(query)
+        cached = self._cache_lookup(query, query_embedding, top_k, metadata_filter)
+        if cached is not None:
+            return cached
+
+        started_at = time.perf_counter()
+        candidates = self._search(
+            query, query_embedding, self._candidate_count(top_k), metadata_filter
+        )
+        results = self._finalize(query, candidates, top_k)
+
+        result = RetrievalResult(
+            query=query,
+            results=results,
+            metadata={
+                **self._result_metadata(top_k, metadata_filter),
+                "candidates": len(candidates),
+            },
+        )
+        self._cache_store(query_embedding, top_k, metadata_filter, result, started_at)
+        return result
+
+    @traced("retrieve")
+    def retrieve_many(
+        self,
+        queries: list[str],
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        *,
+        query_embeddings: Optional[EmbeddingMatrix] = None,
+    ) -> list[RetrievalResult]:
+        """複数クエリを一括検索（埋め込み1回 + バッチ検索1往復、キャッシュ済みは除外）"""
+        if not queries:
+            return []
+
+        if query_embeddings is None:
+            query_embeddings = self.embedder.embed_texts(queries)
+        query_embeddings = as_embedding_matrix(query_embeddings)
+        results: list[RetrievalResult | None] = [
+            self._cache_lookup(query, embedding, top_k, metadata_filter)
+            for query, embedding in zip(queries, query_embeddings, strict=True)
+        ]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+
+        started_at = time.perf_counter()
+        batch_candidates = self._search_many(
+            [queries[i] for i in missing],
+            query_embeddings[missing],
+            self._candidate_count(top_k),
+            metadata_filter,
+        )
+
+        for i, candidates in zip(missing, batch_candidates, strict=True):
+            results[i] = RetrievalResult(
+                query=queries[i],
+                results=self._finalize(queries[i], candidates, top_k),
+                metadata={
+                    **self._result_metadata(top_k, metadata_filter),
+                    "candidates": len(candidates),
+                    "batched": True,
+                },
+            )
+            self._cache_store(query_embeddings[i], top_k, metadata_filter, results[i], started_at)
+
+        return results
+
+    @traced("retrieve")
+    async def aretrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+    ) -> RetrievalResult:
+        """クエリに関連するドキュメントを検索（非同期埋め込み + 非同期ベクトル検索）"""
+        query_embedding = await self.embedder.aembed_text(query)
+        cached = self._cache_lookup(query, query_embedding, top_k, metadata_filter)
+        if cached is not None:
+            return cached
+
+        started_at = time.perf_counter()
+        candidates = await self._asearch(
+            query, query_embedding, self._candidate_count(top_k), metadata_filter
         )
+        results = await self._afinalize(query, candidates, top_k)
 
-        return RetrievalResult(
+        result = RetrievalResult(
             query=query,
             results=results,
-            metadata={"retriever": "simple", "top_k": top_k, "filter": metadata_filter},
+            metadata={
+                **self._result_metadata(top_k, metadata_filter),
+                "candidates": len(candidates),
+            },
         )
+        self._cache_store(query_embedding, top_k, metadata_filter, result, started_at)
+        return result
 
 
-class HybridRetriever(RetrieverBase):
+class HybridRetriever(SimpleRetriever):
     """
-    ハイブリッドリトリーバー (Vector + BM25)
+    ハイブリッドリトリーバー (Vector + 語彙のスパースベクトル)
+
+    ベクトルストアがスパースベクトルを持つ場合（sparse_vectors_enabled）は、
+    密ベクトルと検索語の両方で候補を取り出し、alpha で重み付けしたRRFで
+    統合する処理をストア側（Qdrant内）で1回のクエリとして行う。
+    スパースベクトルがない場合は密ベクトル検索のみ。
+    ngram_index を指定した場合（ngram_index_enabled）は、クエリ中の数値・型番などを
+    文字列として含むチャンクを候補に加え、RRFで統合する。
+    リランクの有無は設定の use_rerank に従う。
     """
 
+    name = "hybrid"
+
     def __init__(
         self,
         vector_store: VectorStoreBase | None = None,
         embedder: EmbedderBase | None = None,
         alpha: float = 0.5,
+        rrf_k: int | None = None,
+        use_rerank: bool | None = None,
+        reranker: "Reranker | None" = None,
+        rerank_oversample: int | None = None,
+        semantic_cache: SemanticRetrievalCache | None = None,
+        context_expander: ContextExpander | None = None,
+        ngram_index: NgramIndex | None = None,
+        use_mmr: bool | None = None,
+        mmr_lambda: float | None = None,
     ):
-        self.vector_store = vector_store or get_vector_store()
-        self.embedder = embedder or get_embedder()
+        settings = get_settings()
         self.alpha = alpha
-        logger.info(f"Initialized HybridRetriever with alpha={alpha}")
+        self.rrf_k = rrf_k or settings.rrf_k
+        if ngram_index is None and settings.ngram_index_enabled:
+            ngram_index = get_ngram_index()
+        self.ngram_index = ngram_index
+        super().__init__(
+            vector_store=vector_store,
+            embedder=embedder,
+            use_rerank=settings.use_rerank if use_rerank is None else use_rerank,
+            reranker=reranker,
+            rerank_oversample=rerank_oversample,
+            semantic_cache=semantic_cache,
+            context_expander=context_expander,
+            use_mmr=use_mmr,
+            mmr_lambda=mmr_lambda,
+        )
+        logger.info(
+            f"HybridRetriever alpha={alpha} (sparse={self.vector_store.supports_hybrid})"
+        )
 
-    def retrieve(
-        self, 
-        query: str, 
-        top_k: int = 5,
-        metadata_filter: Optional[dict[str, Any]] = None
-    ) -> RetrievalResult:
-        """ハイブリッド検索"""
-        # 現在はベクトル検索のみ（将来的にBM25も統合予定）
-        query_embedding = self.embedder.embed_text(query)
-        vector_results = self.vector_store.search(
-            query_embedding, 
-            top_k=top_k, 
-            metadata_filter=metadata_filter
+    def _exact_match_ids(self, query: str, num_candidates: int) -> list[str]:
+        """n-gramインデックスでクエリの検索語を含むチャンクのID（インデックスがなければ空）"""
+        if self.ngram_index is None:
+            return []
+        with span("ngram_search"):
+            chunk_ids = [chunk_id for chunk_id, _ in self.ngram_index.search(query, num_candidates)]
+        count("ngram_candidates", len(chunk_ids))
+        return chunk_ids
+
+    def _exact_matches(
+        self, query: str, num_candidates: int, metadata_filter: Optional[dict[str, Any]]
+    ) -> list[SearchResult]:
+        """クエリの検索語を文字列として含むチャンク"""
+        chunk_ids = self._exact_match_ids(query, num_candidates)
+        if not chunk_ids:
+            return []
+        return self.vector_store.fetch(
+            chunk_ids,
+            metadata_filter,
+            with_content=self._fetch_content_upfront(),
+            with_vectors=self.use_mmr,
         )
 
-        return RetrievalResult(
-            query=query,
-            results=vector_results,
-            metadata={"retriever": "hybrid", "top_k": top_k, "alpha": self.alpha, "filter": metadata_filter},
+    async def _aexact_matches(
+        self, query: str, num_candidates: int, metadata_filter: Optional[dict[str, Any]]
+    ) -> list[SearchResult]:
+        """_exact_matches の非同期版"""
+        chunk_ids = self._exact_match_ids(query, num_candidates)
+        if not chunk_ids:
+            return []
+        return await self.vector_store.afetch(
+            chunk_ids,
+            metadata_filter,
+            with_content=self._fetch_content_upfront(),
+            with_vectors=self.use_mmr,
         )
 
+    def _fuse_exact_matches(
+        self, results: list[SearchResult], matches: list[SearchResult], num_candidates: int
+    ) -> list[SearchResult]:
+        """文字列一致の候補をRRFで統合（一致がなければ検索結果のまま）"""
+        if not matches:
+            return results
+        return reciprocal_rank_fusion([results, matches], k=self.rrf_k)[:num_candidates]
 
-class MultiQueryRetriever(RetrieverBase):
+    def _search(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        num_candidates: int,
+        metadata_filter: Optional[dict[str, Any]],
+    ) -> list[SearchResult]:
+        results = self.vector_store.hybrid_search(
+            query,
+            query_embedding,
+            top_k=num_candidates,
+            metadata_filter=metadata_filter,
+            with_content=self._fetch_content_upfront(),
+            with_vectors=self.use_mmr,
+            alpha=self.alpha,
+            rrf_k=self.rrf_k,
+        )
+        matches = self._exact_matches(query, num_candidates, metadata_filter)
+        return self._fuse_exact_matches(results, matches, num_candidates)
+
+    def _search_many(
+        self,
+        queries: list[str],
+        query_embeddings: EmbeddingMatrix,
+        num_candidates: int,
+        metadata_filter: Optional[dict[str, Any]],
+    ) -> list[list[SearchResult]]:
+        batch_results = self.vector_store.hybrid_search_many(
+            queries,
+            query_embeddings,
+            top_k=num_candidates,
+            metadata_filter=metadata_filter,
+            with_content=self._fetch_content_upfront(),
+            with_vectors=self.use_mmr,
+            alpha=self.alpha,
+            rrf_k=self.rrf_k,
+        )
+        return [
+            self._fuse_exact_matches(
+                results, self._exact_matches(query, num_candidates, metadata_filter), num_candidates
+            )
+            for query, results in zip(queries, batch_results, strict=True)
+        ]
+
+    async def _asearch(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        num_candidates: int,
+        metadata_filter: Optional[dict[str, Any]],
+    ) -> list[SearchResult]:
+        results = await self.vector_store.ahybrid_search(
+            query,
+            query_embedding,
+            top_k=num_candidates,
+            metadata_filter=metadata_filter,
+            with_content=self._fetch_content_upfront(),
+            with_vectors=self.use_mmr,
+            alpha=self.alpha,
+            rrf_k=self.rrf_k,
+        )
+        matches = await self._aexact_matches(query, num_candidates, metadata_filter)
+        return self._fuse_exact_matches(results, matches, num_candidates)
+
+    def _result_metadata(self, top_k: int, metadata_filter: Optional[dict[str, Any]]) -> dict:
+        return {
+            **super()._result_metadata(top_k, metadata_filter),
+            "alpha": self.alpha,
+            "fusion": "rrf" if self.vector_store.supports_hybrid else None,
+            "ngram_index": self.ngram_index is not None,
+        }
+
+    def _cache_options(self) -> dict[str, Any]:
+        return {
+            **super()._cache_options(),
+            "alpha": self.alpha,
+            "rrf_k": self.rrf_k,
+            "ngram_index": self.ngram_index.path if self.ngram_index is not None else None,
+        }
+
+
+class MultiQueryRetriever(SimpleRetriever):
     """
     マルチクエリリトリーバー
+
+    質問の言い換えを生成し、全クエリを1回の埋め込み呼び出しと
+    1回のバッチ検索で取得した後、RRFで統合してchunk_idで重複排除する。
     """
 
+    name = "multi_query"
+
     def __init__(
         self,
         vector_store: VectorStoreBase | None = None,
         embedder: EmbedderBase | None = None,
+        expander: QueryExpanderBase | None = None,
+        num_queries: int | None = None,
+        rrf_k: int | None = None,
+        use_rerank: bool = False,
+        reranker: "Reranker | None" = None,
+        rerank_oversample: int | None = None,
+        semantic_cache: SemanticRetrievalCache | None = None,
+        context_expander: ContextExpander | None = None,
+        use_mmr: bool | None = None,
+        mmr_lambda: float | None = None,
     ):
-        self.vector_store = vector_store or get_vector_store()
-        self.embedder = embedder or get_embedder()
+        settings = get_settings()
+        super().__init__(
+            vector_store=vector_store,
+            embedder=embedder,
+            use_rerank=use_rerank,
+            reranker=reranker,
+            rerank_oversample=rerank_oversample,
+            semantic_cache=semantic_cache,
+            context_expander=context_expander,
+            use_mmr=use_mmr,
+            mmr_lambda=mmr_lambda,
+        )
+        self.expander = expander or get_query_expander(settings.multi_query_expander)
+        self.num_queries = num_queries or settings.multi_query_count
+        self.rrf_k = rrf_k or settings.rrf_k
+
+    def _fetch_content_upfront(self) -> bool:
+        # 統合後に残るのは候補の一部なので、リランクしない場合は本文を後から取得
+        return self.use_rerank
 
+    def _cache_options(self) -> dict[str, Any]:
+        return {
+            **super()._cache_options(),
+            "expander": type(self.expander).__name__,
+            "num_queries": self.num_queries,
+            "rrf_k": self.rrf_k,
+        }
+
+    @traced("retrieve")
     def retrieve(
         self, 
         query: str, 
         top_k: int = 5,
-        metadata_filter: Optional[dict[str, Any]] = None
+        metadata_filter: Optional[dict[str, Any]] = None,
+        *,
+        query_embedding: Optional[Embedding] = None,
+    ) -> RetrievalResult:
+        """言い換えクエリで並列検索してRRFで統合"""
+        return self.retrieve_many(
+            [query],
+            top_k,
+            metadata_filter,
+            query_embeddings=None if query_embedding is None else [query_embedding],
+        )[0]
+
+    def _embed_variants(
+        self, expanded: list[list[str]], query_embeddings: Optional[EmbeddingMatrix]
+    ) -> np.ndarray:
+        """全クエリの言い換えを1回で埋め込む（元の質問の埋め込みが渡されていれば再計算しない）"""
+        if query_embeddings is None:
+            return as_embedding_matrix(
+                self.embedder.embed_texts([q for variants in expanded for q in variants])
+            )
+
+        paraphrases = [q for variants in expanded for q in variants[1:]]
+        paraphrase_embeddings = (
+            as_embedding_matrix(self.embedder.embed_texts(paraphrases)) if paraphrases else None
+        )
+        rows, position = [], 0
+        for variants, embedding in zip(expanded, query_embeddings, strict=True):
+            rows.append(as_embedding(embedding)[None])
+            if len(variants) > 1:
+                rows.append(paraphrase_embeddings[position : position + len(variants) - 1])
+                position += len(variants) - 1
+        return np.concatenate(rows)
+
+    @traced("retrieve")
+    def retrieve_many(
+        self,
+        queries: list[str],
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        *,
+        query_embeddings: Optional[EmbeddingMatrix] = None,
+    ) -> list[RetrievalResult]:
+        """全クエリの言い換えをまとめて埋め込み・バッチ検索し、クエリごとに統合"""
+        if not queries:
+            return []
+
+        # キャッシュを使う場合は、言い換えの生成・埋め込みの前に元の質問の埋め込みで引く
+        results: list[RetrievalResult | None] = [None] * len(queries)
+        if self.semantic_cache is not None:
+            if query_embeddings is None:
+                query_embeddings = as_embedding_matrix(self.embedder.embed_texts(queries))
+            results = [
+                self._cache_lookup(query, embedding, top_k, metadata_filter)
+                for query, embedding in zip(queries, query_embeddings, strict=True)
+            ]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+
+        started_at = time.perf_counter()
+        expanded = [self.expander.expand(queries[i], self.num_queries) for i in missing]
+        search_embeddings = self._embed_variants(
+            expanded,
+            None if query_embeddings is None else [query_embeddings[i] for i in missing],
+        )
+        # 候補は列形式で受け取り、統合後に残ったものだけ SearchResult にする
+        batch = self.vector_store.search_batch(
+            search_embeddings,
+            top_k=self._candidate_count(top_k),
+            metadata_filter=metadata_filter,
+            with_content=self._fetch_content_upfront(),
+            with_vectors=self.use_mmr,
+        )
+
+        # 各クエリの先頭は元の質問なので、その埋め込みでキャッシュに保存する
+        position = 0
+        for i, variants in zip(missing, expanded, strict=True):
+            fused = reciprocal_rank_fusion_batch(
+                batch, range(position, position + len(variants)), k=self.rrf_k
+            )
+
+            results[i] = RetrievalResult(
+                query=queries[i],
+                results=self._finalize(queries[i], fused, top_k),
+                metadata={
+                    **self._result_metadata(top_k, metadata_filter),
+                    "queries": variants,
+                    "candidates": len(fused),
+                },
+            )
+            self._cache_store(
+                search_embeddings[position], top_k, metadata_filter, results[i], started_at
+            )
+            position += len(variants)
+
+        return results
+
+    @traced("retrieve")
+    async def aretrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
     ) -> RetrievalResult:
-        # 簡易実装としてSimpleRetrieverに委譲
-        retriever = SimpleRetriever(self.vector_store, self.embedder)
-        return retriever.retrieve(query, top_k, metadata_filter)
+        """言い換えクエリで並列検索してRRFで統合（非同期版）"""
+        # キャッシュを使う場合は、言い換えの生成・埋め込みの前に元の質問の埋め込みで引く
+        query_embedding = None
+        if self.semantic_cache is not None:
+            query_embedding = await self.embedder.aembed_text(query)
+            cached = self._cache_lookup(query, query_embedding, top_k, metadata_filter)
+            if cached is not None:
+                return cached
+
+        started_at = time.perf_counter()
+        # LLMによる言い換えはブロッキング呼び出しなのでワーカースレッドで実行
+        variants = await asyncio.to_thread(self.expander.expand, query, self.num_queries)
+        if query_embedding is None:
+            query_embeddings = await self.embedder.aembed_texts(variants)
+        else:
+            rows = [as_embedding(query_embedding)[None]]
+            if len(variants) > 1:
+                rows.append(as_embedding_matrix(await self.embedder.aembed_texts(variants[1:])))
+            query_embeddings = np.concatenate(rows)
+        result_lists = await self.vector_store.asearch_many(
+            query_embeddings,
+            top_k=self._candidate_count(top_k),
+            metadata_filter=metadata_filter,
+            with_content=self._fetch_content_upfront(),
+            with_vectors=self.use_mmr,
+        )
+
+        fused = reciprocal_rank_fusion(result_lists, k=self.rrf_k)
+        result = RetrievalResult(
+            query=query,
+            results=await self._afinalize(query, fused, top_k),
+            metadata={
+                **self._result_metadata(top_k, metadata_filter),
+                "queries": variants,
+                "candidates": len(fused),
+            },
+        )
+        self._cache_store(query_embeddings[0], top_k, metadata_filter, result, started_at)
+        return result
+
+
+class HierarchicalRetriever(SimpleRetriever):
+    """
+    階層型リトリーバー（ドキュメント → チャンク）
+
+    クエリ埋め込みとドキュメント重心（チャンク埋め込みの平均）の類似度で
+    上位 top_documents 件のドキュメントを選び、source_file フィルタで
+    そのドキュメント内のチャンクだけを検索する。
+    ドキュメント内の候補が足りない場合（他のフィルタと組み合わせた場合など）は
+    全体の検索に切り替える。
+    """
+
+    name = "hierarchical"
+
+    def __init__(
+        self,
+        vector_store: VectorStoreBase | None = None,
+        embedder: EmbedderBase | None = None,
+        document_centroids: DocumentCentroids | None = None,
+        top_documents: int | None = None,
+        use_rerank: bool | None = None,
+        reranker: "Reranker | None" = None,
+        rerank_oversample: int | None = None,
+        semantic_cache: SemanticRetrievalCache | None = None,
+        context_expander: ContextExpander | None = None,
+        use_mmr: bool | None = None,
+        mmr_lambda: float | None = None,
+    ):
+        settings = get_settings()
+        super().__init__(
+            vector_store=vector_store,
+            embedder=embedder,
+            use_rerank=settings.use_rerank if use_rerank is None else use_rerank,
+            reranker=reranker,
+            rerank_oversample=rerank_oversample,
+            semantic_cache=semantic_cache,
+            context_expander=context_expander,
+            use_mmr=use_mmr,
+            mmr_lambda=mmr_lambda,
+        )
+        self.document_centroids = document_centroids or get_document_centroids()
+        self.top_documents = top_documents or settings.hierarchical_top_documents
+
+    def _document_filter(
+        self, query_embedding: Embedding, metadata_filter: Optional[dict[str, Any]]
+    ) -> Optional[dict[str, Any]]:
+        """上位ドキュメントに絞り込むフィルタ（絞り込めない場合は None）"""
+        if len(self.document_centroids) <= self.top_documents:
+            return None
+        if metadata_filter and "source_file" in metadata_filter:
+            return None
+
+        documents = self.document_centroids.nearest(query_embedding, self.top_documents)
+        count("documents_selected", len(documents))
+        return {**(metadata_filter or {}), "source_file": documents}
+
+    def _search(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        num_candidates: int,
+        metadata_filter: Optional[dict[str, Any]],
+    ) -> list[SearchResult]:
+        document_filter = self._document_filter(query_embedding, metadata_filter)
+        if document_filter is not None:
+            candidates = super()._search(query, query_embedding, num_candidates, document_filter)
+            if len(candidates) >= num_candidates:
+                return candidates
+            count("document_fallbacks")
+        return super()._search(query, query_embedding, num_candidates, metadata_filter)
+
+    def _search_many(
+        self,
+        queries: list[str],
+        query_embeddings: EmbeddingMatrix,
+        num_candidates: int,
+        metadata_filter: Optional[dict[str, Any]],
+    ) -> list[list[SearchResult]]:
+        # クエリごとにドキュメントのフィルタが異なるため、1件ずつ検索する
+        return [
+            self._search(query, embedding, num_candidates, metadata_filter)
+            for query, embedding in zip(queries, query_embeddings, strict=True)
+        ]
+
+    async def _asearch(
+        self,
+        query: str,
+        query_embedding: Embedding,
+        num_candidates: int,
+        metadata_filter: Optional[dict[str, Any]],
+    ) -> list[SearchResult]:
+        document_filter = self._document_filter(query_embedding, metadata_filter)
+        if document_filter is not None:
+            candidates = await super()._asearch(
+                query, query_embedding, num_candidates, document_filter
+            )
+            if len(candidates) >= num_candidates:
+                return candidates
+            count("document_fallbacks")
+        return await super()._asearch(query, query_embedding, num_candidates, metadata_filter)
+
+    def _result_metadata(self, top_k: int, metadata_filter: Optional[dict[str, Any]]) -> dict:
+        return {
+            **super()._result_metadata(top_k, metadata_filter),
+            "top_documents": self.top_documents,
+        }
+
+    def _cache_options(self) -> dict[str, Any]:
+        return {**super()._cache_options(), "top_documents": self.top_documents}
+
+
+def reciprocal_rank_fusion(
+    result_lists: list[list[SearchResult]], k: int = 60
+) -> list[SearchResult]:
+    """
+    複数の検索結果をRRF (Reciprocal Rank Fusion) で統合
+
+    同じchunk_idは1件にまとめ、scoreをRRFスコアに置き換える。
+    元のスコアの最大値は metadata["vector_score"] に保持する。
+
+    Returns:
+        RRFスコア降順の検索結果
+    """
+    fused_scores: dict[str, float] = {}
+    best: dict[str, SearchResult] = {}
+
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            fused_scores[result.chunk_id] = fused_scores.get(result.chunk_id, 0.0) + 1.0 / (
+                k + rank
+            )
+            if result.chunk_id not in best or result.score > best[result.chunk_id].score:
+                best[result.chunk_id] = result
+
+    ranked_ids = sorted(fused_scores, key=fused_scores.__getitem__, reverse=True)
+    return [
+        replace(
+            best[chunk_id],
+            score=fused_scores[chunk_id],
+            metadata={**best[chunk_id].metadata, "vector_score": best[chunk_id].score},
+        )
+        for chunk_id in ranked_ids
+    ]
+
+
+def reciprocal_rank_fusion_batch(
+    batch: SearchResultBatch, queries: range, k: int = 60
+) -> list[SearchResult]:
+    """
+    列形式の検索結果のうち queries の範囲のクエリの結果をRRFで統合
+
+    reciprocal_rank_fusion と同じ結果（同点は先に出現した順）を、chunk_idの
+    重複排除とスコアの加算を配列演算で行って求める。SearchResult は統合後の候補だけ作る。
+    """
+    start, end = int(batch.offsets[queries.start]), int(batch.offsets[queries.stop])
+    if start == end:
+        return []
+
+    positions = np.arange(start, end)
+    counts = np.diff(batch.offsets[queries.start : queries.stop + 1])
+    ranks = positions - np.repeat(batch.offsets[queries.start : queries.stop], counts) + 1
+    _, first, inverse = np.unique(
+        batch.chunk_ids[start:end], return_index=True, return_inverse=True
+    )
+    fused_scores = np.bincount(inverse, weights=1.0 / (k + ranks))
+
+    # chunk_idごとに元のスコアが最大のヒット（同点は先の位置）
+    scores = batch.scores[start:end]
+    order = np.lexsort((positions, -scores))
+    _, best_in_order = np.unique(inverse[order], return_index=True)
+    best = positions[order[best_in_order]]
+
+    ranked = np.lexsort((first, -fused_scores))
+    return [
+        replace(
+            batch.result(int(best[j])),
+            score=float(fused_scores[j]),
+            metadata={**batch.metadata[best[j]], "vector_score": float(batch.scores[best[j]])},
+        )
+        for j in ranked
+    ]
+
+
+def mmr_indices(
+    relevance: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float = 0.7
+) -> list[int]:
+    """
+    MMR (Maximal Marginal Relevance) で選ぶ候補の位置
+
+    各ステップで lambda * 関連度 - (1 - lambda) * 選択済みとの最大コサイン類似度 が
+    最大の候補を選ぶ。類似度行列は1回の行列積で求め、選択済みとの最大類似度は
+    選ぶたびに1行分だけ更新する。関連度は [0, 1] に正規化して類似度と尺度を揃える。
+    """
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.maximum(norms, 1e-12)
+    similarity = unit @ unit.T
+
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones(n)
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(n, dtype=bool)
+    available[selected[0]] = False
+    for _ in range(k - 1):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
+
+
+def maximal_marginal_relevance(
+    results: list[SearchResult], top_k: int, lambda_mult: float = 0.7
+) -> list[SearchResult]:
+    """
+    検索結果からMMRで多様な top_k 件を選ぶ
+
+    関連度には各結果の score を、類似度には vector（with_vectors=True で取得した埋め込み）を使う。
+    埋め込みのない結果が含まれる場合は先頭から top_k 件を返す。
+    選んだ結果の vector は以降の処理・キャッシュに不要なため外す。
+    """
+    if len(results) > top_k and all(r.vector is not None for r in results):
+        vectors = np.asarray([r.vector for r in results], dtype=np.float32)
+        relevance = np.asarray([r.score for r in results], dtype=np.float32)
+        results = [results[i] for i in mmr_indices(relevance, vectors, top_k, lambda_mult)]
+    return [r if r.vector is None else replace(r, vector=None) for r in results[:top_k]]
 
 
 def get_retriever(
@@ -146,6 +1091,7 @@ def get_retriever(
         "simple": SimpleRetriever,
         "hybrid": HybridRetriever,
         "multi_query": MultiQueryRetriever,
+        "hierarchical": HierarchicalRetriever,
     }
 
     if retriever_type not in retrievers:
@@ -0,0 +1,149 @@
+"""
+セマンティック検索キャッシュモジュール
+
+言い回しだけが異なる質問に対して、埋め込みのコサイン類似度で
+過去の検索結果を再利用する（ベクトル検索・リランクを省略）
+"""
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Hashable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional
+
+import numpy as np
+
+from src.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _CacheEntry:
+    key: str
+    revision: Hashable
+    result: Any  # RetrievalResult
+    cost_ms: float
+    created_at: float
+
+
+class SemanticRetrievalCache:
+    """
+    クエリ埋め込みの類似度で引く検索結果キャッシュ（スレッドセーフ）
+
+    直近のクエリ埋め込みを正規化して小さな行列に保持し、1回の行列積で
+    全エントリとの類似度を計算する。一致条件:
+    - キー（ストア・リトリーバー・フィルタ・top_k）が同じ
+    - コレクションのリビジョンが同じ（取り込み・削除後は無効）
+    - TTL以内、かつ類似度がしきい値以上
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        threshold: float = 0.97,
+        ttl_seconds: float = 3600.0,
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+
+        self._matrix: np.ndarray | None = None
+        self._entries: list[_CacheEntry | None] = [None] * max_entries
+        self._next_slot = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+
+    @staticmethod
+    def make_key(
+        namespace: str, metadata_filter: Optional[dict[str, Any]], top_k: int
+    ) -> str:
+        """キャッシュキー（フィルタは順序に依存しないよう正規化）"""
+        filter_key = json.dumps(metadata_filter or {}, sort_keys=True, default=str)
+        return f"{namespace}|{filter_key}|{top_k}"
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def lookup(self, embedding, key: str, revision: Hashable) -> Any | None:
+        """類似クエリのキャッシュ済み結果を取得（なければNone）"""
+        query = self._normalize(embedding)
+        now = time.time()
+
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            similarities = self._matrix @ query
+            for slot in np.argsort(similarities)[::-1]:
+                if similarities[slot] < self.threshold:
+                    break
+                entry = self._entries[slot]
+                if (
+                    entry is not None
+                    and entry.key == key
+                    and entry.revision == revision
+                    and now - entry.created_at <= self.ttl_seconds
+                ):
+                    self.hits += 1
+                    self.saved_ms += entry.cost_ms
+                    return entry.result
+
+            self.misses += 1
+            return None
+
+    def put(self, embedding, key: str, revision: Hashable, result: Any, cost_ms: float) -> None:
+        """検索結果を保存（満杯の場合は最も古いエントリを上書き）"""
+        vector = self._normalize(embedding)
+
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vector.shape[0]:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+                self._entries = [None] * self.max_entries
+                self._next_slot = 0
+
+            slot = self._next_slot
+            self._matrix[slot] = vector
+            self._entries[slot] = _CacheEntry(
+                key=key, revision=revision, result=result, cost_ms=cost_ms, created_at=time.time()
+            )
+            self._next_slot = (slot + 1) % self.max_entries
+
+    def clear(self) -> None:
+        """全エントリを破棄"""
+        with self._lock:
+            self._matrix = None
+            self._entries = [None] * self.max_entries
+            self._next_slot = 0
+
+    def stats(self) -> dict:
+        """ヒット率と節約できた検索時間"""
+        total = self.hits + self.misses
+        return {
+            "entries": sum(1 for e in self._entries if e is not None),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "saved_latency_ms": self.saved_ms,
+        }
+
+
+@lru_cache
+def get_semantic_cache() -> SemanticRetrievalCache:
+    """プロセス共有のセマンティックキャッシュを取得"""
+    settings = get_settings()
+    return SemanticRetrievalCache(
+        max_entries=settings.semantic_cache_size,
+        threshold=settings.semantic_cache_threshold,
+        ttl_seconds=settings.semantic_cache_ttl,
+    )
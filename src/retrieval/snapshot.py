@@ -0,0 +1,290 @@
+"""
+インデックスのスナップショットモジュール
+
+ベクトルストアの全チャンク（埋め込み・ペイロード・スパースベクトル）と、
+検索で使う補助インデックス（n-gram・チャンク隣接・重心）を1つのディレクトリに書き出し、
+取り込みをやり直さずにQdrant・ローカルストアへ読み込む。
+
+ディレクトリ構成:
+    manifest.json          バージョン・件数・次元・各ファイルのサイズとSHA-256（最後に書く）
+    vectors.f32            (件数, 次元) の float32 をそのまま並べた埋め込み
+    payloads.jsonl         1行1チャンクのペイロード（本文ストア利用時も本文を含む）
+    sparse_offsets.npy     スパースベクトルの各チャンクの開始位置（CSR、ある場合のみ。ないチャンクは空の行）
+    sparse_indices.u32     スパースベクトルの語彙ID（uint32）
+    sparse_values.f32      スパースベクトルの重み（float32）
+    chunk_adjacency.json など  補助インデックス（取り込み時の保存先と同じ名前）
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src.config import get_settings
+from src.retrieval.vector_store import VectorStoreBase, chunk_from_payload, chunk_payload
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.f32"
+PAYLOADS_FILE = "payloads.jsonl"
+SPARSE_OFFSETS_FILE = "sparse_offsets.npy"
+SPARSE_INDICES_FILE = "sparse_indices.u32"
+SPARSE_VALUES_FILE = "sparse_values.f32"
+
+_HASH_BLOCK = 1 << 20
+
+
+def auxiliary_paths() -> dict[str, Path]:
+    """スナップショットに含める補助インデックス（スナップショット内の名前 → 保存先）"""
+    settings = get_settings()
+    return {
+        path.name: path
+        for path in (
+            settings.adjacency_index_file,
+            settings.category_centroids_file,
+            settings.document_centroids_file,
+            settings.ngram_index_dir,
+        )
+    }
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_entries(root: Path) -> dict[str, dict[str, Any]]:
+    """マニフェスト以外の全ファイルのサイズとSHA-256"""
+    return {
+        path.relative_to(root).as_posix(): {"bytes": path.stat().st_size, "sha256": _sha256(path)}
+        for path in sorted(root.rglob("*"))
+        if path.is_file() and path.name != MANIFEST_FILE
+    }
+
+
+def _copy(source: Path, target: Path) -> None:
+    """ファイル・ディレクトリを置き換えてコピー"""
+    if target.is_dir():
+        shutil.rmtree(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if source.is_dir():
+        shutil.copytree(source, target)
+    else:
+        shutil.copy2(source, target)
+
+
+def export_snapshot(
+    vector_store: VectorStoreBase,
+    path: Path,
+    batch_size: int = 1000,
+    include_auxiliary: bool = True,
+) -> dict[str, Any]:
+    """
+    ベクトルストアの内容をスナップショットとして書き出す
+
+    チャンクは iter_chunks で batch_size 件ずつ取り出し、そのままファイルに追記する
+    （全件をメモリに載せない）。manifest.json は全ファイルを書き終えてから作成する。
+
+    Returns:
+        マニフェスト
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    (path / MANIFEST_FILE).unlink(missing_ok=True)
+
+    count = 0
+    dimension = getattr(vector_store, "embedding_dimension", 0)
+    # スパースベクトルのないバッチ（シャードごとに構成が異なる場合など）のチャンクも
+    # 空の行として並べ、オフセットの位置をチャンクの順序と揃える
+    sparse_offsets = [0]
+    has_sparse = False
+    with (
+        open(path / VECTORS_FILE, "wb") as vectors_file,
+        open(path / PAYLOADS_FILE, "w", encoding="utf-8") as payloads_file,
+        open(path / SPARSE_INDICES_FILE, "wb") as indices_file,
+        open(path / SPARSE_VALUES_FILE, "wb") as values_file,
+    ):
+        for chunks, embeddings, sparse_vectors in vector_store.iter_chunks(batch_size):
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+            dimension = embeddings.shape[1]
+            vectors_file.write(embeddings.tobytes())
+            for chunk in chunks:
+                payloads_file.write(json.dumps(chunk_payload(chunk), ensure_ascii=False) + "\n")
+
+            if sparse_vectors is None:
+                sparse_offsets.extend([sparse_offsets[-1]] * len(chunks))
+            else:
+                has_sparse = True
+                for vector in sparse_vectors:
+                    indices_file.write(np.fromiter(vector, np.uint32, len(vector)).tobytes())
+                    values_file.write(
+                        np.fromiter(vector.values(), np.float32, len(vector)).tobytes()
+                    )
+                    sparse_offsets.append(sparse_offsets[-1] + len(vector))
+
+            count += len(chunks)
+            logger.info(f"Exported {count} chunks")
+
+    if has_sparse:
+        np.save(path / SPARSE_OFFSETS_FILE, np.asarray(sparse_offsets, dtype=np.int64))
+    else:
+        (path / SPARSE_INDICES_FILE).unlink()
+        (path / SPARSE_VALUES_FILE).unlink()
+        (path / SPARSE_OFFSETS_FILE).unlink(missing_ok=True)
+
+    auxiliary = []
+    if include_auxiliary:
+        for name, source in auxiliary_paths().items():
+            if source.exists():
+                _copy(source, path / name)
+                auxiliary.append(name)
+            else:
+                logger.warning(f"Auxiliary index not found, skipped: {source}")
+
+    settings = get_settings()
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "count": count,
+        "dimension": dimension,
+        "embedding_model": settings.embedding_model,
+        "sparse": has_sparse,
+        "source": {
+            "store": type(vector_store).__name__,
+            "collection": getattr(vector_store, "collection_name", None),
+        },
+        "auxiliary": auxiliary,
+        "files": _file_entries(path),
+    }
+    tmp_path = path / f"{MANIFEST_FILE}.tmp"
+    tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp_path.replace(path / MANIFEST_FILE)
+    logger.info(f"Exported snapshot ({count} chunks, dimension {dimension}): {path}")
+    return manifest
+
+
+def read_manifest(path: Path) -> dict[str, Any]:
+    """スナップショットのマニフェストを読み込み（バージョンを確認）"""
+    manifest_path = path / MANIFEST_FILE
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"Snapshot manifest not found (incomplete export?): {manifest_path}")
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {manifest.get('version')}: {path}")
+    return manifest
+
+
+def verify_snapshot(path: Path, manifest: dict[str, Any] | None = None) -> None:
+    """全ファイルのサイズとSHA-256をマニフェストと照合（一致しなければ ValueError）"""
+    manifest = manifest or read_manifest(path)
+    for name, entry in manifest["files"].items():
+        file_path = path / name
+        if not file_path.exists():
+            raise ValueError(f"Snapshot file missing: {file_path}")
+        if file_path.stat().st_size != entry["bytes"] or _sha256(file_path) != entry["sha256"]:
+            raise ValueError(f"Snapshot file corrupted: {file_path}")
+    logger.info(f"Verified snapshot ({len(manifest['files'])} files): {path}")
+
+
+def _load_array(path: Path, dtype: type, shape: tuple[int, ...]) -> np.ndarray:
+    """生の配列ファイルをメモリマップで読み込み（空のファイルはマップできないため空配列）"""
+    if int(np.prod(shape)) == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+def import_snapshot(
+    path: Path,
+    vector_store: VectorStoreBase,
+    batch_size: int = 1000,
+    workers: int = 4,
+    include_auxiliary: bool = True,
+    verify: bool = False,
+) -> int:
+    """
+    スナップショットをベクトルストアに読み込む
+
+    ペイロードは batch_size 行ずつ読み、埋め込みはメモリマップから切り出して
+    add_documents で追加する（埋め込み・スパースベクトルは再計算しない）。
+    Qdrantへは workers 個のバッチを並行して送る。ローカルストアは追加のたびに
+    行列を作り直すため、全件を1回で追加する。
+
+    Returns:
+        追加したチャンク数
+    """
+    # local_vector_store はvector_storeモジュールを参照するため、ここで読み込む
+    from src.retrieval.local_vector_store import LocalVectorStore
+
+    manifest = read_manifest(path)
+    if verify:
+        verify_snapshot(path, manifest)
+
+    count, dimension = manifest["count"], manifest["dimension"]
+    expected = getattr(vector_store, "embedding_dimension", dimension)
+    if count and dimension != expected:
+        raise ValueError(f"Snapshot has dimension {dimension}, vector store expects {expected}")
+
+    vectors = _load_array(path / VECTORS_FILE, np.float32, (count, dimension))
+    use_sparse = manifest["sparse"] and vector_store.supports_hybrid
+    if use_sparse:
+        offsets = np.load(path / SPARSE_OFFSETS_FILE)
+        indices = _load_array(path / SPARSE_INDICES_FILE, np.uint32, (int(offsets[-1]),))
+        values = _load_array(path / SPARSE_VALUES_FILE, np.float32, (int(offsets[-1]),))
+
+    def add_batch(start: int, lines: list[str]) -> int:
+        chunks = [chunk_from_payload(json.loads(line)) for line in lines]
+        end = start + len(chunks)
+        if not use_sparse:
+            return vector_store.add_documents(chunks, vectors[start:end])
+        sparse_vectors = [
+            dict(zip(indices[a:b].tolist(), values[a:b].tolist(), strict=True))
+            for a, b in zip(offsets[start:end], offsets[start + 1 : end + 1], strict=True)
+        ]
+        return vector_store.add_documents(
+            chunks, vectors[start:end], sparse_vectors=sparse_vectors
+        )
+
+    if isinstance(vector_store, LocalVectorStore):
+        batch_size, workers = max(count, 1), 1
+
+    total = 0
+    with (
+        open(path / PAYLOADS_FILE, encoding="utf-8") as f,
+        ThreadPoolExecutor(max_workers=max(workers, 1)) as executor,
+    ):
+        # 読み込み済みで未送信のバッチを一定数に抑え、ファイル全体をメモリに載せない
+        pending: deque[Future] = deque()
+        start = 0
+        while lines := list(islice(f, batch_size)):
+            if len(pending) >= 2 * workers:
+                total += pending.popleft().result()
+            pending.append(executor.submit(add_batch, start, lines))
+            start += len(lines)
+            logger.info(f"Importing {start}/{count} chunks")
+        while pending:
+            total += pending.popleft().result()
+
+    vector_store.flush()
+
+    if include_auxiliary:
+        targets = auxiliary_paths()
+        for name in manifest.get("auxiliary", []):
+            if name in targets:
+                _copy(path / name, targets[name])
+                logger.info(f"Restored {name}: {targets[name]}")
+
+    logger.info(f"Imported snapshot ({total} chunks): {path}")
+    return total
@@ -4,24 +4,134 @@
 Qdrantを使用したベクトル検索
 """
 
+import asyncio
+import contextvars
 import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Optional, Any
-from uuid import uuid4
+from collections.abc import Callable, Hashable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Optional
+from uuid import NAMESPACE_URL, uuid4, uuid5
 
-from qdrant_client import QdrantClient
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models as qdrant_models
 
 from src.config import get_settings
+from src.ingestion.embedder import Embedding, EmbeddingMatrix, as_embedding, as_embedding_matrix
+from src.ingestion.sparse_encoder import SparseEncoderBase, get_shared_sparse_encoder
 from src.ingestion.text_splitter import TextChunk
+from src.retrieval.content_store import ContentStoreBase, get_content_store
+from src.tracing import span
 
 logger = logging.getLogger(__name__)
 
+# SearchResultの固定フィールドに対応するペイロードキー
+RESERVED_PAYLOAD_KEYS = ("chunk_id", "content", "source_file", "page_number")
 
-@dataclass
+# 1回の upsert で送るポイント数
+UPSERT_BATCH_SIZE = 256
+
+# 検索結果には不要な大きいペイロード（LLMの分類理由など）
+HEAVY_PAYLOAD_KEYS = ("category_reasoning",)
+
+# フィルタ検索で使うペイロードのインデックス定義
+PAYLOAD_INDEXES = {
+    "category_id": qdrant_models.PayloadSchemaType.INTEGER,
+    "source_file": qdrant_models.PayloadSchemaType.KEYWORD,
+    "page_number": qdrant_models.PayloadSchemaType.INTEGER,
+    "is_table": qdrant_models.PayloadSchemaType.BOOL,
+}
+
+# 範囲フィルタとして解釈するキー
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+
+# Matryoshka検索で使う名前付きベクトル
+# - fast: 埋め込みの先頭 matryoshka_dim 次元（HNSWで候補を生成、メモリ上に保持）
+# - full: 全次元（候補の再スコアリングのみに使うためHNSWを作らずディスクに置く）
+FAST_VECTOR = "fast"
+FULL_VECTOR = "full"
+
+# ベクトルの量子化方式（"" は float32 のみ）
+QUANTIZATION_MODES = ("int8", "binary")
+
+# 検索語のスパースベクトル（語頻度の重みのみ保存し、IDFはQdrantが補正する）
+SPARSE_VECTOR = "sparse"
+
+# 名前なしの密ベクトル（スパースベクトルと並べて保存する場合のキー）
+DEFAULT_VECTOR = ""
+
+# ハイブリッド検索で密・疎それぞれから取り出す候補数の下限
+HYBRID_PREFETCH_LIMIT = 100
+
+# 書き込みのたびに更新するコレクションメタデータのキー（別プロセスの書き込みの検出用）
+REVISION_METADATA_KEY = "revision"
+
+
+def point_id_for(chunk_id: str) -> str:
+    """chunk_idから決定的なポイントIDを生成（再取り込み時は上書きになる）"""
+    return str(uuid5(NAMESPACE_URL, chunk_id))
+
+
+def chunk_payload(chunk: TextChunk, external_content: bool = False) -> dict[str, Any]:
+    """
+    チャンクのペイロードを作成
+
+    external_content=True（本文ストア利用時）は本文と大きいフィールドを除く。
+    """
+    payload = {
+        "chunk_id": chunk.chunk_id,
+        "content": chunk.content,
+        "source_file": chunk.source_file,
+        "page_number": chunk.page_number,
+        "chunk_index": chunk.chunk_index,
+        **chunk.metadata,
+    }
+    if external_content:
+        for key in ("content", *HEAVY_PAYLOAD_KEYS):
+            payload.pop(key, None)
+    return payload
+
+
+def chunk_from_payload(payload: dict[str, Any]) -> TextChunk:
+    """ペイロードからチャンクを復元（chunk_payload の逆変換）"""
+    metadata = dict(payload)
+    return TextChunk(
+        content=metadata.pop("content", ""),
+        chunk_id=metadata.pop("chunk_id"),
+        source_file=metadata.pop("source_file", ""),
+        page_number=metadata.pop("page_number", 0),
+        chunk_index=metadata.pop("chunk_index", 0),
+        metadata=metadata,
+    )
+
+
+def restore_external_content(payloads: list[dict[str, Any]], content_store: ContentStoreBase) -> None:
+    """本文ストアに退避した本文と大きいフィールドをペイロードに戻す"""
+    chunk_ids = [payload["chunk_id"] for payload in payloads]
+    contents = content_store.get_many(chunk_ids)
+    extras = content_store.get_extra_many(chunk_ids)
+    for chunk_id, payload in zip(chunk_ids, payloads, strict=True):
+        payload["content"] = contents.get(chunk_id, "")
+        payload.update(extras.get(chunk_id, {}))
+
+
+# iter_chunks が返す (チャンク, 埋め込み行列, スパースベクトル or None)
+ChunkBatch = tuple[list[TextChunk], np.ndarray, Optional[list[dict[int, float]]]]
+
+
+@dataclass(slots=True)
 class SearchResult:
-    """検索結果"""
+    """
+    検索結果
+
+    with_content=False で検索した場合 content は空文字のままで、
+    hydrate() で本文を一括取得する。
+    vector は with_vectors=True で検索した場合のみ埋め込み（全次元）を持つ。
+    """
 
     chunk_id: str
     content: str
@@ -29,14 +139,113 @@ class SearchResult:
     source_file: str
     page_number: int
     metadata: dict
+    point_id: Optional[str] = None
+    vector: Optional[Any] = None
+
+    @property
+    def is_hydrated(self) -> bool:
+        return bool(self.content)
+
+
+@dataclass(slots=True)
+class SearchResultBatch:
+    """
+    複数クエリの検索結果（列形式）
+
+    全クエリのヒットを列ごとの配列に並べ、クエリ i のヒットは
+    offsets[i]:offsets[i + 1] の位置にある。ヒットごとに SearchResult を作らずに
+    chunk_id・スコアを扱えるため、多めに取得した候補の統合などの一括処理で使う。
+    result() / results() / to_lists() で SearchResult として取り出せる。
+    scores は SearchResult.score と同じ値を保つよう float64 で持つ。
+    """
+
+    chunk_ids: np.ndarray
+    scores: np.ndarray
+    offsets: np.ndarray
+    contents: list[str]
+    source_files: list[str]
+    page_numbers: np.ndarray
+    metadata: list[dict]
+    point_ids: list[Optional[str]]
+    vectors: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        """クエリ数"""
+        return len(self.offsets) - 1
+
+    @property
+    def num_hits(self) -> int:
+        return len(self.chunk_ids)
+
+    def span_of(self, i: int) -> tuple[int, int]:
+        """クエリ i のヒットの位置の範囲"""
+        return int(self.offsets[i]), int(self.offsets[i + 1])
+
+    def result(self, position: int) -> SearchResult:
+        """位置 position のヒット"""
+        return SearchResult(
+            chunk_id=self.chunk_ids[position],
+            content=self.contents[position],
+            score=float(self.scores[position]),
+            source_file=self.source_files[position],
+            page_number=int(self.page_numbers[position]),
+            metadata=self.metadata[position],
+            point_id=self.point_ids[position],
+            vector=self.vectors[position] if self.vectors is not None else None,
+        )
+
+    def results(self, i: int) -> list[SearchResult]:
+        """クエリ i の検索結果"""
+        start, end = self.span_of(i)
+        return [self.result(position) for position in range(start, end)]
+
+    def to_lists(self) -> list[list[SearchResult]]:
+        """クエリごとの検索結果リスト（search_many と同じ形）"""
+        return [self.results(i) for i in range(len(self))]
+
+    @classmethod
+    def from_lists(cls, result_lists: list[list[SearchResult]]) -> "SearchResultBatch":
+        """クエリごとの検索結果リストから作成"""
+        hits = [result for results in result_lists for result in results]
+        vectors = None
+        if hits and all(r.vector is not None for r in hits):
+            vectors = as_embedding_matrix([r.vector for r in hits])
+        return cls(
+            chunk_ids=np.array([r.chunk_id for r in hits], dtype=object),
+            scores=np.array([r.score for r in hits], dtype=np.float64),
+            offsets=np.cumsum([0] + [len(results) for results in result_lists], dtype=np.int64),
+            contents=[r.content for r in hits],
+            source_files=[r.source_file for r in hits],
+            page_numbers=np.array([r.page_number for r in hits], dtype=np.int64),
+            metadata=[r.metadata for r in hits],
+            point_ids=[r.point_id for r in hits],
+            vectors=vectors,
+        )
 
 
 class VectorStoreBase(ABC):
     """ベクトルストア基底クラス"""
 
+    # このプロセス内でコレクションの内容を変えるたびに増える番号
+    _local_revision: int = 0
+
+    @property
+    def revision(self) -> Hashable:
+        """
+        コレクションの内容のリビジョン（変わると検索キャッシュを無効化する）
+
+        既定ではこのプロセス内の書き込み回数。別プロセスの書き込みを検出できる
+        ストアは、コレクションの状態も含めた値を返す。
+        """
+        return self._local_revision
+
+    def _bump_revision(self) -> None:
+        """このプロセス内での書き込みを記録"""
+        self._local_revision += 1
+
     @abstractmethod
     def add_documents(
-        self, chunks: list[TextChunk], embeddings: list[list[float]]
+        self, chunks: list[TextChunk], embeddings: EmbeddingMatrix
     ) -> int:
         """ドキュメントを追加"""
         pass
@@ -44,11 +253,302 @@ class VectorStoreBase(ABC):
     @abstractmethod
     def search(
         self, 
-        query_embedding: list[float], 
+        query_embedding: Embedding, 
         top_k: int = 5,
-        metadata_filter: Optional[dict[str, Any]] = None
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
     ) -> list[SearchResult]:
-        """類似検索（メタデータフィルタ対応）"""
+        """
+        類似検索（メタデータフィルタ対応）
+
+        with_content=False の場合は本文を転送せず、ID・スコア・軽量な
+        メタデータのみを返す（本文は hydrate() で後から取得）。
+        hnsw_ef / exact は近似検索の探索幅・厳密検索の指定（対応するバックエンドのみ）。
+        with_vectors=True の場合は各結果の vector に埋め込みを付ける（MMRなどの後処理用）。
+        """
+        pass
+
+    def hydrate(self, results: list[SearchResult]) -> list[SearchResult]:
+        """
+        本文未取得の検索結果に本文を一括で補完
+
+        デフォルト実装は何もしない（search が常に本文を返すバックエンド向け）。
+        """
+        return results
+
+    def search_many(
+        self,
+        query_embeddings: EmbeddingMatrix,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[list[SearchResult]]:
+        """
+        複数クエリの一括類似検索
+
+        デフォルト実装は search をスレッドで並列に呼び出す。
+        バッチAPIを持つバックエンドはオーバーライドして1往復にまとめる。
+
+        Returns:
+            クエリごとの検索結果リスト（入力と同じ順序）
+        """
+        def search_one(embedding: Embedding) -> list[SearchResult]:
+            return self.search(
+                embedding,
+                top_k=top_k,
+                metadata_filter=metadata_filter,
+                with_content=with_content,
+                hnsw_ef=hnsw_ef,
+                exact=exact,
+                with_vectors=with_vectors,
+            )
+
+        if len(query_embeddings) <= 1:
+            return [search_one(embedding) for embedding in query_embeddings]
+
+        # スレッドごとにコンテキストを複製し、ワーカー内のスパンもトレースに記録する
+        with ThreadPoolExecutor(max_workers=min(8, len(query_embeddings))) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, search_one, embedding)
+                for embedding in query_embeddings
+            ]
+            return [future.result() for future in futures]
+
+    def search_batch(
+        self,
+        query_embeddings: EmbeddingMatrix,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> SearchResultBatch:
+        """
+        複数クエリの一括類似検索（列形式）
+
+        デフォルト実装は search_many の結果を列形式に変換する。
+        """
+        return SearchResultBatch.from_lists(
+            self.search_many(
+                query_embeddings, top_k, metadata_filter, with_content,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors,
+            )
+        )
+
+    async def asearch(
+        self,
+        query_embedding: Embedding,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """
+        類似検索（非同期版）
+
+        デフォルト実装は search をワーカースレッドで実行する。
+        非同期クライアントを持つバックエンドはオーバーライドする。
+        """
+        return await asyncio.to_thread(
+            self.search,
+            query_embedding,
+            top_k,
+            metadata_filter,
+            with_content,
+            hnsw_ef=hnsw_ef,
+            exact=exact,
+            with_vectors=with_vectors,
+        )
+
+    async def asearch_many(
+        self,
+        query_embeddings: EmbeddingMatrix,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[list[SearchResult]]:
+        """複数クエリの一括類似検索（非同期版、デフォルトは asearch を並行実行）"""
+        return list(
+            await asyncio.gather(
+                *(
+                    self.asearch(
+                        embedding, top_k, metadata_filter, with_content,
+                        hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors,
+                    )
+                    for embedding in query_embeddings
+                )
+            )
+        )
+
+    async def ahydrate(self, results: list[SearchResult]) -> list[SearchResult]:
+        """本文の一括補完（非同期版）"""
+        if all(r.is_hydrated for r in results):
+            return results
+        return await asyncio.to_thread(self.hydrate, results)
+
+    @abstractmethod
+    def fetch(
+        self,
+        chunk_ids: list[str],
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """
+        chunk_idを指定してチャンクを取得（ベクトル以外の候補生成の結果を検索結果にする）
+
+        フィルタに一致するものだけを入力の順序で返す。score は 0.0。
+        """
+        pass
+
+    async def afetch(
+        self,
+        chunk_ids: list[str],
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """chunk_id指定の取得（非同期版、デフォルトはワーカースレッドで実行）"""
+        return await asyncio.to_thread(
+            self.fetch, chunk_ids, metadata_filter, with_content, with_vectors=with_vectors
+        )
+
+    @property
+    def supports_hybrid(self) -> bool:
+        """スパースベクトルを持ち、ハイブリッド検索をストア側で行えるか"""
+        return False
+
+    def hybrid_search(
+        self,
+        query_text: str,
+        query_embedding: Embedding,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        alpha: float = 0.5,
+        rrf_k: int = 60,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """
+        語彙（スパースベクトル）と意味（密ベクトル）のハイブリッド検索
+
+        alpha は密ベクトル側のRRFの重み（スパース側は 1 - alpha）。
+        デフォルト実装はスパースベクトルを持たないバックエンド向けで、密ベクトル検索のみを行う。
+        """
+        return self.search(
+            query_embedding, top_k, metadata_filter, with_content,
+            hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors
+        )
+
+    def hybrid_search_many(
+        self,
+        query_texts: list[str],
+        query_embeddings: EmbeddingMatrix,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        alpha: float = 0.5,
+        rrf_k: int = 60,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[list[SearchResult]]:
+        """複数クエリの一括ハイブリッド検索（デフォルトは hybrid_search をスレッドで並列実行）"""
+        if not self.supports_hybrid:
+            return self.search_many(
+                query_embeddings, top_k, metadata_filter, with_content,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors,
+            )
+
+        def search_one(args: tuple[str, Embedding]) -> list[SearchResult]:
+            return self.hybrid_search(
+                *args, top_k, metadata_filter, with_content,
+                alpha=alpha, rrf_k=rrf_k, hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors,
+            )
+
+        pairs = list(zip(query_texts, query_embeddings, strict=True))
+        if len(pairs) <= 1:
+            return [search_one(pair) for pair in pairs]
+
+        with ThreadPoolExecutor(max_workers=min(8, len(pairs))) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, search_one, pair)
+                for pair in pairs
+            ]
+            return [future.result() for future in futures]
+
+    async def ahybrid_search(
+        self,
+        query_text: str,
+        query_embedding: Embedding,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        alpha: float = 0.5,
+        rrf_k: int = 60,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """ハイブリッド検索（非同期版、デフォルトは hybrid_search をワーカースレッドで実行）"""
+        if not self.supports_hybrid:
+            return await self.asearch(
+                query_embedding, top_k, metadata_filter, with_content,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors,
+            )
+        return await asyncio.to_thread(
+            self.hybrid_search,
+            query_text,
+            query_embedding,
+            top_k,
+            metadata_filter,
+            with_content,
+            alpha=alpha,
+            rrf_k=rrf_k,
+            hnsw_ef=hnsw_ef,
+            exact=exact,
+            with_vectors=with_vectors,
+        )
+
+    def flush(self) -> None:
+        """
+        追加したドキュメントを永続化
+
+        デフォルト実装は何もしない（add_documents の時点で保存されるバックエンド向け）。
+        """
+
+    @abstractmethod
+    def iter_chunks(self, batch_size: int = 1000) -> Iterator[ChunkBatch]:
+        """
+        全チャンクを埋め込み付きで batch_size 件ずつ取り出す（スナップショットの書き出し用）
+
+        本文ストア利用時も本文と退避したフィールドを補完したチャンクを返す。
+        スパースベクトルを保存しているバックエンドはそのベクトルも返す（なければ None）。
+        """
         pass
 
     @abstractmethod
@@ -57,8 +557,56 @@ class VectorStoreBase(ABC):
         pass
 
 
+def _regroup(
+    flat: list[SearchResult], batches: list[list[SearchResult]]
+) -> list[list[SearchResult]]:
+    """平坦化して補完した結果をクエリごとのリストに戻す"""
+    grouped, start = [], 0
+    for results in batches:
+        grouped.append(flat[start : start + len(results)])
+        start += len(results)
+    return grouped
+
+
+_pool_lock = threading.Lock()
+_client_pool: dict[tuple[str, int], QdrantClient] = {}
+_async_client_pool: dict[tuple[str, int], AsyncQdrantClient] = {}
+_store_registry: dict[tuple, "VectorStoreBase"] = {}
+
+
+def get_qdrant_client(host: str, port: int) -> QdrantClient:
+    """(host, port) ごとにプロセス内で共有するQdrantクライアントを取得"""
+    with _pool_lock:
+        client = _client_pool.get((host, port))
+        if client is None:
+            client = QdrantClient(host=host, port=port)
+            _client_pool[(host, port)] = client
+        return client
+
+
+def get_async_qdrant_client(host: str, port: int) -> AsyncQdrantClient:
+    """(host, port) ごとにプロセス内で共有する非同期Qdrantクライアントを取得"""
+    with _pool_lock:
+        client = _async_client_pool.get((host, port))
+        if client is None:
+            client = AsyncQdrantClient(host=host, port=port)
+            _async_client_pool[(host, port)] = client
+        return client
+
+
 class QdrantVectorStore(VectorStoreBase):
-    """Qdrantベクトルストア"""
+    """
+    Qdrantベクトルストア
+
+    クライアントは (host, port) ごとに共有する。コレクションの存在確認・
+    作成は初回のクライアント利用時に一度だけ行う。
+
+    本文ストアを指定した場合、本文と大きいメタデータはストア側に保存し、
+    ペイロードにはフィルタ用の軽量なフィールドのみを持たせる。
+
+    sparse_vectors=True の場合は密ベクトルと並べて検索語のスパースベクトルを保存し、
+    hybrid_search で両者の検索とRRFによる統合をQdrant内で1回のクエリとして行う。
+    """
 
     def __init__(
         self,
@@ -66,128 +614,988 @@ class QdrantVectorStore(VectorStoreBase):
         port: int | None = None,
         collection_name: str | None = None,
         embedding_dimension: int | None = None,
+        content_store: ContentStoreBase | None = None,
+        matryoshka_dim: int | None = None,
+        rescore_limit: int | None = None,
+        quantization: str | None = None,
+        oversampling: float | None = None,
+        hnsw_m: int | None = None,
+        hnsw_ef_construct: int | None = None,
+        sparse_vectors: bool | None = None,
+        sparse_encoder: SparseEncoderBase | None = None,
     ):
         settings = get_settings()
         self.host = host or settings.qdrant_host
         self.port = port or settings.qdrant_port
         self.collection_name = collection_name or settings.qdrant_collection
         self.embedding_dimension = embedding_dimension or settings.embedding_dimension
+        self.matryoshka_dim = (
+            matryoshka_dim if matryoshka_dim is not None else settings.matryoshka_dim
+        )
+        self.rescore_limit = rescore_limit or settings.matryoshka_rescore_limit
+        if not 0 <= self.matryoshka_dim < self.embedding_dimension:
+            raise ValueError(
+                f"matryoshka_dim must be between 0 and {self.embedding_dimension - 1}, "
+                f"got {self.matryoshka_dim}"
+            )
+        self.quantization = (
+            quantization if quantization is not None else settings.vector_quantization
+        )
+        if self.quantization and self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"Unknown quantization: {self.quantization}. Available: {list(QUANTIZATION_MODES)}"
+            )
+        self.oversampling = oversampling or settings.quantization_oversampling
+        self.quantization_rescore = settings.quantization_rescore
+        self.hnsw_m = hnsw_m if hnsw_m is not None else settings.hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct or settings.hnsw_ef_construct
+        self.hnsw_ef = settings.hnsw_ef
+        self.sparse_vectors = (
+            sparse_vectors if sparse_vectors is not None else settings.sparse_vectors_enabled
+        )
+        if self.sparse_vectors and sparse_encoder is None:
+            sparse_encoder = get_shared_sparse_encoder()
+        self.sparse_encoder = sparse_encoder
 
-        self.client = QdrantClient(host=self.host, port=self.port)
-        self._ensure_collection()
+        if content_store is None and settings.content_store_file is not None:
+            content_store = get_content_store(path=settings.content_store_file)
+        self.content_store = content_store
+
+        self._client = get_qdrant_client(self.host, self.port)
+        self._async_client: AsyncQdrantClient | None = None
+        self._collection_ready = False
+        self._ready_lock = threading.Lock()
+        self.revision_check_interval = settings.revision_check_interval
+        self._collection_state: Hashable = None
+        self._state_checked_at = float("-inf")
 
         logger.info(
             f"Initialized Qdrant: {self.host}:{self.port}, collection: {self.collection_name}"
         )
 
+    def _ensure_ready(self):
+        """コレクションを一度だけ検証・作成（スレッドセーフ）"""
+        if self._collection_ready:
+            return
+        with self._ready_lock:
+            if not self._collection_ready:
+                self._ensure_collection()
+                self._collection_ready = True
+
+    @property
+    def client(self) -> QdrantClient:
+        """同期クライアント（初回アクセス時にコレクションを検証）"""
+        self._ensure_ready()
+        return self._client
+
+    async def _aensure_ready(self) -> None:
+        """
+        _ensure_ready の非同期版
+
+        コレクションの検証・作成は同期クライアントで行うため、初回はワーカースレッドで
+        実行してイベントループを止めない。既存コレクションの構成（Matryoshka・スパース
+        ベクトル）が反映されるよう、クエリを組み立てる前に呼ぶ。
+        """
+        if not self._collection_ready:
+            await asyncio.to_thread(self._ensure_ready)
+
+    @property
+    def async_client(self) -> AsyncQdrantClient:
+        """非同期クライアント（初回の非同期呼び出し時に取得、先に _aensure_ready を呼ぶ）"""
+        if self._async_client is None:
+            self._async_client = get_async_qdrant_client(self.host, self.port)
+        return self._async_client
+
     def _ensure_collection(self):
         """コレクションが存在しない場合は作成"""
-        collections = self.client.get_collections().collections
+        collections = self._client.get_collections().collections
         collection_names = [c.name for c in collections]
 
         if self.collection_name not in collection_names:
-            self.client.create_collection(
+            self._client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=qdrant_models.VectorParams(
-                    size=self.embedding_dimension,
-                    distance=qdrant_models.Distance.COSINE,
+                vectors_config=self._vectors_config(),
+                hnsw_config=qdrant_models.HnswConfigDiff(
+                    m=self.hnsw_m, ef_construct=self.hnsw_ef_construct
                 ),
+                quantization_config=self._quantization_config(),
+                sparse_vectors_config=self._sparse_vectors_config(),
             )
             logger.info(f"Created collection: {self.collection_name}")
+        else:
+            self._check_vector_layout()
+
+        self._ensure_payload_indexes()
+
+    @property
+    def uses_matryoshka(self) -> bool:
+        return self.matryoshka_dim > 0
+
+    def _bump_revision(self) -> None:
+        """書き込みを記録し、コレクションのメタデータのマーカーを更新（別プロセスへの通知）"""
+        super()._bump_revision()
+        self._state_checked_at = float("-inf")
+        if not self._collection_ready:
+            return
+        try:
+            self._client.update_collection(
+                collection_name=self.collection_name,
+                metadata={REVISION_METADATA_KEY: uuid4().hex},
+            )
+        except Exception as e:
+            logger.warning(f"Failed to record revision of {self.collection_name}: {e}")
+
+    def _read_collection_state(self) -> Hashable:
+        """コレクションの件数とリビジョンのマーカー（コレクションがなければNone）"""
+        try:
+            info = self._client.get_collection(collection_name=self.collection_name)
+        except Exception:
+            return None
+        metadata = info.config.metadata or {}
+        return (info.points_count, metadata.get(REVISION_METADATA_KEY))
+
+    @property
+    def revision(self) -> Hashable:
+        """
+        コレクションの内容のリビジョン
+
+        このプロセス内の書き込み回数に加えて、コレクションの件数と書き込みのたびに
+        更新するメタデータのマーカーを revision_check_interval 秒ごとに確認する
+        （取り込みスクリプト・スナップショットの読み込みなど別プロセスの書き込みも反映）。
+        """
+        now = time.monotonic()
+        if now - self._state_checked_at >= self.revision_check_interval:
+            self._collection_state = self._read_collection_state()
+            self._state_checked_at = now
+        return (self._local_revision, self._collection_state)
+
+    @property
+    def supports_hybrid(self) -> bool:
+        return self.sparse_vectors
+
+    def _vectors_config(self) -> qdrant_models.VectorParams | dict[str, qdrant_models.VectorParams]:
+        """ベクトル定義（Matryoshka有効時は fast / full の名前付きベクトル）"""
+        if not self.uses_matryoshka:
+            return qdrant_models.VectorParams(
+                size=self.embedding_dimension,
+                distance=qdrant_models.Distance.COSINE,
+                # 量子化時は元のベクトルは再スコアリングにしか使わないためディスクに置く
+                on_disk=True if self.quantization else None,
+            )
+        # COSINE は保存時に正規化されるため、先頭次元を切り出すだけでよい
+        return {
+            FAST_VECTOR: qdrant_models.VectorParams(
+                size=self.matryoshka_dim,
+                distance=qdrant_models.Distance.COSINE,
+            ),
+            FULL_VECTOR: qdrant_models.VectorParams(
+                size=self.embedding_dimension,
+                distance=qdrant_models.Distance.COSINE,
+                on_disk=True,
+                hnsw_config=qdrant_models.HnswConfigDiff(m=0),
+            ),
+        }
+
+    def _quantization_config(self) -> Optional[qdrant_models.QuantizationConfig]:
+        """
+        量子化の設定（量子化したベクトルは常にメモリ上に保持）
+
+        - int8: 各成分を int8 に縮約（メモリ 1/4）
+        - binary: 各成分を符号の1ビットに縮約（メモリ 1/32）
+        """
+        if self.quantization == "int8":
+            return qdrant_models.ScalarQuantization(
+                scalar=qdrant_models.ScalarQuantizationConfig(
+                    type=qdrant_models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True,
+                )
+            )
+        if self.quantization == "binary":
+            return qdrant_models.BinaryQuantization(
+                binary=qdrant_models.BinaryQuantizationConfig(always_ram=True)
+            )
+        return None
+
+    def _sparse_vectors_config(self) -> Optional[dict[str, qdrant_models.SparseVectorParams]]:
+        """スパースベクトル定義（IDFはQdrantがコレクション全体の文書頻度から計算する）"""
+        if not self.sparse_vectors:
+            return None
+        return {
+            SPARSE_VECTOR: qdrant_models.SparseVectorParams(modifier=qdrant_models.Modifier.IDF)
+        }
+
+    def _search_params(
+        self, hnsw_ef: int | None = None, exact: bool = False
+    ) -> Optional[qdrant_models.SearchParams]:
+        """
+        検索パラメータ
+
+        - hnsw_ef: HNSWの探索幅（省略時は設定の hnsw_ef、0ならサーバーのデフォルト）
+        - exact: HNSWを使わない総当たり検索
+        - 量子化時は oversampling 倍の候補を元のベクトルで再スコアリング
+        """
+        hnsw_ef = hnsw_ef or self.hnsw_ef or None
+        quantization = None
+        if self.quantization:
+            quantization = qdrant_models.QuantizationSearchParams(
+                rescore=self.quantization_rescore,
+                oversampling=self.oversampling,
+            )
+        if hnsw_ef is None and not exact and quantization is None:
+            return None
+        return qdrant_models.SearchParams(
+            hnsw_ef=hnsw_ef, exact=exact, quantization=quantization
+        )
+
+    def _check_vector_layout(self):
+        """
+        既存コレクションのベクトル定義が設定と一致するか確認
+
+        設定と異なる場合は既存コレクションの構成に合わせて動かす（設定を反映するには
+        再取り込みが必要）。fast / full のどちらも持たない名前付きベクトルのコレクションは
+        検索できないため ValueError。
+        """
+        info = self._client.get_collection(collection_name=self.collection_name)
+        vectors = info.config.params.vectors
+        if isinstance(vectors, dict):
+            if FAST_VECTOR not in vectors or FULL_VECTOR not in vectors:
+                raise ValueError(
+                    f"Collection {self.collection_name} has unsupported named vectors "
+                    f"{sorted(vectors)}; expected '{FAST_VECTOR}' and '{FULL_VECTOR}'"
+                )
+            matryoshka_dim = vectors[FAST_VECTOR].size
+        else:
+            matryoshka_dim = 0
+        if matryoshka_dim != self.matryoshka_dim:
+            # 名前付き / 名前なしを取り違えたクエリはサーバー側で失敗するため、既存の構成を使う
+            logger.warning(
+                f"Collection {self.collection_name} was created with matryoshka_dim="
+                f"{matryoshka_dim} (configured {self.matryoshka_dim}); using the existing "
+                f"layout until it is re-ingested"
+            )
+            self.matryoshka_dim = matryoshka_dim
+        if self.sparse_vectors and SPARSE_VECTOR not in (info.config.params.sparse_vectors or {}):
+            # スパースベクトルのないコレクションには書き込めないため、密ベクトルのみで動かす
+            logger.warning(
+                f"Collection {self.collection_name} has no sparse vectors; "
+                f"hybrid search falls back to dense search until it is re-ingested"
+            )
+            self.sparse_vectors = False
+
+    def _ensure_payload_indexes(self):
+        """フィルタ対象フィールドのペイロードインデックスを作成（未作成のもののみ）"""
+        info = self._client.get_collection(collection_name=self.collection_name)
+        existing = set((info.payload_schema or {}).keys())
+
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            if field_name in existing:
+                continue
+            self._client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+            )
+            logger.info(f"Created payload index: {field_name} ({field_schema.value})")
 
     def add_documents(
-        self, chunks: list[TextChunk], embeddings: list[list[float]]
+        self,
+        chunks: list[TextChunk],
+        embeddings: EmbeddingMatrix,
+        *,
+        sparse_vectors: Optional[list[dict[int, float]]] = None,
     ) -> int:
-        """ドキュメントを追加"""
+        """
+        ドキュメントを追加
+
+        埋め込みは float32 の行列として受け取り、送信用のfloatのリストへの変換は
+        UPSERT_BATCH_SIZE 件ずつ行う（大きな取り込みでもリストは1バッチ分しか持たない）。
+        sparse_vectors を渡した場合（スナップショットの読み込み）はスパースベクトルを計算しない。
+        """
         if len(chunks) != len(embeddings):
             raise ValueError("chunks and embeddings must have the same length")
+        embeddings = as_embedding_matrix(embeddings)
+
+        # 既存コレクションの構成（スパースベクトルの有無）を先に確認する
+        client = self.client
 
-        points = []
-        for chunk, embedding in zip(chunks, embeddings, strict=True):
-            point_id = str(uuid4())
-            points.append(
+        if self.content_store is not None:
+            self.content_store.put_many(chunks, extra_fields=HEAVY_PAYLOAD_KEYS)
+
+        if not self.sparse_vectors:
+            sparse_vectors = [None] * len(chunks)
+        elif sparse_vectors is None:
+            with span("sparse_encode"):
+                sparse_vectors = self.sparse_encoder.encode_documents(
+                    [chunk.content for chunk in chunks]
+                )
+
+        for start in range(0, len(chunks), UPSERT_BATCH_SIZE):
+            end = start + UPSERT_BATCH_SIZE
+            points = [
                 qdrant_models.PointStruct(
-                    id=point_id,
-                    vector=embedding,
-                    payload={
-                        "chunk_id": chunk.chunk_id,
-                        "content": chunk.content,
-                        "source_file": chunk.source_file,
-                        "page_number": chunk.page_number,
-                        "chunk_index": chunk.chunk_index,
-                        **chunk.metadata,
-                    },
+                    id=point_id_for(chunk.chunk_id),
+                    vector=self._point_vector(embedding, sparse),
+                    payload=self._build_payload(chunk),
+                )
+                for chunk, embedding, sparse in zip(
+                    chunks[start:end], embeddings[start:end], sparse_vectors[start:end],
+                    strict=True,
+                )
+            ]
+            client.upsert(collection_name=self.collection_name, points=points)
+        self._bump_revision()
+        logger.info(f"Added {len(chunks)} documents to {self.collection_name}")
+
+        return len(chunks)
+
+    def _point_vector(
+        self, embedding: np.ndarray, sparse: dict[int, float] | None = None
+    ) -> list[float] | dict[str, Any]:
+        """ポイントのベクトル（スパースベクトルがあれば名前付きで並べる）"""
+        embedding = embedding.tolist()
+        if not self.uses_matryoshka and sparse is None:
+            return embedding
+        if self.uses_matryoshka:
+            vectors: dict[str, Any] = {
+                FAST_VECTOR: embedding[: self.matryoshka_dim], FULL_VECTOR: embedding
+            }
+        else:
+            vectors = {DEFAULT_VECTOR: embedding}
+        if sparse is not None:
+            vectors[SPARSE_VECTOR] = self._sparse_vector(sparse)
+        return vectors
+
+    @staticmethod
+    def _sparse_vector(sparse: dict[int, float]) -> qdrant_models.SparseVector:
+        return qdrant_models.SparseVector(indices=list(sparse), values=list(sparse.values()))
+
+    def _query_params(
+        self,
+        query_embedding: Embedding,
+        top_k: int,
+        qdrant_filter: Optional[qdrant_models.Filter],
+        search_params: Optional[qdrant_models.SearchParams] = None,
+    ) -> dict[str, Any]:
+        """
+        QueryRequest の検索条件（query_points には _query_points_args で変換して渡す）
+
+        Matryoshka有効時は、先頭次元の fast ベクトルで rescore_limit 件の候補を
+        取り出し（prefetch）、その候補だけを全次元の full ベクトルで再スコアリングする。
+        検索パラメータ（hnsw_ef・量子化など）はHNSW検索を行う段階（prefetch側）に付ける。
+        """
+        query_embedding = as_embedding(query_embedding).tolist()
+        if not self.uses_matryoshka:
+            return {"query": query_embedding, "params": search_params}
+        return {
+            "query": query_embedding,
+            "using": FULL_VECTOR,
+            "prefetch": qdrant_models.Prefetch(
+                query=query_embedding[: self.matryoshka_dim],
+                using=FAST_VECTOR,
+                limit=max(self.rescore_limit, top_k),
+                filter=qdrant_filter,
+                params=search_params,
+            ),
+        }
+
+    def _hybrid_query_params(
+        self,
+        query_text: str,
+        query_embedding: Embedding,
+        top_k: int,
+        qdrant_filter: Optional[qdrant_models.Filter],
+        search_params: Optional[qdrant_models.SearchParams],
+        alpha: float,
+        rrf_k: int,
+    ) -> dict[str, Any]:
+        """
+        ハイブリッド検索の QueryRequest の検索条件
+
+        密ベクトル（Matryoshka有効時は再スコアリングまで）とスパースベクトルで
+        それぞれ候補を取り出し（prefetch）、重み付きRRFで統合する
+        （Rrf.weights はQdrantサーバー 1.17.0 以降）。
+        クエリに検索語がない場合は密ベクトル検索のみ。
+        """
+        sparse = self.sparse_encoder.encode_query(query_text)
+        if not sparse:
+            return self._query_params(query_embedding, top_k, qdrant_filter, search_params)
+
+        limit = max(top_k, HYBRID_PREFETCH_LIMIT)
+        return {
+            "prefetch": [
+                qdrant_models.Prefetch(
+                    **self._query_params(query_embedding, limit, qdrant_filter, search_params),
+                    limit=limit,
+                    filter=qdrant_filter,
+                ),
+                qdrant_models.Prefetch(
+                    query=self._sparse_vector(sparse),
+                    using=SPARSE_VECTOR,
+                    limit=limit,
+                    filter=qdrant_filter,
+                ),
+            ],
+            "query": qdrant_models.RrfQuery(
+                rrf=qdrant_models.Rrf(k=rrf_k, weights=[alpha, 1.0 - alpha])
+            ),
+        }
+
+    @staticmethod
+    def _query_points_args(params: dict[str, Any]) -> dict[str, Any]:
+        """QueryRequest の検索条件を query_points の引数名に変換"""
+        params["search_params"] = params.pop("params", None)
+        return params
+
+    def _build_payload(self, chunk: TextChunk) -> dict[str, Any]:
+        """ポイントのペイロードを作成（本文ストア利用時は本文・大きいフィールドを除く）"""
+        return chunk_payload(chunk, external_content=self.content_store is not None)
+
+    def _build_condition(self, key: str, value: Any) -> qdrant_models.FieldCondition:
+        """
+        フィルタ値を条件に変換
+
+        - スカラー値: 完全一致 (MatchValue)
+        - list / tuple / set: いずれかに一致 (MatchAny)
+        - {"gte": 1, "lt": 10} などの dict: 範囲 (Range)
+        - {"any": [...]}: いずれかに一致 (MatchAny)
+        """
+        if isinstance(value, dict):
+            if "any" in value:
+                return qdrant_models.FieldCondition(
+                    key=key, match=qdrant_models.MatchAny(any=list(value["any"]))
                 )
+            unknown = set(value) - set(RANGE_OPERATORS)
+            if unknown:
+                raise ValueError(f"Unsupported filter operators for {key}: {sorted(unknown)}")
+            return qdrant_models.FieldCondition(key=key, range=qdrant_models.Range(**value))
+
+        if isinstance(value, (list, tuple, set)):
+            return qdrant_models.FieldCondition(
+                key=key, match=qdrant_models.MatchAny(any=list(value))
+            )
+
+        return qdrant_models.FieldCondition(
+            key=key,
+            match=qdrant_models.MatchValue(value=value)
+        )
+
+    def _build_filter(
+        self, metadata_filter: Optional[dict[str, Any]]
+    ) -> Optional[qdrant_models.Filter]:
+        """メタデータフィルタをQdrantのフィルタオブジェクトに変換"""
+        if not metadata_filter:
+            return None
+
+        must_clauses = [
+            self._build_condition(key, value) for key, value in metadata_filter.items()
+        ]
+        return qdrant_models.Filter(must=must_clauses)
+
+    def _payload_selector(self, with_content: bool) -> qdrant_models.PayloadSelectorExclude:
+        """検索時に転送するペイロードを絞り込む（大きいフィールドを除外）"""
+        exclude = list(HEAVY_PAYLOAD_KEYS)
+        if not with_content or self.content_store is not None:
+            exclude.append("content")
+        return qdrant_models.PayloadSelectorExclude(exclude=exclude)
+
+    def _vector_selector(self, with_vectors: bool) -> bool | list[str]:
+        """検索時に転送するベクトル（全次元の密ベクトルのみ）"""
+        if not with_vectors:
+            return False
+        if self.uses_matryoshka:
+            return [FULL_VECTOR]
+        if self.sparse_vectors:
+            return [DEFAULT_VECTOR]
+        return True
+
+    @staticmethod
+    def _dense_vector(vector: Any) -> Any:
+        """レスポンスのベクトル（名前付きの場合はdict）から全次元の密ベクトルを取り出す"""
+        if isinstance(vector, dict):
+            return vector.get(FULL_VECTOR, vector.get(DEFAULT_VECTOR))
+        return vector
+
+    @staticmethod
+    def _sparse_dict(vector: Any) -> dict[int, float]:
+        """レスポンスのベクトルからスパースベクトルを {語彙ID: 重み} として取り出す"""
+        sparse = vector.get(SPARSE_VECTOR) if isinstance(vector, dict) else None
+        if sparse is None:
+            return {}
+        return dict(zip(sparse.indices, sparse.values, strict=True))
+
+    def iter_chunks(self, batch_size: int = 1000) -> Iterator[ChunkBatch]:
+        """全ポイントをscrollで batch_size 件ずつ取り出す"""
+        # 既存コレクションのベクトル構成を先に反映する
+        self._ensure_ready()
+        vector_names = [FULL_VECTOR if self.uses_matryoshka else DEFAULT_VECTOR]
+        if self.sparse_vectors:
+            vector_names.append(SPARSE_VECTOR)
+        selector = vector_names if self.uses_matryoshka or self.sparse_vectors else True
+
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=selector,
             )
+            if not points:
+                return
+
+            payloads = [point.payload or {} for point in points]
+            if self.content_store is not None:
+                restore_external_content(payloads, self.content_store)
 
-        self.client.upsert(collection_name=self.collection_name, points=points)
-        logger.info(f"Added {len(points)} documents to {self.collection_name}")
+            yield (
+                [chunk_from_payload(payload) for payload in payloads],
+                as_embedding_matrix([self._dense_vector(point.vector) for point in points]),
+                [self._sparse_dict(point.vector) for point in points]
+                if self.sparse_vectors
+                else None,
+            )
+            if offset is None:
+                return
 
-        return len(points)
+    def _to_search_result(self, point: Any) -> SearchResult:
+        """Qdrantの検索ヒット（scroll等のレコードはスコア0）をSearchResultに変換"""
+        # ペイロードはレスポンスごとに新しいdictなので、固定フィールドを取り出して
+        # 残りをそのままメタデータとして使う（ヒットごとのdict再構築を避ける）
+        payload = point.payload or {}
+        return SearchResult(
+            chunk_id=payload.pop("chunk_id", ""),
+            content=payload.pop("content", ""),
+            score=getattr(point, "score", 0.0),
+            source_file=payload.pop("source_file", ""),
+            page_number=payload.pop("page_number", 0),
+            metadata=payload,
+            point_id=str(point.id),
+            vector=self._dense_vector(point.vector) if point.vector is not None else None,
+        )
 
     def search(
         self, 
-        query_embedding: list[float], 
+        query_embedding: Embedding, 
         top_k: int = 5,
-        metadata_filter: Optional[dict[str, Any]] = None
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
     ) -> list[SearchResult]:
         """類似検索（メタデータフィルタ対応）"""
         
         # Qdrantのフィルタオブジェクトを構築
-        qdrant_filter = None
-        if metadata_filter:
-            must_clauses = []
-            for key, value in metadata_filter.items():
-                must_clauses.append(
-                    qdrant_models.FieldCondition(
-                        key=key,
-                        match=qdrant_models.MatchValue(value=value)
-                    )
-                )
-            qdrant_filter = qdrant_models.Filter(must=must_clauses)
+        qdrant_filter = self._build_filter(metadata_filter)
+        payload_selector = self._payload_selector(with_content)
+        search_params = self._search_params(hnsw_ef, exact)
 
-        # hasattr を使用してメソッドの存在を事前チェック
-        if hasattr(self.client, "query_points"):
+        with span("vector_search"):
             results = self.client.query_points(
                 collection_name=self.collection_name,
-                query=query_embedding,
+                **self._query_points_args(
+                    self._query_params(query_embedding, top_k, qdrant_filter, search_params)
+                ),
                 limit=top_k,
                 query_filter=qdrant_filter,
-                with_payload=True,
+                with_payload=payload_selector,
+                with_vectors=self._vector_selector(with_vectors),
             ).points
-        else:
-            results = self.client.search(
+
+        search_results = [self._to_search_result(result) for result in results]
+        if with_content and self.content_store is not None:
+            return self.hydrate(search_results)
+        return search_results
+
+    def search_many(
+        self,
+        query_embeddings: EmbeddingMatrix,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[list[SearchResult]]:
+        """複数クエリの一括類似検索（Qdrantのバッチ検索APIで1往復）"""
+        if len(query_embeddings) == 0:
+            return []
+
+        qdrant_filter = self._build_filter(metadata_filter)
+        payload_selector = self._payload_selector(with_content)
+        search_params = self._search_params(hnsw_ef, exact)
+
+        with span("vector_search"):
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    qdrant_models.QueryRequest(
+                        **self._query_params(embedding, top_k, qdrant_filter, search_params),
+                        limit=top_k,
+                        filter=qdrant_filter,
+                        with_payload=payload_selector,
+                        with_vector=self._vector_selector(with_vectors),
+                    )
+                    for embedding in query_embeddings
+                ],
+            )
+            batch_results = [response.points for response in responses]
+
+        search_results = [
+            [self._to_search_result(result) for result in results]
+            for results in batch_results
+        ]
+        if with_content and self.content_store is not None:
+            return self._hydrate_batches(search_results)
+        return search_results
+
+    def _missing_point_ids(self, results: list[SearchResult]) -> list[str]:
+        return [r.point_id or point_id_for(r.chunk_id) for r in results if not r.is_hydrated]
+
+    def _merge_contents(self, results: list[SearchResult], points: list[Any]) -> list[SearchResult]:
+        contents = {str(p.id): (p.payload or {}).get("content", "") for p in points}
+        return [
+            r
+            if r.is_hydrated
+            else replace(r, content=contents.get(r.point_id or point_id_for(r.chunk_id), ""))
+            for r in results
+        ]
+
+    def _hydrate_from_store(self, results: list[SearchResult]) -> list[SearchResult]:
+        """本文ストアから本文を一括補完（ストアにないものは未取得のまま）"""
+        if self.content_store is None:
+            return results
+        missing = [r.chunk_id for r in results if not r.is_hydrated]
+        if not missing:
+            return results
+        contents = self.content_store.get_many(missing)
+        return [
+            r if r.is_hydrated or r.chunk_id not in contents
+            else replace(r, content=contents[r.chunk_id])
+            for r in results
+        ]
+
+    def _hydrate_batches(self, batches: list[list[SearchResult]]) -> list[list[SearchResult]]:
+        """複数クエリの検索結果をまとめて1回で補完"""
+        return _regroup(self.hydrate([r for results in batches for r in results]), batches)
+
+    def hydrate(self, results: list[SearchResult]) -> list[SearchResult]:
+        """
+        本文未取得の検索結果に本文を1回の一括取得で補完
+
+        本文ストアがあればそこから読み、ストアにないもの（ストア導入前に
+        取り込んだポイントなど）だけQdrantのペイロードから取得する。
+        """
+        with span("hydrate"):
+            results = self._hydrate_from_store(results)
+            missing_ids = self._missing_point_ids(results)
+            if not missing_ids:
+                return results
+
+            points = self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=missing_ids,
+                with_payload=["content"],
+                with_vectors=False,
+            )
+            return self._merge_contents(results, points)
+
+    async def asearch(
+        self,
+        query_embedding: Embedding,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """類似検索（AsyncQdrantClientによる非同期版）"""
+        await self._aensure_ready()
+        qdrant_filter = self._build_filter(metadata_filter)
+        payload_selector = self._payload_selector(with_content)
+        search_params = self._search_params(hnsw_ef, exact)
+
+        with span("vector_search"):
+            response = await self.async_client.query_points(
                 collection_name=self.collection_name,
-                query_vector=query_embedding,
+                **self._query_points_args(
+                    self._query_params(query_embedding, top_k, qdrant_filter, search_params)
+                ),
                 limit=top_k,
                 query_filter=qdrant_filter,
-                with_payload=True,
+                with_payload=payload_selector,
+                with_vectors=self._vector_selector(with_vectors),
             )
+            results = response.points
 
-        search_results = []
-        for result in results:
-            payload = result.payload or {}
-            search_results.append(
-                SearchResult(
-                    chunk_id=payload.get("chunk_id", ""),
-                    content=payload.get("content", ""),
-                    score=result.score,
-                    source_file=payload.get("source_file", ""),
-                    page_number=payload.get("page_number", 0),
-                    metadata={
-                        k: v
-                        for k, v in payload.items()
-                        if k not in ["chunk_id", "content", "source_file", "page_number"]
-                    },
-                )
+        search_results = [self._to_search_result(result) for result in results]
+        if with_content and self.content_store is not None:
+            return await self.ahydrate(search_results)
+        return search_results
+
+    async def asearch_many(
+        self,
+        query_embeddings: EmbeddingMatrix,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[list[SearchResult]]:
+        """複数クエリの一括類似検索（非同期版、バッチAPIで1往復）"""
+        if len(query_embeddings) == 0:
+            return []
+
+        await self._aensure_ready()
+        qdrant_filter = self._build_filter(metadata_filter)
+        payload_selector = self._payload_selector(with_content)
+        search_params = self._search_params(hnsw_ef, exact)
+        with span("vector_search"):
+            responses = await self.async_client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    qdrant_models.QueryRequest(
+                        **self._query_params(embedding, top_k, qdrant_filter, search_params),
+                        limit=top_k,
+                        filter=qdrant_filter,
+                        with_payload=payload_selector,
+                        with_vector=self._vector_selector(with_vectors),
+                    )
+                    for embedding in query_embeddings
+                ],
+            )
+        search_results = [
+            [self._to_search_result(result) for result in response.points]
+            for response in responses
+        ]
+        if with_content and self.content_store is not None:
+            flat = await self.ahydrate([r for results in search_results for r in results])
+            return _regroup(flat, search_results)
+        return search_results
+
+    async def ahydrate(self, results: list[SearchResult]) -> list[SearchResult]:
+        """本文の一括補完（非同期版）"""
+        # ローカルの本文ストアは数ミリ秒で読めるため、そのまま呼び出す
+        with span("hydrate"):
+            results = self._hydrate_from_store(results)
+            missing_ids = self._missing_point_ids(results)
+            if not missing_ids:
+                return results
+
+            await self._aensure_ready()
+            points = await self.async_client.retrieve(
+                collection_name=self.collection_name,
+                ids=missing_ids,
+                with_payload=["content"],
+                with_vectors=False,
+            )
+            return self._merge_contents(results, points)
+
+    def fetch(
+        self,
+        chunk_ids: list[str],
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """chunk_idを指定してチャンクを取得（IDとメタデータの条件を合わせたscroll 1回）"""
+        if not chunk_ids:
+            return []
+
+        qdrant_filter = self._build_filter(metadata_filter)
+        conditions = [qdrant_models.HasIdCondition(has_id=[point_id_for(c) for c in chunk_ids])]
+        if qdrant_filter is not None:
+            conditions.extend(qdrant_filter.must)
+        with span("fetch"):
+            points, _ = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=qdrant_models.Filter(must=conditions),
+                limit=len(chunk_ids),
+                with_payload=self._payload_selector(with_content),
+                with_vectors=self._vector_selector(with_vectors),
+            )
+
+        by_id = {r.chunk_id: r for r in map(self._to_search_result, points)}
+        results = [by_id[c] for c in chunk_ids if c in by_id]
+        if with_content and self.content_store is not None:
+            return self.hydrate(results)
+        return results
+
+    def hybrid_search(
+        self,
+        query_text: str,
+        query_embedding: Embedding,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        alpha: float = 0.5,
+        rrf_k: int = 60,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """ハイブリッド検索（密・疎の検索とRRFによる統合をQdrant内で1往復）"""
+        client = self.client
+        if not self.supports_hybrid:
+            return self.search(
+                query_embedding, top_k, metadata_filter, with_content,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors
+            )
+
+        qdrant_filter = self._build_filter(metadata_filter)
+        params = self._hybrid_query_params(
+            query_text, query_embedding, top_k, qdrant_filter,
+            self._search_params(hnsw_ef, exact), alpha, rrf_k,
+        )
+        with span("vector_search"):
+            results = client.query_points(
+                collection_name=self.collection_name,
+                **self._query_points_args(params),
+                limit=top_k,
+                query_filter=qdrant_filter,
+                with_payload=self._payload_selector(with_content),
+                with_vectors=self._vector_selector(with_vectors),
+            ).points
+
+        search_results = [self._to_search_result(result) for result in results]
+        if with_content and self.content_store is not None:
+            return self.hydrate(search_results)
+        return search_results
+
+    def hybrid_search_many(
+        self,
+        query_texts: list[str],
+        query_embeddings: EmbeddingMatrix,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        alpha: float = 0.5,
+        rrf_k: int = 60,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[list[SearchResult]]:
+        """複数クエリの一括ハイブリッド検索（バッチAPIで1往復）"""
+        if len(query_embeddings) == 0:
+            return []
+        client = self.client
+        if not self.supports_hybrid:
+            return self.search_many(
+                query_embeddings, top_k, metadata_filter, with_content,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors,
+            )
+
+        qdrant_filter = self._build_filter(metadata_filter)
+        payload_selector = self._payload_selector(with_content)
+        search_params = self._search_params(hnsw_ef, exact)
+        with span("vector_search"):
+            responses = client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    qdrant_models.QueryRequest(
+                        **self._hybrid_query_params(
+                            text, embedding, top_k, qdrant_filter, search_params, alpha, rrf_k
+                        ),
+                        limit=top_k,
+                        filter=qdrant_filter,
+                        with_payload=payload_selector,
+                        with_vector=self._vector_selector(with_vectors),
+                    )
+                    for text, embedding in zip(query_texts, query_embeddings, strict=True)
+                ],
+            )
+
+        search_results = [
+            [self._to_search_result(result) for result in response.points]
+            for response in responses
+        ]
+        if with_content and self.content_store is not None:
+            return self._hydrate_batches(search_results)
+        return search_results
+
+    async def ahybrid_search(
+        self,
+        query_text: str,
+        query_embedding: Embedding,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        alpha: float = 0.5,
+        rrf_k: int = 60,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """ハイブリッド検索（AsyncQdrantClientによる非同期版）"""
+        await self._aensure_ready()
+        async_client = self.async_client
+        if not self.supports_hybrid:
+            return await self.asearch(
+                query_embedding, top_k, metadata_filter, with_content,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors
+            )
+
+        qdrant_filter = self._build_filter(metadata_filter)
+        params = self._hybrid_query_params(
+            query_text, query_embedding, top_k, qdrant_filter,
+            self._search_params(hnsw_ef, exact), alpha, rrf_k,
+        )
+        with span("vector_search"):
+            response = await async_client.query_points(
+                collection_name=self.collection_name,
+                **self._query_points_args(params),
+                limit=top_k,
+                query_filter=qdrant_filter,
+                with_payload=self._payload_selector(with_content),
+                with_vectors=self._vector_selector(with_vectors),
             )
 
+        search_results = [self._to_search_result(result) for result in response.points]
+        if with_content and self.content_store is not None:
+            return await self.ahydrate(search_results)
         return search_results
 
+    def _delete_contents(self) -> int:
+        """このコレクションのチャンクを本文ストアから削除（ストアは他のコレクションと共有しうる）"""
+        if not self._client.collection_exists(self.collection_name):
+            return 0
+        deleted, offset = 0, None
+        while True:
+            points, offset = self._client.scroll(
+                collection_name=self.collection_name,
+                limit=UPSERT_BATCH_SIZE * 4,
+                offset=offset,
+                with_payload=["chunk_id"],
+                with_vectors=False,
+            )
+            deleted += self.content_store.delete_many(
+                [point.payload["chunk_id"] for point in points if point.payload]
+            )
+            if offset is None:
+                return deleted
+
     def delete_collection(self) -> bool:
-        """コレクションを削除"""
+        """コレクションを削除（本文ストアに保存した本文も削除）"""
         try:
-            self.client.delete_collection(collection_name=self.collection_name)
+            if self.content_store is not None:
+                deleted = self._delete_contents()
+                logger.info(f"Deleted {deleted} chunk contents of {self.collection_name}")
+            self._client.delete_collection(collection_name=self.collection_name)
+            # 次回利用時にコレクションを再作成する
+            self._collection_ready = False
+            self._bump_revision()
             logger.info(f"Deleted collection: {self.collection_name}")
             return True
         except Exception as e:
@@ -201,16 +1609,626 @@ class QdrantVectorStore(VectorStoreBase):
             "name": self.collection_name,
             "status": info.status,
             "points_count": info.points_count,
+            "matryoshka_dim": self.matryoshka_dim,
+            "quantization": self.quantization or None,
+            "sparse_vectors": self.sparse_vectors,
+            "hnsw": {
+                "m": info.config.hnsw_config.m,
+                "ef_construct": info.config.hnsw_config.ef_construct,
+            },
+        }
+
+
+# シャードキーを持たないチャンクの格納先
+UNSHARDED_KEY = 0
+
+
+def shard_collection_name(collection_name: str, shard_value: Any) -> str:
+    """カテゴリシャードのコレクション名"""
+    return f"{collection_name}_cat{shard_value}"
+
+
+class ShardedQdrantVectorStore(VectorStoreBase):
+    """
+    カテゴリごとにコレクションを分割したQdrantベクトルストア
+
+    ポイントは metadata[shard_key] の値ごとに f"{collection}_cat{値}" へ格納する。
+    - シャードキーで絞り込んだ検索: 該当シャードのみを検索（全体のHNSWグラフ上で
+      フィルタする必要がない）
+    - それ以外の検索: 全シャードを並列に検索し、スコア順に統合して上位k件を返す
+
+    本文は統合後の上位k件についてのみ、シャードごとに一括取得する。
+    """
+
+    def __init__(
+        self,
+        host: str | None = None,
+        port: int | None = None,
+        collection_name: str | None = None,
+        embedding_dimension: int | None = None,
+        content_store: ContentStoreBase | None = None,
+        shard_key: str = "category_id",
+        matryoshka_dim: int | None = None,
+        rescore_limit: int | None = None,
+        quantization: str | None = None,
+        oversampling: float | None = None,
+        hnsw_m: int | None = None,
+        hnsw_ef_construct: int | None = None,
+        sparse_vectors: bool | None = None,
+    ):
+        settings = get_settings()
+        self.host = host or settings.qdrant_host
+        self.port = port or settings.qdrant_port
+        self.collection_name = collection_name or settings.qdrant_collection
+        self.embedding_dimension = embedding_dimension or settings.embedding_dimension
+        self.shard_key = shard_key
+        self.matryoshka_dim = matryoshka_dim
+        self.rescore_limit = rescore_limit
+        self.quantization = quantization
+        self.oversampling = oversampling
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construct = hnsw_ef_construct
+        self.sparse_vectors = (
+            sparse_vectors if sparse_vectors is not None else settings.sparse_vectors_enabled
+        )
+
+        if content_store is None and settings.content_store_file is not None:
+            content_store = get_content_store(path=settings.content_store_file)
+        self.content_store = content_store
+
+        self._client = get_qdrant_client(self.host, self.port)
+        self._shards: dict[Any, QdrantVectorStore] = {}
+        self._shards_discovered = False
+        self._shards_checked_at = float("-inf")
+        self._shards_lock = threading.Lock()
+        self.revision_check_interval = settings.revision_check_interval
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="shard-search")
+
+        logger.info(
+            f"Initialized sharded Qdrant: {self.host}:{self.port}, "
+            f"collections: {shard_collection_name(self.collection_name, '*')}"
+        )
+
+    def _new_shard(self, shard_value: Any) -> QdrantVectorStore:
+        return QdrantVectorStore(
+            host=self.host,
+            port=self.port,
+            collection_name=shard_collection_name(self.collection_name, shard_value),
+            embedding_dimension=self.embedding_dimension,
+            content_store=self.content_store,
+            matryoshka_dim=self.matryoshka_dim,
+            rescore_limit=self.rescore_limit,
+            quantization=self.quantization,
+            oversampling=self.oversampling,
+            hnsw_m=self.hnsw_m,
+            hnsw_ef_construct=self.hnsw_ef_construct,
+            sparse_vectors=self.sparse_vectors,
+        )
+
+    def _discover_shards(self, refresh: bool = False) -> None:
+        """
+        既存のシャードコレクションを列挙
+
+        初回のみ行い、refresh=True の場合は別プロセスが作成したシャードを探して追加する。
+        """
+        if self._shards_discovered and not refresh:
+            return
+        prefix = shard_collection_name(self.collection_name, "")
+        names = [c.name for c in self._client.get_collections().collections]
+        with self._shards_lock:
+            known = len(self._shards)
+            for name in names:
+                suffix = name[len(prefix):]
+                if name.startswith(prefix) and suffix.lstrip("-").isdigit():
+                    shard_value = int(suffix)
+                    if shard_value not in self._shards:
+                        self._shards[shard_value] = self._new_shard(shard_value)
+            self._shards_discovered = True
+            self._shards_checked_at = time.monotonic()
+            found = len(self._shards) - known
+        if found:
+            logger.info(f"Discovered {found} shards for {self.collection_name}")
+
+    @property
+    def revision(self) -> Hashable:
+        """各シャードのリビジョン（別プロセスが作成したシャードも一定間隔で検出する）"""
+        if time.monotonic() - self._shards_checked_at >= self.revision_check_interval:
+            self._discover_shards(refresh=True)
+        shard_revisions = tuple(
+            (shard_value, store.revision) for shard_value, store in sorted(self.shards.items())
+        )
+        return (self._local_revision, shard_revisions)
+
+    def shard(self, shard_value: Any) -> QdrantVectorStore:
+        """シャードのストアを取得（なければ作成）"""
+        with self._shards_lock:
+            store = self._shards.get(shard_value)
+            if store is None:
+                store = self._new_shard(shard_value)
+                self._shards[shard_value] = store
+            return store
+
+    @property
+    def shards(self) -> dict[Any, QdrantVectorStore]:
+        self._discover_shards()
+        return dict(self._shards)
+
+    def _shard_value(self, metadata: dict) -> Any:
+        return metadata.get(self.shard_key, UNSHARDED_KEY)
+
+    def add_documents(
+        self,
+        chunks: list[TextChunk],
+        embeddings: EmbeddingMatrix,
+        *,
+        sparse_vectors: Optional[list[dict[int, float]]] = None,
+    ) -> int:
+        """ドキュメントをシャードごとに分けて追加"""
+        if len(chunks) != len(embeddings):
+            raise ValueError("chunks and embeddings must have the same length")
+
+        embeddings = as_embedding_matrix(embeddings)
+        groups: dict[Any, list[int]] = {}
+        for row, chunk in enumerate(chunks):
+            groups.setdefault(self._shard_value(chunk.metadata), []).append(row)
+
+        total = sum(
+            self.shard(shard_value).add_documents(
+                [chunks[row] for row in rows],
+                embeddings[rows],
+                sparse_vectors=(
+                    [sparse_vectors[row] for row in rows] if sparse_vectors is not None else None
+                ),
+            )
+            for shard_value, rows in groups.items()
+        )
+        self._bump_revision()
+        return total
+
+    def _route(
+        self, metadata_filter: Optional[dict[str, Any]]
+    ) -> tuple[list[QdrantVectorStore], Optional[dict[str, Any]]]:
+        """
+        検索対象のシャードと、各シャードに渡すフィルタを決定
+
+        シャードキーの完全一致・いずれか一致は対象シャードの選択に置き換え、
+        範囲指定などはフィルタとして全シャードに渡す。
+        """
+        shards = self.shards
+        if not metadata_filter or self.shard_key not in metadata_filter:
+            return list(shards.values()), metadata_filter
+
+        value = metadata_filter[self.shard_key]
+        if isinstance(value, dict) and "any" in value:
+            value = value["any"]
+        if isinstance(value, dict):
+            return list(shards.values()), metadata_filter
+
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        if any(v not in shards for v in values):
+            # 別プロセスが後から作成したシャードを探す
+            self._discover_shards(refresh=True)
+            shards = self.shards
+        remaining = {k: v for k, v in metadata_filter.items() if k != self.shard_key}
+        return [shards[v] for v in values if v in shards], remaining or None
+
+    def _fan_out(self, func: Callable[["QdrantVectorStore"], Any], targets: list) -> list:
+        """シャードごとの処理をスレッドで並列実行（トレース等のコンテキストを引き継ぐ）"""
+        futures = [
+            self._executor.submit(contextvars.copy_context().run, func, store)
+            for store in targets
+        ]
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _merge(result_lists: list[list[SearchResult]], top_k: int) -> list[SearchResult]:
+        """シャードごとの結果をスコア順に統合"""
+        merged = [r for results in result_lists for r in results]
+        merged.sort(key=lambda r: r.score, reverse=True)
+        return merged[:top_k]
+
+    def search(
+        self,
+        query_embedding: Embedding,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """類似検索（フィルタに応じて単一シャード or 全シャード並列）"""
+        targets, shard_filter = self._route(metadata_filter)
+        if not targets:
+            return []
+        if len(targets) == 1:
+            return targets[0].search(
+                query_embedding, top_k, shard_filter, with_content,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors
+            )
+
+        result_lists = self._fan_out(
+            lambda store: store.search(
+                query_embedding, top_k, shard_filter, False,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors
+            ),
+            targets,
+        )
+        merged = self._merge(result_lists, top_k)
+        return self.hydrate(merged) if with_content else merged
+
+    def search_many(
+        self,
+        query_embeddings: EmbeddingMatrix,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[list[SearchResult]]:
+        """複数クエリの一括類似検索（シャードごとにバッチ検索1往復）"""
+        if len(query_embeddings) == 0:
+            return []
+        targets, shard_filter = self._route(metadata_filter)
+        if not targets:
+            return [[] for _ in query_embeddings]
+        if len(targets) == 1:
+            return targets[0].search_many(
+                query_embeddings, top_k, shard_filter, with_content,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors
+            )
+
+        per_shard = self._fan_out(
+            lambda store: store.search_many(
+                query_embeddings, top_k, shard_filter, False,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors
+            ),
+            targets,
+        )
+        merged = [
+            self._merge([shard_results[i] for shard_results in per_shard], top_k)
+            for i in range(len(query_embeddings))
+        ]
+        if not with_content:
+            return merged
+        return _regroup(self.hydrate([r for results in merged for r in results]), merged)
+
+    def fetch(
+        self,
+        chunk_ids: list[str],
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """chunk_id指定の取得（対象シャードを並列に検索し、入力の順序に並べ直す）"""
+        if not chunk_ids:
+            return []
+        targets, shard_filter = self._route(metadata_filter)
+        if not targets:
+            return []
+
+        result_lists = self._fan_out(
+            lambda store: store.fetch(
+                chunk_ids, shard_filter, with_content, with_vectors=with_vectors
+            ),
+            targets,
+        )
+        by_id = {r.chunk_id: r for results in result_lists for r in results}
+        return [by_id[c] for c in chunk_ids if c in by_id]
+
+    @property
+    def supports_hybrid(self) -> bool:
+        return self.sparse_vectors
+
+    def hybrid_search(
+        self,
+        query_text: str,
+        query_embedding: Embedding,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        alpha: float = 0.5,
+        rrf_k: int = 60,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """
+        ハイブリッド検索（シャードごとにQdrant内で統合し、RRFスコア順にまとめる）
+
+        RRFスコアは順位のみから決まるため、シャードをまたいでもそのまま比較できる。
+        """
+        targets, shard_filter = self._route(metadata_filter)
+        if not targets:
+            return []
+        if len(targets) == 1:
+            return targets[0].hybrid_search(
+                query_text, query_embedding, top_k, shard_filter, with_content,
+                alpha=alpha, rrf_k=rrf_k, hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors,
+            )
+
+        result_lists = self._fan_out(
+            lambda store: store.hybrid_search(
+                query_text, query_embedding, top_k, shard_filter, False,
+                alpha=alpha, rrf_k=rrf_k, hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors,
+            ),
+            targets,
+        )
+        merged = self._merge(result_lists, top_k)
+        return self.hydrate(merged) if with_content else merged
+
+    def _group_by_shard(
+        self, results: list[SearchResult], shards: dict[Any, QdrantVectorStore]
+    ) -> dict[Any, list[int]]:
+        """
+        本文未取得の結果の位置をシャードごとにまとめる
+
+        メタデータにシャードキーがない結果（隣接チャンクの補完用に作った結果など）や
+        既存のシャードにない値の結果は、格納先が分からないため None にまとめる。
+        """
+        groups: dict[Any, list[int]] = {}
+        for i, result in enumerate(results):
+            if result.is_hydrated:
+                continue
+            shard_value = result.metadata.get(self.shard_key)
+            groups.setdefault(shard_value if shard_value in shards else None, []).append(i)
+        return groups
+
+    def _unrouted_from_store(self, results: list[SearchResult]) -> list[SearchResult]:
+        """格納先が分からない結果を、全シャードで共有する本文ストアから補完"""
+        if self.content_store is None:
+            return results
+        contents = self.content_store.get_many([r.chunk_id for r in results])
+        return [
+            replace(r, content=contents[r.chunk_id]) if r.chunk_id in contents else r
+            for r in results
+        ]
+
+    @staticmethod
+    def _merge_unrouted(
+        results: list[SearchResult], per_shard: list[list[SearchResult]]
+    ) -> list[SearchResult]:
+        """全シャードに問い合わせた結果のうち、本文が見つかったものを採用"""
+        found = {r.chunk_id: r.content for filled in per_shard for r in filled if r.is_hydrated}
+        return [
+            r if r.is_hydrated or r.chunk_id not in found else replace(r, content=found[r.chunk_id])
+            for r in results
+        ]
+
+    def _hydrate_unrouted(
+        self, results: list[SearchResult], shards: dict[Any, QdrantVectorStore]
+    ) -> list[SearchResult]:
+        """格納先が分からない結果を本文ストア、次に全シャードから補完"""
+        results = self._unrouted_from_store(results)
+        missing = [r for r in results if not r.is_hydrated]
+        if not missing or not shards:
+            return results
+        per_shard = self._fan_out(lambda store: store.hydrate(missing), list(shards.values()))
+        return self._merge_unrouted(results, per_shard)
+
+    def hydrate(self, results: list[SearchResult]) -> list[SearchResult]:
+        """本文の一括補完（シャードごとに1回、格納先が分からないものは全シャードから）"""
+        shards = self.shards
+        hydrated = list(results)
+        for shard_value, positions in self._group_by_shard(results, shards).items():
+            batch = [results[i] for i in positions]
+            if shard_value is None:
+                filled = self._hydrate_unrouted(batch, shards)
+            else:
+                filled = shards[shard_value].hydrate(batch)
+            for i, result in zip(positions, filled, strict=True):
+                hydrated[i] = result
+        return hydrated
+
+    async def asearch(
+        self,
+        query_embedding: Embedding,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[SearchResult]:
+        """類似検索（非同期版、全シャードを並行に検索）"""
+        targets, shard_filter = self._route(metadata_filter)
+        if not targets:
+            return []
+        if len(targets) == 1:
+            return await targets[0].asearch(
+                query_embedding, top_k, shard_filter, with_content,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors
+            )
+
+        result_lists = await asyncio.gather(
+            *(
+                store.asearch(
+                    query_embedding, top_k, shard_filter, False,
+                    hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors
+                )
+                for store in targets
+            )
+        )
+        merged = self._merge(list(result_lists), top_k)
+        return await self.ahydrate(merged) if with_content else merged
+
+    async def asearch_many(
+        self,
+        query_embeddings: EmbeddingMatrix,
+        top_k: int = 5,
+        metadata_filter: Optional[dict[str, Any]] = None,
+        with_content: bool = True,
+        *,
+        hnsw_ef: int | None = None,
+        exact: bool = False,
+        with_vectors: bool = False,
+    ) -> list[list[SearchResult]]:
+        """複数クエリの一括類似検索（非同期版）"""
+        if len(query_embeddings) == 0:
+            return []
+        targets, shard_filter = self._route(metadata_filter)
+        if not targets:
+            return [[] for _ in query_embeddings]
+        if len(targets) == 1:
+            return await targets[0].asearch_many(
+                query_embeddings, top_k, shard_filter, with_content,
+                hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors
+            )
+
+        per_shard = await asyncio.gather(
+            *(
+                store.asearch_many(
+                    query_embeddings, top_k, shard_filter, False,
+                    hnsw_ef=hnsw_ef, exact=exact, with_vectors=with_vectors
+                )
+                for store in targets
+            )
+        )
+        merged = [
+            self._merge([shard_results[i] for shard_results in per_shard], top_k)
+            for i in range(len(query_embeddings))
+        ]
+        if not with_content:
+            return merged
+        flat = await self.ahydrate([r for results in merged for r in results])
+        return _regroup(flat, merged)
+
+    async def _ahydrate_unrouted(
+        self, results: list[SearchResult], shards: dict[Any, QdrantVectorStore]
+    ) -> list[SearchResult]:
+        """_hydrate_unrouted の非同期版"""
+        results = self._unrouted_from_store(results)
+        missing = [r for r in results if not r.is_hydrated]
+        if not missing or not shards:
+            return results
+        per_shard = await asyncio.gather(*(store.ahydrate(missing) for store in shards.values()))
+        return self._merge_unrouted(results, list(per_shard))
+
+    async def ahydrate(self, results: list[SearchResult]) -> list[SearchResult]:
+        """本文の一括補完（非同期版、シャードごとに並行して取得）"""
+        shards = self.shards
+        groups = self._group_by_shard(results, shards)
+        if not groups:
+            return results
+
+        filled_groups = await asyncio.gather(
+            *(
+                self._ahydrate_unrouted([results[i] for i in positions], shards)
+                if shard_value is None
+                else shards[shard_value].ahydrate([results[i] for i in positions])
+                for shard_value, positions in groups.items()
+            )
+        )
+        hydrated = list(results)
+        for positions, filled in zip(groups.values(), filled_groups, strict=True):
+            for i, result in zip(positions, filled, strict=True):
+                hydrated[i] = result
+        return hydrated
+
+    def iter_chunks(self, batch_size: int = 1000) -> Iterator[ChunkBatch]:
+        """全シャードのポイントを順に取り出す"""
+        for _, store in sorted(self.shards.items()):
+            yield from store.iter_chunks(batch_size)
+
+    def delete_collection(self) -> bool:
+        """全シャードのコレクションを削除"""
+        deleted = all(store.delete_collection() for store in self.shards.values())
+        with self._shards_lock:
+            self._shards.clear()
+            self._shards_discovered = False
+        self._bump_revision()
+        return deleted
+
+    def get_collection_info(self) -> dict:
+        """シャードごとのコレクション情報を取得"""
+        shard_infos = {
+            shard_value: store.get_collection_info()
+            for shard_value, store in sorted(self.shards.items())
         }
+        return {
+            "name": self.collection_name,
+            "points_count": sum(info["points_count"] or 0 for info in shard_infos.values()),
+            "shards": shard_infos,
+        }
+
+
+def get_vector_store(
+    store_type: str | None = None, shared: bool = True, **kwargs
+) -> VectorStoreBase:
+    """
+    ベクトルストアファクトリー
 
+    store_type を省略した場合は設定の vector_store_type を使う。
+    shared=True の場合は (store_type, host, port, collection, その他の引数) ごとに
+    プロセス内で同じインスタンスを返す。
+    """
+    # local_vector_store はこのモジュールを参照するため、ここで読み込む
+    from src.retrieval.local_vector_store import LocalVectorStore
 
-def get_vector_store(store_type: str = "qdrant", **kwargs) -> VectorStoreBase:
-    """ベクトルストアファクトリー"""
+    settings = get_settings()
+    store_type = store_type or settings.vector_store_type
     stores = {
         "qdrant": QdrantVectorStore,
+        "qdrant_sharded": ShardedQdrantVectorStore,
+        "local": LocalVectorStore,
     }
 
     if store_type not in stores:
         raise ValueError(f"Unknown store type: {store_type}. Available: {list(stores.keys())}")
 
-    return stores[store_type](**kwargs)
\ No newline at end of file
+    if not shared:
+        return stores[store_type](**kwargs)
+
+    options = dict(kwargs)
+    key = (
+        store_type,
+        options.pop("host", None) or settings.qdrant_host,
+        options.pop("port", None) or settings.qdrant_port,
+        options.pop("collection_name", None) or settings.qdrant_collection,
+        tuple(sorted((k, repr(v)) for k, v in options.items())),
+    )
+
+    with _pool_lock:
+        store = _store_registry.get(key)
+    if store is not None:
+        return store
+
+    store = stores[store_type](**kwargs)
+    with _pool_lock:
+        # 同時に作成された場合は先に登録された方を使う
+        return _store_registry.setdefault(key, store)
+
+
+def close_vector_stores() -> None:
+    """共有ストアと同期クライアントを破棄して接続を閉じる（シャットダウン時）"""
+    with _pool_lock:
+        clients = list(_client_pool.values())
+        _client_pool.clear()
+        _store_registry.clear()
+
+    for client in clients:
+        try:
+            client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close Qdrant client: {e}")
+
+
+async def aclose_vector_stores() -> None:
+    """非同期クライアントも含めて全ての共有接続を閉じる"""
+    with _pool_lock:
+        async_clients = list(_async_client_pool.values())
+        _async_client_pool.clear()
+
+    for client in async_clients:
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Failed to close async Qdrant client: {e}")
+
+    close_vector_stores()
@@ -0,0 +1,13 @@
+"""Tracing module for per-stage timing of retrieval and generation"""
+
+from .tracer import Trace, count, is_enabled, set_enabled, span, trace, traced
+
+__all__ = [
+    "Trace",
+    "trace",
+    "traced",
+    "span",
+    "count",
+    "is_enabled",
+    "set_enabled",
+]
@@ -0,0 +1,188 @@
+"""
+処理時間計測モジュール
+
+リクエストごとに各処理段階（埋め込み・ベクトル検索・リランク・LLM生成など）の
+所要時間と件数を集計し、RetrievalResult / RAGResponse のメタデータに付与する。
+
+計測中のトレースは contextvars で受け渡すため、非同期タスクや
+asyncio.to_thread で実行した処理の計測も同じトレースに集計される。
+無効時は span() が共有の空コンテキストを返すだけなので、ほぼコストがかからない。
+"""
+
+import functools
+import inspect
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from src.config import get_settings
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_NULL_SPAN = nullcontext()
+
+# None の場合は設定 (tracing_enabled) に従う
+_enabled_override: bool | None = None
+
+
+def is_enabled() -> bool:
+    """計測が有効か"""
+    if _enabled_override is not None:
+        return _enabled_override
+    return get_settings().tracing_enabled
+
+
+def set_enabled(enabled: bool | None) -> None:
+    """計測の有効・無効を切り替え（None で設定値に戻す）"""
+    global _enabled_override
+    _enabled_override = enabled
+
+
+class Trace:
+    """
+    1回の処理（検索・RAGクエリ）の計測結果
+
+    同名の段階は合算し、呼び出し回数を数える。入れ子のトレースに
+    記録した値は親のトレースにも反映する。
+    """
+
+    def __init__(self, name: str, parent: Optional["Trace"] = None):
+        self.name = name
+        self.parent = parent
+        self.stages: dict[str, list[float]] = {}  # name -> [合計ms, 呼び出し回数]
+        self.counts: dict[str, float] = {}
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def add_stage(self, name: str, elapsed_ms: float) -> None:
+        trace: Trace | None = self
+        while trace is not None:
+            with trace._lock:
+                stage = trace.stages.setdefault(name, [0.0, 0])
+                stage[0] += elapsed_ms
+                stage[1] += 1
+            trace = trace.parent
+
+    def add_count(self, name: str, value: float) -> None:
+        trace: Trace | None = self
+        while trace is not None:
+            with trace._lock:
+                trace.counts[name] = trace.counts.get(name, 0) + value
+            trace = trace.parent
+
+    def to_dict(self) -> dict:
+        """メタデータに格納する形式に変換"""
+        with self._lock:
+            return {
+                "total_ms": round(self.total_ms, 2),
+                "stages": {
+                    name: {"ms": round(ms, 2), "calls": calls}
+                    for name, (ms, calls) in self.stages.items()
+                },
+                "counts": dict(self.counts),
+            }
+
+
+class _Span:
+    __slots__ = ("trace", "name", "started_at")
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.trace.add_stage(self.name, (time.perf_counter() - self.started_at) * 1000)
+
+
+def span(name: str):
+    """
+    処理段階の所要時間を計測するコンテキストマネージャ
+
+    トレース外（計測無効時を含む）では何もしない。
+    """
+    trace = _current.get()
+    if trace is None:
+        return _NULL_SPAN
+    return _Span(trace, name)
+
+
+def count(name: str, value: float = 1) -> None:
+    """件数（候補数・トークン数・キャッシュヒットなど）を加算"""
+    trace = _current.get()
+    if trace is not None:
+        trace.add_count(name, value)
+
+
+@contextmanager
+def trace(name: str) -> Iterator[Trace | None]:
+    """
+    トレースを開始（計測無効時は None を返す）
+
+    既にトレース中の場合は子トレースとなり、全体の所要時間は
+    親トレースの段階 name として記録される。
+    """
+    if not is_enabled():
+        yield None
+        return
+
+    parent = _current.get()
+    current = Trace(name, parent)
+    token = _current.set(current)
+    started_at = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.total_ms = (time.perf_counter() - started_at) * 1000
+        _current.reset(token)
+        if parent is not None:
+            parent.add_stage(name, current.total_ms)
+
+
+def _attach(result: Any, current: Trace) -> None:
+    """戻り値（metadata を持つオブジェクト、またはそのリスト）に計測結果を付与"""
+    summary = current.to_dict()
+    for item in result if isinstance(result, list) else [result]:
+        metadata = getattr(item, "metadata", None)
+        if isinstance(metadata, dict):
+            metadata["timings"] = summary
+
+
+def traced(name: str) -> Callable:
+    """
+    メソッド全体をトレースし、戻り値の metadata["timings"] に計測結果を付与するデコレータ
+
+    同期・非同期のどちらの関数にも使える。
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not is_enabled():
+                    return await func(*args, **kwargs)
+                with trace(name) as current:
+                    result = await func(*args, **kwargs)
+                _attach(result, current)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not is_enabled():
+                return func(*args, **kwargs)
+            with trace(name) as current:
+                result = func(*args, **kwargs)
+            _attach(result, current)
+            return result
+
+        return wrapper
+
+    return decorator
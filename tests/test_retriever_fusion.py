@@ -0,0 +1,49 @@
+"""RRFの列形式実装（reciprocal_rank_fusion_batch）とリスト実装の一致を確認するテスト"""
+
+from src.retrieval.retriever import reciprocal_rank_fusion, reciprocal_rank_fusion_batch
+from src.retrieval.vector_store import SearchResult, SearchResultBatch
+
+
+def _result(chunk_id: str, score: float) -> SearchResult:
+    return SearchResult(
+        chunk_id=chunk_id,
+        content=f"content of {chunk_id}",
+        score=score,
+        source_file="doc.pdf",
+        page_number=1,
+        metadata={"chunk_index": int(chunk_id[1:])},
+    )
+
+
+RESULT_LISTS = [
+    [_result("c1", 0.9), _result("c2", 0.8), _result("c3", 0.7)],
+    [_result("c2", 0.85), _result("c4", 0.6), _result("c1", 0.3)],
+    [],
+    [_result("c5", 0.1), _result("c3", 0.7), _result("c2", 0.95)],
+]
+
+
+def _as_tuples(results: list[SearchResult]) -> list[tuple]:
+    return [(r.chunk_id, r.score, r.content, r.metadata) for r in results]
+
+
+def test_batch_matches_list_fusion():
+    batch = SearchResultBatch.from_lists(RESULT_LISTS)
+    expected = reciprocal_rank_fusion(RESULT_LISTS, k=60)
+    actual = reciprocal_rank_fusion_batch(batch, range(len(RESULT_LISTS)), k=60)
+    assert _as_tuples(actual) == _as_tuples(expected)
+    # 元のスコアは丸めずにそのまま残る（float32 を経由すると 0.949999988...）
+    assert actual[0].chunk_id == "c2"
+    assert actual[0].metadata["vector_score"] == 0.95
+
+
+def test_batch_fuses_query_range():
+    batch = SearchResultBatch.from_lists(RESULT_LISTS)
+    expected = reciprocal_rank_fusion(RESULT_LISTS[1:3], k=10)
+    actual = reciprocal_rank_fusion_batch(batch, range(1, 3), k=10)
+    assert _as_tuples(actual) == _as_tuples(expected)
+
+
+def test_batch_empty_range():
+    batch = SearchResultBatch.from_lists(RESULT_LISTS)
+    assert reciprocal_rank_fusion_batch(batch, range(2, 3)) == []